@@ -0,0 +1,127 @@
+"""Campos a elegir (`fields=`) y relaciones a expandir (`expand=`) en la API.
+
+Cada recurso declara sus campos: qué columnas necesita cada uno, qué join
+(`select_related`) o prefetch implica y cómo se serializa. La forma pedida
+arma la consulta a la medida con `only()`: un cliente que pide
+`?fields=id,numero,estado,total` no lee las columnas restantes, no hace el
+join con el cliente ni trae los ítems.
+
+- Sin `fields` se devuelven los campos por defecto del recurso (la
+  respuesta de siempre).
+- `expand=cliente` agrega esa relación (o reemplaza el campo por su versión
+  expandida: el objeto cliente completo en lugar del nombre).
+- Un nombre desconocido en cualquiera de los dos responde 400.
+
+Uso:
+    forma = VENTA.forma(request)          # ValueError si pidieron algo inválido
+    qs = forma.consulta(PedidoVenta.objects.all(), orden)
+    ...
+    data = [forma.serializar(v) for v in page.items]
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class Campo:
+    """Un campo de la respuesta.
+
+    - `valor`: objeto -> valor JSON
+    - `columnas`: rutas para `only()` (la FK incluida si hay `relacion`)
+    - `relacion`: ruta para `select_related`
+    - `prefetch`: función que devuelve el `Prefetch` que necesita
+    - `sello`: nombre del sello de `condicional` que cubre los datos
+      relacionados que muestra (por defecto el de `relacion`)
+    """
+    valor: Callable
+    columnas: tuple = ()
+    relacion: str | None = None
+    prefetch: Callable | None = None
+    sello: str | None = None
+
+    @property
+    def sello_relacion(self) -> str | None:
+        return self.sello or self.relacion
+
+
+def columna(nombre: str, formato=None) -> Campo:
+    """Campo que sale de una columna propia del modelo."""
+    if formato is None:
+        return Campo(valor=lambda obj: getattr(obj, nombre), columnas=(nombre,))
+    return Campo(valor=lambda obj: formato(getattr(obj, nombre)), columnas=(nombre,))
+
+
+def relacionado(relacion: str, nombre: str) -> Campo:
+    """Campo `nombre` del objeto relacionado por la FK `relacion` (con join)."""
+    return Campo(
+        valor=lambda obj: getattr(getattr(obj, relacion), nombre),
+        columnas=(relacion, f'{relacion}__{nombre}'),
+        relacion=relacion,
+    )
+
+
+def expandido(relacion: str, recurso: 'Recurso') -> Campo:
+    """Objeto relacionado por la FK `relacion` con los campos por defecto de `recurso`."""
+    def valor(obj):
+        return recurso.forma().serializar(getattr(obj, relacion))
+    # `only()` sobre la FK con select_related carga la fila relacionada completa
+    return Campo(valor=valor, columnas=(relacion,), relacion=relacion)
+
+
+@dataclass(frozen=True)
+class Forma:
+    """Campos elegidos para una respuesta, en orden."""
+    campos: dict
+    omitidos: frozenset = frozenset()  # sellos de relaciones que no se muestran
+
+    def consulta(self, qs, orden=()):
+        """`qs` con solo las columnas, joins y prefetches que usan los campos elegidos."""
+        columnas = {c.lstrip('-') for c in orden}
+        relaciones, prefetches = set(), []
+        for campo in self.campos.values():
+            columnas.update(campo.columnas)
+            if campo.relacion:
+                relaciones.add(campo.relacion)
+            if campo.prefetch:
+                prefetches.append(campo.prefetch())
+        qs = qs.select_related(*relaciones) if relaciones else qs.select_related(None)
+        return qs.prefetch_related(None).prefetch_related(*prefetches).only('pk', *columnas)
+
+    def sellos(self, sellos: dict) -> dict:
+        """`sellos` sin los de relaciones que no aparecen en la respuesta."""
+        return {nombre: expresion for nombre, expresion in sellos.items() if nombre not in self.omitidos}
+
+    def serializar(self, obj) -> dict:
+        return {nombre: campo.valor(obj) for nombre, campo in self.campos.items()}
+
+
+def _lista(request, parametro) -> list[str]:
+    return [n.strip() for n in request.GET.get(parametro, '').split(',') if n.strip()]
+
+
+@dataclass(frozen=True)
+class Recurso:
+    """Campos disponibles de un recurso y sus expansiones."""
+    campos: dict
+    expansiones: dict = field(default_factory=dict)
+
+    def forma(self, request=None) -> Forma:
+        """Forma pedida en `fields`/`expand`; la forma completa si no hay `request`.
+
+        Lanza ValueError con el mensaje para el cliente.
+        """
+        pedidos = _lista(request, 'fields') if request else []
+        expandir = _lista(request, 'expand') if request else []
+        for nombre in pedidos:
+            if nombre not in self.campos and nombre not in self.expansiones:
+                raise ValueError(f'campo desconocido: {nombre}')
+        for nombre in expandir:
+            if nombre not in self.expansiones:
+                raise ValueError(f'expansión desconocida: {nombre}')
+        campos = {n: self.campos.get(n) or self.expansiones[n] for n in pedidos or self.campos}
+        for nombre in expandir:
+            campos[nombre] = self.expansiones[nombre]
+        todos = {c.sello_relacion for c in (*self.campos.values(), *self.expansiones.values())}
+        usados = {c.sello_relacion for c in campos.values()}
+        return Forma(campos=campos, omitidos=frozenset(todos - usados - {None}))
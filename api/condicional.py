@@ -0,0 +1,107 @@
+"""GET condicional (ETag / Last-Modified) para los endpoints de la API.
+
+Los validadores salen de una consulta angosta sobre la columna `actualizado`
+(ver modelos de inventario/ventas/compras), antes de consultar y serializar
+los datos; si el cliente ya tiene la versión vigente (`If-None-Match` o
+`If-Modified-Since`) se responde 304 sin armar el cuerpo.
+
+- Recurso: `actualizado` de la fila y de las filas relacionadas que aparecen
+  en el JSON (cliente, proveedor, productos de los ítems...). Se envían
+  ETag y Last-Modified.
+- Página de un listado: los pares (id, `actualizado`) de las filas que
+  tendría la página (mismo orden, cursor y límite que `paginar`) y de sus
+  relacionadas, más los parámetros de la petición. Cuesta lo mismo que leer
+  la página por índice, no depende del tamaño de la tabla, y detecta altas,
+  bajas y cambios dentro de la página sin carreras entre relojes (un máximo
+  de `actualizado` + COUNT(*) recorrería la tabla y podría perder una
+  escritura confirmada tarde). Solo ETag: Last-Modified no refleja bajas.
+
+Uso:
+    sellos = {'venta': F('actualizado'), 'cliente': F('cliente__actualizado')}
+    val = pagina(request, qs, orden, sellos)
+    if val and (no_modificado := val.no_modificado(request)):
+        return no_modificado
+    page = paginar(request, qs, orden)
+    ...
+    return val.aplicar(JsonResponse(...))
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db.models import Max, OuterRef, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .pagination import recortar
+
+
+@dataclass(frozen=True)
+class Validadores:
+    etag: str
+    ultima: datetime | None = None  # solo recursos individuales
+
+    def no_modificado(self, request):
+        """Respuesta 304 si el cliente tiene esta versión; None si hay que responder completo."""
+        respuesta = get_conditional_response(
+            request, etag=self.etag, last_modified=self.ultima and int(self.ultima.timestamp()),
+        )
+        return respuesta and self.aplicar(respuesta)
+
+    def aplicar(self, respuesta):
+        """Agrega los validadores a `respuesta` (el cliente debe revalidar antes de reutilizarla)."""
+        respuesta['ETag'] = self.etag
+        if self.ultima:
+            respuesta['Last-Modified'] = http_date(self.ultima.timestamp())
+        respuesta['Cache-Control'] = 'private, no-cache'
+        return respuesta
+
+
+def _etag(request, sellos) -> str:
+    clave = repr((request.path, sorted(request.GET.lists()), sellos))
+    return quote_etag(hashlib.sha1(clave.encode()).hexdigest()[:24])
+
+
+def maximo(modelo, fk: str, campo: str):
+    """Máximo de `campo` en las filas de `modelo` que apuntan a la fila externa por `fk`.
+
+    Subconsulta correlacionada en lugar de `Max()` sobre el join: solo se
+    evalúa para las filas de la página, sin agrupar toda la tabla.
+    """
+    filas = modelo.objects.filter(**{fk: OuterRef('pk')}).order_by().values(fk)
+    return Subquery(filas.annotate(maximo=Max(campo)).values('maximo'))
+
+
+def _con_sellos(qs, sellos):
+    return qs.annotate(**{f'sello_{nombre}': expresion for nombre, expresion in sellos.items()})
+
+
+def _lista(qs, sellos):
+    return qs.values_list('pk', *[f'sello_{nombre}' for nombre in sellos])
+
+
+def pagina(request, qs, orden, sellos) -> Validadores | None:
+    """Validadores de la página de `qs` que devolvería `paginar(request, qs, orden)`.
+
+    `sellos` como en `recurso`. None si los parámetros de paginación son
+    inválidos (`paginar` responderá el error).
+    """
+    try:
+        recorte, _ = recortar(request, _con_sellos(qs, sellos), orden)
+    except ValueError:
+        return None
+    return Validadores(etag=_etag(request, tuple(_lista(recorte, sellos))))
+
+
+def recurso(request, qs, sellos) -> Validadores | None:
+    """Validadores de la única fila de `qs` o None si no existe.
+
+    `sellos`: {nombre: expresión} con las columnas `actualizado` de lo que
+    se serializa, p. ej. `F('cliente__actualizado')` o, para relaciones
+    múltiples, `maximo(PedidoVentaItem, 'pedido', 'producto__actualizado')`.
+    """
+    fila = _lista(_con_sellos(qs, sellos), sellos).first()
+    if fila is None:
+        return None
+    return Validadores(etag=_etag(request, fila), ultima=max((s for s in fila[1:] if s), default=None))
@@ -0,0 +1,192 @@
+"""Lotes de operaciones para `/api/batch/`.
+
+Un lote es una lista ordenada de operaciones sobre los endpoints de la API
+(`api/urls.py`) que se ejecutan en una sola petición HTTP: la sesión, el
+middleware y la conexión se resuelven una vez y cada operación llama
+directamente a su vista con una petición interna (mismo usuario, mismo
+cuerpo JSON que enviaría por separado).
+
+    {"atomico": true, "operaciones": [
+        {"id": "c", "metodo": "POST", "ruta": "clientes/", "cuerpo": {"nombre_completo": "Ana"}},
+        {"id": "v", "metodo": "POST", "ruta": "ventas/",
+         "cuerpo": {"cliente_id": "$c.id", "items": [{"producto_id": 5, "cantidad": 2}]}},
+        {"metodo": "POST", "ruta": "ventas/$v.id/completar/"}
+    ]}
+
+- `ruta` es relativa a `/api/` (también se acepta con el prefijo) y puede
+  traer query string para los GET.
+- Referencias: `$id.campo` (o `$id.items.0.producto_id`) toma un valor de la
+  respuesta de una operación anterior. Un string que es solo la referencia
+  se reemplaza por el valor con su tipo; dentro de `ruta` se interpola.
+- Con `atomico` todo corre en una transacción: la primera operación que
+  responda >= 400 detiene el lote y revierte las anteriores. Sin `atomico`
+  cada operación confirma por su cuenta y el lote sigue; las que dependen
+  de una operación fallida fallan con 400.
+- Cada operación corre en su propio savepoint: si su vista lanza un error
+  de BD o un DoesNotExist, se revierte solo esa operación y su resultado es
+  409 (violación de integridad), 404 o 500, como si hubiera respondido así.
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import DatabaseError, IntegrityError, transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+MAX_OPERACIONES = 100
+METODOS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+# Vistas que no tienen sentido dentro de un lote (cambian la sesión, anidan lotes o leen archivos)
+_EXCLUIDAS = {'api_batch', 'api_login', 'api_logout', 'api_productos_importar', 'api_conteos'}
+
+_REFERENCIA = re.compile(r'\$([A-Za-z_][\w-]*)((?:\.[\w-]+)+)')
+_PREFIJO = '/api/'
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorLote(ValueError):
+    """Operación mal formada o referencia que no se puede resolver."""
+
+
+class _Abortar(Exception):
+    """Revierte la transacción de un lote atómico."""
+
+
+@dataclass
+class Resultado:
+    id: str | None
+    status: int
+    cuerpo: object = None
+
+    def as_json(self) -> dict:
+        return {'id': self.id, 'status': self.status, 'cuerpo': self.cuerpo}
+
+
+def max_operaciones() -> int:
+    return getattr(settings, 'API_BATCH_MAX', MAX_OPERACIONES)
+
+
+def _valor(anteriores: dict, id_: str, camino: str):
+    resultado = anteriores.get(id_)
+    if resultado is None:
+        raise ErrorLote(f'referencia a una operación desconocida: ${id_}')
+    if resultado.status >= 400:
+        raise ErrorLote(f'la operación {id_} falló')
+    valor = resultado.cuerpo
+    for parte in camino.lstrip('.').split('.'):
+        try:
+            valor = valor[int(parte)] if isinstance(valor, list) else valor[parte]
+        except (KeyError, IndexError, ValueError, TypeError):
+            raise ErrorLote(f'referencia inválida: ${id_}{camino}') from None
+    return valor
+
+
+def _sustituir(dato, anteriores: dict):
+    """`dato` (cuerpo JSON) con las referencias reemplazadas."""
+    if isinstance(dato, str):
+        if completa := _REFERENCIA.fullmatch(dato):
+            return _valor(anteriores, *completa.groups())
+        return dato
+    if isinstance(dato, list):
+        return [_sustituir(d, anteriores) for d in dato]
+    if isinstance(dato, dict):
+        return {k: _sustituir(v, anteriores) for k, v in dato.items()}
+    return dato
+
+
+def _interpolar(ruta: str, anteriores: dict) -> str:
+    return _REFERENCIA.sub(lambda m: str(_valor(anteriores, *m.groups())), ruta)
+
+
+def _peticion(request, metodo: str, ruta: str, cuerpo) -> HttpRequest:
+    """Petición interna para una operación, con el usuario y la sesión de `request`."""
+    camino, _, query = ruta.partition('?')
+    interna = HttpRequest()
+    interna.method = metodo
+    interna.path = interna.path_info = camino
+    interna.GET = QueryDict(query)
+    interna.user = request.user
+    interna.session = request.session
+    # Sin los validadores condicionales de la petición externa
+    interna.META = {k: v for k, v in request.META.items() if not k.startswith('HTTP_IF_')}
+    interna.META.update(REQUEST_METHOD=metodo, PATH_INFO=camino, QUERY_STRING=query,
+                        CONTENT_TYPE='application/json')
+    interna._body = b'' if cuerpo is None else json.dumps(cuerpo).encode()
+    return interna
+
+
+def _ejecutar(request, operacion, anteriores: dict) -> Resultado:
+    if not isinstance(operacion, dict):
+        raise ErrorLote('cada operación debe ser un objeto')
+    id_ = operacion.get('id')
+    metodo = str(operacion.get('metodo', 'GET')).upper()
+    if metodo not in METODOS:
+        raise ErrorLote(f'metodo inválido: {metodo}')
+    ruta = operacion.get('ruta')
+    if not isinstance(ruta, str) or not ruta:
+        raise ErrorLote('ruta requerida')
+    ruta = _interpolar(ruta, anteriores)
+    if not ruta.startswith(_PREFIJO):
+        ruta = _PREFIJO + ruta.lstrip('/')
+    cuerpo = _sustituir(operacion.get('cuerpo'), anteriores)
+    try:
+        match = resolve(ruta.partition('?')[0])
+    except Resolver404:
+        raise ErrorLote(f'ruta desconocida: {ruta}') from None
+    if not match.url_name or not match.url_name.startswith('api_') or match.url_name in _EXCLUIDAS:
+        raise ErrorLote(f'ruta no permitida en un lote: {ruta}')
+    try:
+        # Savepoint (o transacción, fuera de un lote atómico) por operación
+        with transaction.atomic():
+            respuesta = match.func(_peticion(request, metodo, ruta, cuerpo), *match.args, **match.kwargs)
+    except ObjectDoesNotExist as e:
+        return Resultado(id=id_, status=404, cuerpo={'error': str(e) or 'No encontrado'})
+    except IntegrityError as e:
+        return Resultado(id=id_, status=409, cuerpo={'error': f'conflicto de integridad: {e}'})
+    except DatabaseError:
+        logger.exception('Error de BD en la operación %s (%s %s) de un lote', id_, metodo, ruta)
+        return Resultado(id=id_, status=500, cuerpo={'error': 'error de base de datos'})
+    contenido = None
+    if respuesta.content and respuesta.get('Content-Type', '').startswith('application/json'):
+        contenido = json.loads(respuesta.content)
+    return Resultado(id=id_, status=respuesta.status_code, cuerpo=contenido)
+
+
+def _correr(request, operaciones, detener: bool) -> list[Resultado]:
+    anteriores, resultados = {}, []
+    for operacion in operaciones:
+        try:
+            resultado = _ejecutar(request, operacion, anteriores)
+        except ErrorLote as e:
+            resultado = Resultado(id=operacion.get('id') if isinstance(operacion, dict) else None,
+                                  status=400, cuerpo={'error': str(e)})
+        resultados.append(resultado)
+        if resultado.id is not None:
+            anteriores[resultado.id] = resultado
+        if detener and resultado.status >= 400:
+            break
+    return resultados
+
+
+def ejecutar(request, operaciones: list, atomico: bool = False) -> tuple[list[Resultado], bool]:
+    """Corre `operaciones` en orden; devuelve `(resultados, confirmado)`.
+
+    `confirmado` es False si el lote era atómico y se revirtió (el último
+    resultado es el de la operación que falló).
+    """
+    if not atomico:
+        return _correr(request, operaciones, detener=False), True
+    resultados = []
+    try:
+        with transaction.atomic():
+            resultados = _correr(request, operaciones, detener=True)
+            if resultados and resultados[-1].status >= 400:
+                raise _Abortar
+    except _Abortar:
+        return resultados, False
+    return resultados, True
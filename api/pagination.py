@@ -0,0 +1,125 @@
+"""Paginación por cursor (keyset) para los listados de la API.
+
+El cursor es opaco para el cliente: codifica los valores de la llave de orden
+del último registro entregado. La siguiente página se obtiene filtrando
+"después de" esa llave, nunca con OFFSET, por lo que el costo no crece con el
+número de página y las inserciones concurrentes no duplican ni saltan filas.
+
+Uso:
+    page = paginar(request, qs, ('-fecha', 'numero'))
+    if page.error:
+        return page.error
+    return JsonResponse({'results': [...page.items], 'next': page.next})
+
+La llave de orden debe identificar una fila de forma única (terminar en `id`
+o en un campo `unique`).
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+@dataclass
+class Pagina:
+    """Resultado de paginar un queryset."""
+    items: list = field(default_factory=list)
+    next: str | None = None
+    error: JsonResponse | None = None
+
+
+def _valor(obj, nombre):
+    valor = getattr(obj, nombre)
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def codificar_cursor(orden, valores) -> str:
+    # El orden viaja en el cursor para rechazar cursores de otro ordenamiento
+    raw = json.dumps([','.join(orden), *valores], separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor: str, orden) -> list:
+    """Devuelve la lista de valores del cursor o lanza ValueError."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError('cursor inválido') from e
+    if not isinstance(valores, list) or len(valores) != len(orden) + 1 or valores[0] != ','.join(orden):
+        raise ValueError('cursor inválido')
+    return valores[1:]
+
+
+def filtro_despues_de(orden, valores) -> Q:
+    """Condición keyset "fila posterior a `valores`" para la llave `orden`.
+
+    Para (-fecha, numero) genera: fecha < f OR (fecha = f AND numero > n).
+    """
+    condicion = Q()
+    previos = {}
+    for campo, valor in zip(orden, valores):
+        nombre = campo.lstrip('-')
+        op = 'lt' if campo.startswith('-') else 'gt'
+        condicion |= Q(**previos, **{f'{nombre}__{op}': valor})
+        previos[nombre] = valor
+    return condicion
+
+
+def _limite(request) -> int:
+    default = getattr(settings, 'API_PAGE_SIZE', DEFAULT_LIMIT)
+    maximo = getattr(settings, 'API_MAX_PAGE_SIZE', MAX_LIMIT)
+    raw = request.GET.get('limit')
+    if not raw:
+        return default
+    limite = int(raw)
+    if limite <= 0:
+        raise ValueError('limit debe ser > 0')
+    return min(limite, maximo)
+
+
+def recortar(request, qs, orden):
+    """Aplica orden + cursor + límite a `qs` sin evaluarlo.
+
+    Devuelve `(qs, limite)`; `qs` trae un registro extra para saber si hay
+    página siguiente. Lanza ValueError con el mensaje para el cliente.
+    """
+    try:
+        limite = _limite(request)
+    except ValueError:
+        raise ValueError('limit inválido') from None
+    qs = qs.order_by(*orden)
+    cursor = request.GET.get('cursor')
+    if cursor:
+        qs = qs.filter(filtro_despues_de(orden, decodificar_cursor(cursor, orden)))
+    return qs[:limite + 1], limite
+
+
+def paginar(request, qs, orden) -> Pagina:
+    """Aplica orden + cursor + límite a `qs` y devuelve una página.
+
+    - `limit`: tamaño de página (por defecto API_PAGE_SIZE, tope API_MAX_PAGE_SIZE)
+    - `cursor`: valor de `next` devuelto por la página anterior
+    """
+    try:
+        qs, limite = recortar(request, qs, orden)
+    except ValueError as e:
+        return Pagina(error=JsonResponse({'error': str(e)}, status=400))
+    items = list(qs)
+    siguiente = None
+    if len(items) > limite:
+        items = items[:limite]
+        ultimo = items[-1]
+        siguiente = codificar_cursor(orden, [_valor(ultimo, c.lstrip('-')) for c in orden])
+    return Pagina(items=items, next=siguiente)
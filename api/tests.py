@@ -0,0 +1,237 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from compras.models import OrdenCompra, OrdenCompraItem
+from inventario.models import CategoriaProducto, MovimientoInventario, Producto, Proveedor
+from ventas.models import Cliente, PedidoVenta, PedidoVentaItem
+
+
+class ListadosSinNMasUnoTests(TestCase):
+    """Los listados hacen las mismas consultas con 1 pedido que con una página llena."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = Proveedor.objects.create(empresa='Acme', contacto_principal='-', telefono='-', direccion='-')
+        categoria = CategoriaProducto.objects.create(nombre='General')
+        cls.productos = [
+            Producto.objects.create(
+                codigo=f'P{i}', nombre=f'Producto {i}', precio_venta=Decimal('10.00'),
+                precio_compra=Decimal('6.00'), cantidad_en_inventario=100,
+                proveedor=cls.proveedor, categoria=categoria,
+            )
+            for i in range(3)
+        ]
+        cls.user = User.objects.create_user('ana')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _venta(self, i):
+        cliente = Cliente.objects.create(nombre_completo=f'Cliente {i}', direccion='-', telefono='-', email='c@x.com')
+        pedido = PedidoVenta.objects.create(cliente=cliente)
+        for producto in self.productos:
+            PedidoVentaItem.objects.create(pedido=pedido, producto=producto, cantidad=1, precio_unitario=Decimal('10'))
+
+    def _compra(self, i):
+        proveedor = Proveedor.objects.create(empresa=f'Prov {i}', contacto_principal='-', telefono='-', direccion='-')
+        orden = OrdenCompra.objects.create(proveedor=proveedor)
+        for producto in self.productos:
+            OrdenCompraItem.objects.create(orden=orden, producto=producto, cantidad=2, costo_unitario=Decimal('6'))
+
+    def _consultas(self, url, esperados):
+        with CaptureQueriesContext(connection) as ctx:
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()['results']), esperados)
+        return len(ctx.captured_queries)
+
+    def _comparar(self, url, crear):
+        crear(0)
+        una = self._consultas(url, 1)
+        for i in range(1, 20):
+            crear(i)
+        with self.assertNumQueries(una):
+            self.assertEqual(len(self.client.get(url).json()['results']), 20)
+
+    def test_ventas(self):
+        self._comparar('/api/ventas/', self._venta)
+
+    def test_ventas_expandidas(self):
+        self._comparar('/api/ventas/?expand=cliente', self._venta)
+
+    def test_compras(self):
+        self._comparar('/api/compras/', self._compra)
+
+
+class LoteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = Proveedor.objects.create(empresa='Acme', contacto_principal='-', telefono='-', direccion='-')
+        cls.categoria = CategoriaProducto.objects.create(nombre='General')
+        cls.producto = Producto.objects.create(
+            codigo='P1', nombre='Tornillo', precio_venta=Decimal('10.00'), precio_compra=Decimal('6.00'),
+            cantidad_en_inventario=100, proveedor=cls.proveedor, categoria=cls.categoria,
+        )
+        cls.user = User.objects.create_user('ana')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _lote(self, operaciones, atomico=False):
+        return self.client.post(
+            '/api/batch/', {'operaciones': operaciones, 'atomico': atomico}, content_type='application/json',
+        )
+
+    def _producto(self, codigo, **extra):
+        return {'metodo': 'POST', 'ruta': 'productos/', **extra, 'cuerpo': {
+            'codigo': codigo, 'nombre': codigo, 'precio_venta': '5', 'precio_compra': '3',
+            'proveedor_id': self.proveedor.pk, 'categoria_id': self.categoria.pk,
+        }}
+
+    def _status(self, respuesta):
+        return [r['status'] for r in respuesta.json()['resultados']]
+
+    def test_referencias_a_operaciones_anteriores(self):
+        respuesta = self._lote([
+            {'id': 'c', 'metodo': 'POST', 'ruta': 'clientes/', 'cuerpo': {'nombre_completo': 'Ana'}},
+            {'id': 'v', 'metodo': 'POST', 'ruta': 'ventas/',
+             'cuerpo': {'cliente_id': '$c.id', 'items': [{'producto_id': self.producto.pk, 'cantidad': 2}]}},
+            {'metodo': 'POST', 'ruta': 'ventas/$v.id/completar/'},
+            {'id': 'g', 'metodo': 'GET', 'ruta': 'ventas/$v.id/?fields=id,cliente_id,estado,total'},
+        ], atomico=True)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self._status(respuesta), [201, 201, 200, 200])
+        venta = respuesta.json()['resultados'][3]['cuerpo']
+        self.assertEqual(venta['cliente_id'], Cliente.objects.get().pk)
+        self.assertEqual((venta['estado'], venta['total']), ('completado', '20.00'))
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.cantidad_en_inventario, 98)
+
+    def test_atomico_revierte_todo_al_fallar(self):
+        respuesta = self._lote([
+            {'id': 'c', 'metodo': 'POST', 'ruta': 'clientes/', 'cuerpo': {'nombre_completo': 'Ana'}},
+            {'metodo': 'POST', 'ruta': 'ventas/', 'cuerpo': {'cliente_id': '$c.id', 'items': []}},
+            {'metodo': 'POST', 'ruta': 'clientes/', 'cuerpo': {'nombre_completo': 'Beto'}},
+        ], atomico=True)
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self._status(respuesta), [201, 400])
+        self.assertFalse(Cliente.objects.exists())
+
+    def test_error_de_bd_a_mitad_del_lote(self):
+        respuesta = self._lote([
+            self._producto('P2', id='a'),
+            self._producto('P1', id='b'),  # código duplicado
+            self._producto('P3'),
+            {'metodo': 'GET', 'ruta': 'productos/$b.id/'},
+        ])
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self._status(respuesta), [201, 409, 201, 400])
+        self.assertEqual(sorted(Producto.objects.values_list('codigo', flat=True)), ['P1', 'P2', 'P3'])
+
+    def test_error_de_bd_en_lote_atomico(self):
+        respuesta = self._lote([self._producto('P2'), self._producto('P1'), self._producto('P3')], atomico=True)
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self._status(respuesta), [201, 409])
+        self.assertEqual(list(Producto.objects.values_list('codigo', flat=True)), ['P1'])
+
+
+class MovimientosReferenciaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        proveedor = Proveedor.objects.create(empresa='Acme', contacto_principal='-', telefono='-', direccion='-')
+        producto = Producto.objects.create(
+            codigo='P1', nombre='Tornillo', precio_venta=Decimal('10.00'), precio_compra=Decimal('6.00'),
+            proveedor=proveedor, categoria=CategoriaProducto.objects.create(nombre='General'),
+        )
+        for referencia in ('V-0001', 'V-00012', 'OC-0001'):
+            MovimientoInventario.objects.create(producto=producto, tipo='entrada', cantidad=1, referencia=referencia)
+        cls.user = User.objects.create_user('ana')
+
+    def _referencias(self, **params):
+        self.client.force_login(self.user)
+        respuesta = self.client.get('/api/inventario/movimientos/', params)
+        return sorted(m['referencia'] for m in respuesta.json()['results'])
+
+    def test_referencia_es_subcadena(self):
+        self.assertEqual(self._referencias(referencia='v-0001'), ['V-0001', 'V-00012'])
+        self.assertEqual(self._referencias(referencia='0001'), ['OC-0001', 'V-0001', 'V-00012'])
+
+    def test_referencia_exacta(self):
+        self.assertEqual(self._referencias(referencia_exacta='V-0001'), ['V-0001'])
+
+
+class ImportarProductosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Proveedor.objects.create(empresa='Acme', contacto_principal='-', telefono='-', direccion='-')
+        CategoriaProducto.objects.create(nombre='General')
+        cls.user = User.objects.create_user('ana')
+
+    def test_importa_cuerpo_csv(self):
+        self.client.force_login(self.user)
+        cuerpo = (
+            'codigo,nombre,precio_venta,precio_compra,proveedor,categoria\n'
+            'P1,Tornillo,10,6,Acme,General\n'
+            'P2,Tuerca,,6,Acme,General\n'
+        )
+        respuesta = self.client.post('/api/productos/importar/?formato=csv', cuerpo, content_type='text/csv')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json(), {
+            'creados': 1, 'actualizados': 0, 'errores_total': 1,
+            'errores': [{'linea': 3, 'error': 'falta precio_venta'}],
+        })
+
+    def test_columnas_faltantes(self):
+        self.client.force_login(self.user)
+        respuesta = self.client.post('/api/productos/importar/', 'codigo,nombre\nP1,A\n', content_type='text/csv')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('faltan columnas', respuesta.json()['error'])
+
+
+class ReferenciasInvalidasTests(TestCase):
+    """Un cliente o proveedor inexistente es un 400, no un IntegrityError."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = Proveedor.objects.create(empresa='Acme', contacto_principal='-', telefono='-', direccion='-')
+        cls.producto = Producto.objects.create(
+            codigo='P1', nombre='Tornillo', precio_venta=Decimal('10.00'), precio_compra=Decimal('6.00'),
+            cantidad_en_inventario=100, proveedor=cls.proveedor,
+            categoria=CategoriaProducto.objects.create(nombre='General'),
+        )
+        cls.cliente = Cliente.objects.create(nombre_completo='Ana', direccion='-', telefono='-', email='a@x.com')
+        cls.user = User.objects.create_user('ana')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.items = [{'producto_id': self.producto.pk, 'cantidad': 1}]
+
+    def _enviar(self, metodo, ruta, cuerpo):
+        return getattr(self.client, metodo)(ruta, cuerpo, content_type='application/json')
+
+    def test_alta_de_venta(self):
+        for cliente_id in (self.cliente.pk + 1, 'abc'):
+            respuesta = self._enviar('post', '/api/ventas/', {'cliente_id': cliente_id, 'items': self.items})
+            self.assertEqual(respuesta.status_code, 400)
+            self.assertEqual(respuesta.json(), {'error': 'cliente_id inválido'})
+        self.assertFalse(PedidoVenta.objects.exists())
+
+    def test_alta_de_compra(self):
+        respuesta = self._enviar('post', '/api/compras/', {'proveedor_id': self.proveedor.pk + 1, 'items': self.items})
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json(), {'error': 'proveedor_id inválido'})
+        self.assertFalse(OrdenCompra.objects.exists())
+
+    def test_edicion(self):
+        venta = self._enviar('post', '/api/ventas/', {'cliente_id': self.cliente.pk, 'items': self.items}).json()
+        compra = self._enviar('post', '/api/compras/', {'proveedor_id': self.proveedor.pk, 'items': self.items}).json()
+        respuesta = self._enviar('patch', f"/api/ventas/{venta['id']}/", {'cliente_id': self.cliente.pk + 1})
+        self.assertEqual((respuesta.status_code, respuesta.json()), (400, {'error': 'cliente_id inválido'}))
+        respuesta = self._enviar('patch', f"/api/compras/{compra['id']}/", {'proveedor_id': self.proveedor.pk + 1})
+        self.assertEqual((respuesta.status_code, respuesta.json()), (400, {'error': 'proveedor_id inválido'}))
+        self.assertEqual(PedidoVenta.objects.get().cliente_id, self.cliente.pk)
+        self.assertEqual(OrdenCompra.objects.get().proveedor_id, self.proveedor.pk)
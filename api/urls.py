@@ -1,11 +1,14 @@
 """Rutas de la API JSON para pruebas con Postman.
 
 - Autenticación de sesión: login/logout
+- Dashboard: métricas resumidas
+- Instrumentación: consultas y tiempos por vista (staff)
+- Lotes: varias operaciones en una petición (opcionalmente en una transacción)
 - Clientes: listar/crear
 - Productos: listar
 - Ventas: listar/crear y completar
-- Compras: listar/crear y recibir
-- Inventario: listar con filtros
+- Compras: listar/crear, confirmar borradores y recibir
+- Inventario: listar con filtros, existencias a una fecha, conciliación de conteos físicos
 """
 
 from django.urls import path
@@ -14,10 +17,16 @@ from . import views
 urlpatterns = [
     path('login/', views.api_login, name='api_login'),
     path('logout/', views.api_logout, name='api_logout'),
+    path('dashboard/', views.dashboard_metrics, name='api_dashboard'),
+    path('instrumentacion/', views.instrumentacion, name='api_instrumentacion'),
+    path('batch/', views.batch, name='api_batch'),
 
     path('clientes/', views.clientes_list_create, name='api_clientes'),
     path('clientes/<int:pk>/', views.cliente_detail_update_delete, name='api_cliente_detail'),
     path('productos/', views.productos_list, name='api_productos'),
+    path('productos/buscar/', views.productos_buscar, name='api_productos_buscar'),
+    path('productos/precios/', views.productos_precios, name='api_productos_precios'),
+    path('productos/importar/', views.productos_importar, name='api_productos_importar'),
     path('productos/<int:pk>/', views.producto_detail_update_delete, name='api_producto_detail'),
 
     path('proveedores/', views.proveedores_list_create, name='api_proveedores'),
@@ -32,8 +41,11 @@ urlpatterns = [
 
     path('compras/', views.compras_list_create, name='api_compras'),
     path('compras/<int:pk>/', views.compra_detail_update_delete, name='api_compra_detail'),
+    path('compras/<int:pk>/confirmar/', views.compra_confirmar, name='api_compra_confirmar'),
     path('compras/<int:pk>/recibir/', views.compra_recibir, name='api_compra_recibir'),
 
     path('inventario/', views.inventario_list, name='api_inventario'),
     path('inventario/movimientos/', views.movimientos_list, name='api_movimientos'),
+    path('inventario/existencias/', views.existencias_fecha, name='api_existencias'),
+    path('inventario/conteos/', views.conteos_conciliar, name='api_conteos'),
 ]
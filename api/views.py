@@ -8,94 +8,131 @@ exentamos CSRF en endpoints JSON.
 
 import contextlib
 import json
-from decimal import Decimal
+from datetime import date
+from decimal import Decimal, InvalidOperation
 from django.contrib.auth import authenticate, login, logout
-from django.http import JsonResponse, HttpResponseNotAllowed
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, JsonResponse, HttpResponseNotAllowed
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, F, DecimalField
-from django.utils import timezone
+from django.db import transaction
+from django.db.models import F, DecimalField, ExpressionWrapper, Prefetch
 
 from ventas.models import Cliente, PedidoVenta, PedidoVentaItem
 from compras.models import OrdenCompra, OrdenCompraItem
+from inventario.busqueda import buscar
+from inventario.conteos import conciliar, leer_conteo
+from inventario.existencias import existencias_al
+from inventario.importacion import importar, leer_catalogo
+from inventario.lectura import ErrorArchivo
 from inventario.models import Producto, Proveedor, CategoriaProducto, MovimientoInventario
+from inventario.precios import CAMPOS, mapa_precios
+from erp.instrumentacion import reiniciar_resumen, resumen_por_vista
+from reportes.metricas import metricas_dashboard
+from . import condicional, lote
+from .campos import Campo, Recurso, columna, expandido, relacionado
+from .pagination import paginar
 
 
 def _require_method(request, methods):
     return None if request.method in methods else HttpResponseNotAllowed(methods)
 
 
+def _listado(request, recurso: Recurso, qs, orden, sellos=None):
+    """Página de `qs` con los campos pedidos en `fields`/`expand` (ver `campos`).
+
+    Con `sellos` responde con ETag y 304 como en `condicional.pagina`; solo
+    se leen los sellos de las relaciones que aparecen en la respuesta.
+    """
+    try:
+        forma = recurso.forma(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    val = sellos and condicional.pagina(request, qs, orden, forma.sellos(sellos))
+    if val and (no_modificado := val.no_modificado(request)):
+        return no_modificado
+    page = paginar(request, forma.consulta(qs, orden), orden)
+    if page.error:
+        return page.error
+    respuesta = JsonResponse({'results': [forma.serializar(o) for o in page.items], 'next': page.next})
+    return val.aplicar(respuesta) if val else respuesta
+
+
+def _detalle(request, recurso: Recurso, qs, sellos=None):
+    """GET de la única fila de `qs` con los campos pedidos; 404 si no existe."""
+    try:
+        forma = recurso.forma(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    val = None
+    if sellos:
+        val = condicional.recurso(request, qs, forma.sellos(sellos))
+        if val is None:
+            return JsonResponse({'error': 'No encontrado'}, status=404)
+        if no_modificado := val.no_modificado(request):
+            return no_modificado
+    obj = forma.consulta(qs).first()
+    if obj is None:
+        return JsonResponse({'error': 'No encontrado'}, status=404)
+    respuesta = JsonResponse(forma.serializar(obj))
+    return val.aplicar(respuesta) if val else respuesta
+
+
 @csrf_exempt
 def dashboard_metrics(request):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
     if request.method != 'GET':
         return HttpResponseNotAllowed(['GET'])
+    return JsonResponse(metricas_dashboard().as_json())
 
-    today = timezone.localdate()
-    start_month = today.replace(day=1)
-
-    ventas_qs = PedidoVenta.objects.all()
-    ventas_completadas = ventas_qs.filter(estado='completado')
-    ventas_pendientes = ventas_qs.filter(estado='pendiente').count()
 
-    ventas_hoy = ventas_completadas.filter(fecha=today)
-    ventas_mes = ventas_completadas.filter(fecha__gte=start_month, fecha__lte=today)
-
-    def total_items(qs):
-        return (
-            PedidoVentaItem.objects.filter(pedido__in=qs)
-            .aggregate(total=Sum(F('cantidad') * F('precio_unitario'), output_field=DecimalField(max_digits=12, decimal_places=2)))
-            .get('total')
-            or Decimal('0.00')
-        )
+@csrf_exempt
+def instrumentacion(request):
+    """Consultas y tiempos acumulados por vista en este proceso (solo staff).
 
-    total_hoy = total_items(ventas_hoy)
-    total_mes = total_items(ventas_mes)
-    total_completado = total_items(ventas_completadas)
+    DELETE reinicia los acumulados.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Solo staff'}, status=403)
+    if request.method == 'DELETE':
+        reiniciar_resumen()
+        return JsonResponse({'ok': True})
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET', 'DELETE'])
+    return JsonResponse({'vistas': resumen_por_vista()})
 
-    top_productos = list(
-        PedidoVentaItem.objects.filter(pedido__estado='completado')
-        .values('producto__nombre', 'producto__codigo')
-        .annotate(
-            unidades=Sum('cantidad'),
-            monto=Sum(F('cantidad') * F('precio_unitario'), output_field=DecimalField(max_digits=12, decimal_places=2)),
-        )
-        .order_by('-unidades')[:5]
-    )
 
-    stock_bajo = list(
-        Producto.objects.filter(cantidad_en_inventario__lte=5)
-        .order_by('cantidad_en_inventario')
-        .values('id', 'nombre', 'cantidad_en_inventario')[:5]
-    )
-    stock_total = Producto.objects.aggregate(total=Sum('cantidad_en_inventario'))['total'] or 0
-    compras_pendientes = OrdenCompra.objects.filter(estado='pendiente').count()
-
-    ultimas_ventas = list(
-        ventas_qs.select_related('cliente')
-        .annotate(
-            monto=Sum(
-                F('items__cantidad') * F('items__precio_unitario'),
-                output_field=DecimalField(max_digits=12, decimal_places=2),
-            )
-        )
-        .order_by('-fecha')[:5]
-        .values('id', 'numero', 'cliente__nombre_completo', 'fecha', 'estado', 'monto')
-    )
-
-    return JsonResponse({
-        'total_hoy': str(total_hoy),
-        'total_mes': str(total_mes),
-        'total_completado': str(total_completado),
-        'ventas_mes_count': ventas_mes.count(),
-        'ventas_pendientes': ventas_pendientes,
-        'compras_pendientes': compras_pendientes,
-        'top_productos': top_productos,
-        'stock_bajo': stock_bajo,
-        'stock_total': stock_total,
-        'ultimas_ventas': ultimas_ventas,
-    })
+@csrf_exempt
+def batch(request):
+    """Ejecuta una lista de operaciones de la API en una sola petición (ver `lote`).
+
+    Body `{"operaciones": [...], "atomico": false}`. Responde 200 con
+    `resultados` (id, status y cuerpo de cada operación ejecutada); si el
+    lote era atómico y falló, 400 con los resultados hasta la operación
+    que falló y nada aplicado.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if err := _require_method(request, ['POST']):
+        return err
+    try:
+        payload = json.loads(request.body or '{}')
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'JSON inválido'}, status=400)
+    operaciones = payload.get('operaciones') if isinstance(payload, dict) else None
+    if not isinstance(operaciones, list) or not operaciones:
+        return JsonResponse({'error': 'operaciones debe ser una lista no vacía'}, status=400)
+    if len(operaciones) > lote.max_operaciones():
+        return JsonResponse({'error': f'máximo {lote.max_operaciones()} operaciones por lote'}, status=400)
+    resultados, confirmado = lote.ejecutar(request, operaciones, atomico=bool(payload.get('atomico')))
+    data = {'resultados': [r.as_json() for r in resultados]}
+    if not confirmado:
+        data['error'] = f'la operación {len(resultados)} falló; no se aplicó ningún cambio'
+        return JsonResponse(data, status=400)
+    return JsonResponse(data)
 
 
 @csrf_exempt
@@ -123,14 +160,17 @@ def api_logout(request):
     return JsonResponse({'ok': True})
 
 
+_CLIENTE = Recurso(campos={
+    'id': columna('id'),
+    'nombre_completo': columna('nombre_completo'),
+    'direccion': columna('direccion'),
+    'telefono': columna('telefono'),
+    'email': columna('email'),
+})
+
+
 def _cliente_dict(c: Cliente):
-    return {
-        'id': c.id,
-        'nombre_completo': c.nombre_completo,
-        'direccion': c.direccion,
-        'telefono': c.telefono,
-        'email': c.email,
-    }
+    return _CLIENTE.forma().serializar(c)
 
 
 @csrf_exempt
@@ -138,8 +178,7 @@ def clientes_list_create(request):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
     if request.method == 'GET':
-        data = [_cliente_dict(c) for c in Cliente.objects.all().order_by('id')]
-        return JsonResponse({'results': data})
+        return _listado(request, _CLIENTE, Cliente.objects.all(), ('id',))
     if request.method == 'POST':
         try:
             payload = json.loads(request.body or '{}')
@@ -159,12 +198,12 @@ def clientes_list_create(request):
 def cliente_detail_update_delete(request, pk: int):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if request.method == 'GET':
+        return _detalle(request, _CLIENTE, Cliente.objects.filter(pk=pk))
     try:
         c = Cliente.objects.get(pk=pk)
     except Cliente.DoesNotExist:
         return JsonResponse({'error': 'No encontrado'}, status=404)
-    if request.method == 'GET':
-        return JsonResponse(_cliente_dict(c))
     if request.method in ('PUT', 'PATCH'):
         try:
             payload = json.loads(request.body or '{}')
@@ -181,17 +220,49 @@ def cliente_detail_update_delete(request, pk: int):
     return HttpResponseNotAllowed(['GET', 'PUT', 'PATCH', 'DELETE'])
 
 
+# Columnas `actualizado` de lo que incluye `_producto_dict`
+_SELLOS_PRODUCTO = {
+    'producto': F('actualizado'),
+    'proveedor': F('proveedor__actualizado'),
+    'categoria': F('categoria__actualizado'),
+}
+
+
+_PROVEEDOR = Recurso(campos={
+    'id': columna('id'),
+    'empresa': columna('empresa'),
+    'contacto_principal': columna('contacto_principal'),
+    'telefono': columna('telefono'),
+    'direccion': columna('direccion'),
+})
+
+_CATEGORIA = Recurso(campos={
+    'id': columna('id'),
+    'nombre': columna('nombre'),
+    'descripcion': columna('descripcion'),
+})
+
+# `expand=proveedor,categoria` cambia el nombre por el objeto completo
+_PRODUCTO = Recurso(
+    campos={
+        'id': columna('id'),
+        'codigo': columna('codigo'),
+        'nombre': columna('nombre'),
+        'precio_venta': columna('precio_venta', str),
+        'precio_compra': columna('precio_compra', str),
+        'stock': columna('cantidad_en_inventario'),
+        'proveedor': relacionado('proveedor', 'empresa'),
+        'categoria': relacionado('categoria', 'nombre'),
+    },
+    expansiones={
+        'proveedor': expandido('proveedor', _PROVEEDOR),
+        'categoria': expandido('categoria', _CATEGORIA),
+    },
+)
+
+
 def _producto_dict(p: Producto):
-    return {
-        'id': p.id,
-        'codigo': p.codigo,
-        'nombre': p.nombre,
-        'precio_venta': str(p.precio_venta),
-        'precio_compra': str(p.precio_compra),
-        'stock': p.cantidad_en_inventario,
-        'proveedor': getattr(p.proveedor, 'empresa', None),
-        'categoria': getattr(p.categoria, 'nombre', None),
-    }
+    return _PRODUCTO.forma().serializar(p)
 
 
 @csrf_exempt
@@ -199,8 +270,7 @@ def productos_list(request):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
     if request.method == 'GET':
-        data = [_producto_dict(p) for p in Producto.objects.select_related('proveedor', 'categoria').all().order_by('id')]
-        return JsonResponse({'results': data})
+        return _listado(request, _PRODUCTO, Producto.objects.all(), ('id',), _SELLOS_PRODUCTO)
     if request.method == 'POST':
         try:
             payload = json.loads(request.body or '{}')
@@ -224,16 +294,97 @@ def productos_list(request):
     return HttpResponseNotAllowed(['GET', 'POST'])
 
 
+def productos_buscar(request):
+    """Autocompletado de productos: `q` (código, nombre o descripción), `limit` (máx. 50), `activos=1`."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        limite = min(int(request.GET.get('limit') or 10), 50)
+    except ValueError:
+        limite = 0
+    if limite <= 0:
+        return JsonResponse({'error': 'limit inválido'}, status=400)
+    resultados, correcciones = buscar(
+        request.GET.get('q', ''), limite=limite, activos=request.GET.get('activos') in ('1', 'true'),
+    )
+    data = [{
+        'id': p['id'],
+        'codigo': p['codigo'],
+        'nombre': p['nombre'],
+        'precio_venta': str(p['precio_venta']),
+        'stock': p['cantidad_en_inventario'],
+        'activo': p['activo'],
+        'puntos': p['puntos'],
+    } for p in resultados]
+    return JsonResponse({'results': data, 'correcciones': correcciones})
+
+
+@csrf_exempt
+def productos_importar(request):
+    """Importa productos desde CSV o JSONL con upsert por `codigo` (ver `inventario.importacion`).
+
+    El archivo va como cuerpo de la petición (se lee en streaming) o como
+    `archivo` en multipart; `formato=csv|jsonl`.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    formato = request.GET.get('formato', 'csv')
+    if request.content_type == 'multipart/form-data':
+        if 'archivo' not in request.FILES:
+            return JsonResponse({'error': 'Falta archivo'}, status=400)
+        origen = request.FILES['archivo']
+    else:
+        origen = request
+    try:
+        resultado = importar(leer_catalogo(origen, formato))
+    except ErrorArchivo as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(resultado.as_json())
+
+
+def productos_precios(request):
+    """Mapa `{producto_id: precio}` de productos activos (`tipo=venta|compra`).
+
+    Responde con ETag y 304 si coincide con `If-None-Match`. Si la URL trae
+    `v` igual al ETag vigente (así la arman los formularios), el navegador
+    puede guardarla sin volver a preguntar: una versión nueva del catálogo
+    tendrá otra URL.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    tipo = request.GET.get('tipo', 'venta')
+    if tipo not in CAMPOS:
+        return JsonResponse({'error': 'tipo debe ser venta o compra'}, status=400)
+    mapa = mapa_precios(tipo)
+    etag = f'"{mapa.etag}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        respuesta = HttpResponse(status=304)
+    else:
+        respuesta = HttpResponse(mapa.contenido, content_type='application/json')
+    respuesta['ETag'] = etag
+    if request.GET.get('v') == mapa.etag:
+        respuesta['Cache-Control'] = 'private, max-age=31536000, immutable'
+    else:
+        respuesta['Cache-Control'] = 'private, no-cache'
+    return respuesta
+
+
 @csrf_exempt
 def producto_detail_update_delete(request, pk: int):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if request.method == 'GET':
+        return _detalle(request, _PRODUCTO, Producto.objects.filter(pk=pk), _SELLOS_PRODUCTO)
     try:
-        p = Producto.objects.get(pk=pk)
+        p = Producto.objects.select_related('proveedor', 'categoria').get(pk=pk)
     except Producto.DoesNotExist:
         return JsonResponse({'error': 'No encontrado'}, status=404)
-    if request.method == 'GET':
-        return JsonResponse(_producto_dict(p))
     if request.method in ('PUT', 'PATCH'):
         try:
             payload = json.loads(request.body or '{}')
@@ -263,13 +414,7 @@ def producto_detail_update_delete(request, pk: int):
 
 
 def _proveedor_dict(p: Proveedor):
-    return {
-        'id': p.id,
-        'empresa': p.empresa,
-        'contacto_principal': p.contacto_principal,
-        'telefono': p.telefono,
-        'direccion': p.direccion,
-    }
+    return _PROVEEDOR.forma().serializar(p)
 
 
 @csrf_exempt
@@ -277,7 +422,7 @@ def proveedores_list_create(request):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
     if request.method == 'GET':
-        return JsonResponse({'results': [_proveedor_dict(p) for p in Proveedor.objects.all().order_by('id')]})
+        return _listado(request, _PROVEEDOR, Proveedor.objects.all(), ('id',))
     if request.method == 'POST':
         try:
             payload = json.loads(request.body or '{}')
@@ -297,12 +442,12 @@ def proveedores_list_create(request):
 def proveedor_detail_update_delete(request, pk: int):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if request.method == 'GET':
+        return _detalle(request, _PROVEEDOR, Proveedor.objects.filter(pk=pk))
     try:
         p = Proveedor.objects.get(pk=pk)
     except Proveedor.DoesNotExist:
         return JsonResponse({'error': 'No encontrado'}, status=404)
-    if request.method == 'GET':
-        return JsonResponse(_proveedor_dict(p))
     if request.method in ('PUT', 'PATCH'):
         try:
             payload = json.loads(request.body or '{}')
@@ -320,11 +465,7 @@ def proveedor_detail_update_delete(request, pk: int):
 
 
 def _categoria_dict(c: CategoriaProducto):
-    return {
-        'id': c.id,
-        'nombre': c.nombre,
-        'descripcion': c.descripcion,
-    }
+    return _CATEGORIA.forma().serializar(c)
 
 
 @csrf_exempt
@@ -332,7 +473,7 @@ def categorias_list_create(request):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
     if request.method == 'GET':
-        return JsonResponse({'results': [_categoria_dict(c) for c in CategoriaProducto.objects.all().order_by('id')]})
+        return _listado(request, _CATEGORIA, CategoriaProducto.objects.all(), ('id',))
     if request.method == 'POST':
         try:
             payload = json.loads(request.body or '{}')
@@ -350,12 +491,12 @@ def categorias_list_create(request):
 def categoria_detail_update_delete(request, pk: int):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if request.method == 'GET':
+        return _detalle(request, _CATEGORIA, CategoriaProducto.objects.filter(pk=pk))
     try:
         c = CategoriaProducto.objects.get(pk=pk)
     except CategoriaProducto.DoesNotExist:
         return JsonResponse({'error': 'No encontrado'}, status=404)
-    if request.method == 'GET':
-        return JsonResponse(_categoria_dict(c))
     if request.method in ('PUT', 'PATCH'):
         try:
             payload = json.loads(request.body or '{}')
@@ -372,27 +513,152 @@ def categoria_detail_update_delete(request, pk: int):
     return HttpResponseNotAllowed(['GET', 'PUT', 'PATCH', 'DELETE'])
 
 
+_MONEDA = DecimalField(max_digits=14, decimal_places=2)
+
+
+def _importe(cantidad, precio):
+    """Expresión cantidad * precio calculada en la BD."""
+    return ExpressionWrapper(F(cantidad) * F(precio), output_field=_MONEDA)
+
+
+def _dinero(valor) -> str:
+    """Formatea importes con 2 decimales (algunos backends pierden la escala)."""
+    return str(Decimal(valor).quantize(Decimal('0.01')))
+
+
+def _items_venta():
+    """Ítems con el nombre del producto, solo las columnas que se serializan."""
+    items = (
+        PedidoVentaItem.objects.select_related('producto')
+        .only('pedido', 'producto', 'producto__nombre', 'cantidad', 'precio_unitario')
+        .annotate(subtotal_calc=_importe('cantidad', 'precio_unitario'))
+        .order_by('id')
+    )
+    return Prefetch('items', queryset=items)
+
+
+def _ventas_qs():
+    """Ventas listas para serializar en un número constante de consultas.
+
+    1 consulta para cabeceras + cliente (el total es una columna guardada),
+    1 para ítems + producto, sin importar cuántas ventas o ítems haya.
+    """
+    return PedidoVenta.objects.select_related('cliente').prefetch_related(_items_venta())
+
+
+# Columnas `actualizado` de lo que incluye `_venta_dict`
+_SELLOS_VENTA = {
+    'venta': F('actualizado'),
+    'cliente': F('cliente__actualizado'),
+    'productos': condicional.maximo(PedidoVentaItem, 'pedido', 'producto__actualizado'),
+}
+
+
 def _venta_item_dict(it: PedidoVentaItem):
     return {
         'producto_id': it.producto_id,
         'producto': it.producto.nombre,
         'cantidad': it.cantidad,
         'precio_unitario': str(it.precio_unitario),
-        'subtotal': str(it.subtotal),
+        'subtotal': _dinero(getattr(it, 'subtotal_calc', it.subtotal)),
     }
 
 
+_VENTA = Recurso(
+    campos={
+        'id': columna('id'),
+        'numero': columna('numero'),
+        'fecha': columna('fecha', str),
+        'cliente_id': columna('cliente_id'),
+        'cliente': relacionado('cliente', 'nombre_completo'),
+        'estado': columna('estado'),
+        'total': columna('total', _dinero),
+        'items': Campo(
+            valor=lambda v: [_venta_item_dict(i) for i in v.items.all()], prefetch=_items_venta, sello='productos',
+        ),
+    },
+    expansiones={'cliente': expandido('cliente', _CLIENTE)},
+)
+
+
 def _venta_dict(v: PedidoVenta):
-    return {
-        'id': v.id,
-        'numero': v.numero,
-        'fecha': str(v.fecha),
-        'cliente_id': v.cliente_id,
-        'cliente': v.cliente.nombre_completo,
-        'estado': v.estado,
-        'total': str(v.total),
-        'items': [_venta_item_dict(i) for i in v.items.select_related('producto').all()],
-    }
+    """Serializa una venta obtenida con `_ventas_qs()` (no consulta la BD)."""
+    return _VENTA.forma().serializar(v)
+
+
+# Ordenamientos admitidos en ?orden= para ventas y compras (llave única para el cursor)
+_ORDENES_PEDIDO = {
+    'fecha': ('-fecha', 'numero'),
+    'total': ('total', 'id'),
+    '-total': ('-total', '-id'),
+}
+
+
+def _orden_pedido(request):
+    return _ORDENES_PEDIDO.get(request.GET.get('orden') or 'fecha')
+
+
+def _validar_lineas(items, campo_precio: str, precio_defecto: str):
+    """Valida todas las líneas de un pedido antes de escribir nada.
+
+    Resuelve los productos referenciados con un único `in_bulk`. Devuelve
+    `(lineas, None)` con tuplas `(producto_id, cantidad, precio)` o
+    `(None, mensaje)` si alguna línea es inválida. Si una línea no trae
+    `campo_precio` se usa `precio_defecto` del producto.
+    """
+    if not isinstance(items, list) or not items:
+        return None, 'items debe ser una lista no vacía'
+    parsed = []
+    for it in items:
+        if not isinstance(it, dict):
+            return None, 'Cada item debe ser un objeto'
+        try:
+            pid = int(it.get('producto_id'))
+            cant = int(it.get('cantidad', 0) or 0)
+        except (TypeError, ValueError):
+            return None, 'producto_id y cantidad deben ser enteros'
+        if cant <= 0:
+            return None, 'cantidad debe ser > 0'
+        precio = it.get(campo_precio)
+        if precio is not None:
+            try:
+                precio = Decimal(str(precio))
+            except InvalidOperation:
+                return None, f'{campo_precio} inválido'
+        parsed.append((pid, cant, precio))
+    productos = Producto.objects.only('id', precio_defecto).in_bulk({pid for pid, _, _ in parsed})
+    lineas = []
+    for pid, cant, precio in parsed:
+        prod = productos.get(pid)
+        if prod is None:
+            return None, f'Producto {pid} no existe'
+        lineas.append((pid, cant, precio if precio is not None else getattr(prod, precio_defecto)))
+    return lineas, None
+
+
+def _existe(modelo, pk) -> bool:
+    """True si `pk` es el id de una fila de `modelo` (una consulta; False si no es entero)."""
+    try:
+        return modelo.objects.filter(pk=int(pk)).exists()
+    except (TypeError, ValueError):
+        return False
+
+
+def _escribir_lineas(modelo, fk: str, campo_precio: str, cabecera, lineas, reemplazar=False):
+    """Inserta (o reemplaza) los ítems de `cabecera` con un solo bulk_create.
+
+    Debe llamarse dentro de `transaction.atomic()` junto con el guardado de la
+    cabecera para no dejar pedidos a medio escribir. bulk_create no pasa por
+    `save()` de los ítems, así que los totales guardados se recalculan aquí.
+    """
+    if reemplazar:
+        modelo.objects.filter(**{fk: cabecera}).delete()
+    modelo.objects.bulk_create(
+        [modelo(**{fk: cabecera, 'producto_id': pid, 'cantidad': cant, campo_precio: precio})
+         for pid, cant, precio in lineas],
+        batch_size=500,
+    )
+    cabecera.actualizar_totales()
 
 
 @csrf_exempt
@@ -400,8 +666,10 @@ def ventas_list_create(request):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
     if request.method == 'GET':
-        ventas = PedidoVenta.objects.select_related('cliente').all().order_by('-fecha', 'numero')
-        return JsonResponse({'results': [_venta_dict(v) for v in ventas]})
+        orden = _orden_pedido(request)
+        if orden is None:
+            return JsonResponse({'error': 'orden inválido'}, status=400)
+        return _listado(request, _VENTA, PedidoVenta.objects.all(), orden, _SELLOS_VENTA)
     if request.method == 'POST':
         try:
             payload = json.loads(request.body or '{}')
@@ -411,20 +679,18 @@ def ventas_list_create(request):
         items = payload.get('items', [])
         if not cliente_id or not items:
             return JsonResponse({'error': 'cliente_id e items son obligatorios'}, status=400)
+        if not _existe(Cliente, cliente_id):
+            return JsonResponse({'error': 'cliente_id inválido'}, status=400)
+        # Si no envían precio_unitario, usar precio_venta del producto
+        lineas, error = _validar_lineas(items, 'precio_unitario', 'precio_venta')
+        if error:
+            return JsonResponse({'error': error}, status=400)
         numero = payload.get('numero') or None
-        v = PedidoVenta(numero=numero, cliente_id=cliente_id, estado='pendiente')
-        v.save()
-        for it in items:
-            pid = it.get('producto_id')
-            cant = int(it.get('cantidad', 0) or 0)
-            if cant <= 0:
-                return JsonResponse({'error': 'cantidad debe ser > 0'}, status=400)
-            # Si no envían precio_unitario, usar precio_venta del producto
-            prod = Producto.objects.get(pk=pid)
-            precio = it.get('precio_unitario')
-            precio = Decimal(str(precio)) if precio is not None else prod.precio_venta
-            PedidoVentaItem.objects.create(pedido=v, producto_id=pid, cantidad=cant, precio_unitario=precio)
-        return JsonResponse(_venta_dict(v), status=201)
+        with transaction.atomic():
+            v = PedidoVenta(numero=numero, cliente_id=cliente_id, estado='pendiente')
+            v.save()
+            _escribir_lineas(PedidoVentaItem, 'pedido', 'precio_unitario', v, lineas)
+        return JsonResponse(_venta_dict(_ventas_qs().get(pk=v.pk)), status=201)
     return HttpResponseNotAllowed(['GET', 'POST'])
 
 
@@ -432,12 +698,12 @@ def ventas_list_create(request):
 def venta_detail_update_delete(request, pk: int):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if request.method == 'GET':
+        return _detalle(request, _VENTA, PedidoVenta.objects.filter(pk=pk), _SELLOS_VENTA)
     try:
-        v = PedidoVenta.objects.select_related('cliente').get(pk=pk)
+        v = _ventas_qs().get(pk=pk)
     except PedidoVenta.DoesNotExist:
         return JsonResponse({'error': 'No encontrado'}, status=404)
-    if request.method == 'GET':
-        return JsonResponse(_venta_dict(v))
     if request.method in ('PUT', 'PATCH'):
         if v.estado != 'pendiente':
             return JsonResponse({'error': 'Solo se puede editar si está pendiente'}, status=400)
@@ -445,23 +711,22 @@ def venta_detail_update_delete(request, pk: int):
             payload = json.loads(request.body or '{}')
         except json.JSONDecodeError:
             return JsonResponse({'error': 'JSON inválido'}, status=400)
+        lineas = None
+        if 'items' in payload:
+            lineas, error = _validar_lineas(payload['items'], 'precio_unitario', 'precio_venta')
+            if error:
+                return JsonResponse({'error': error}, status=400)
         if 'numero' in payload:
             v.numero = payload['numero']
         if 'cliente_id' in payload:
+            if not _existe(Cliente, payload['cliente_id']):
+                return JsonResponse({'error': 'cliente_id inválido'}, status=400)
             v.cliente_id = payload['cliente_id']
-        v.save()
-        if 'items' in payload:
-            v.items.all().delete()
-            for it in payload['items']:
-                pid = it.get('producto_id')
-                cant = int(it.get('cantidad', 0) or 0)
-                if cant <= 0:
-                    return JsonResponse({'error': 'cantidad debe ser > 0'}, status=400)
-                prod = Producto.objects.get(pk=pid)
-                precio = it.get('precio_unitario')
-                precio = Decimal(str(precio)) if precio is not None else prod.precio_venta
-                PedidoVentaItem.objects.create(pedido=v, producto_id=pid, cantidad=cant, precio_unitario=precio)
-        return JsonResponse(_venta_dict(v))
+        with transaction.atomic():
+            v.save()
+            if lineas is not None:
+                _escribir_lineas(PedidoVentaItem, 'pedido', 'precio_unitario', v, lineas, reemplazar=True)
+        return JsonResponse(_venta_dict(_ventas_qs().get(pk=v.pk)))
     if request.method == 'DELETE':
         if v.estado != 'pendiente':
             return JsonResponse({'error': 'Solo se puede eliminar si está pendiente'}, status=400)
@@ -482,32 +747,63 @@ def venta_completar(request, pk: int):
             return JsonResponse({'error': 'La venta ya no está pendiente'}, status=400)
         v.estado = 'completado'
         v.save()
-        return JsonResponse(_venta_dict(v))
+        return JsonResponse(_venta_dict(_ventas_qs().get(pk=v.pk)))
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
 
+_SELLOS_COMPRA = {
+    'orden': F('actualizado'),
+    'proveedor': F('proveedor__actualizado'),
+    'productos': condicional.maximo(OrdenCompraItem, 'orden', 'producto__actualizado'),
+}
+
+
 def _compra_item_dict(it: OrdenCompraItem):
     return {
         'producto_id': it.producto_id,
         'producto': it.producto.nombre,
         'cantidad': it.cantidad,
         'costo_unitario': str(it.costo_unitario),
-        'subtotal': str(it.subtotal),
+        'subtotal': _dinero(getattr(it, 'subtotal_calc', it.subtotal)),
     }
 
 
+def _items_compra():
+    items = (
+        OrdenCompraItem.objects.select_related('producto')
+        .only('orden', 'producto', 'producto__nombre', 'cantidad', 'costo_unitario')
+        .annotate(subtotal_calc=_importe('cantidad', 'costo_unitario'))
+        .order_by('id')
+    )
+    return Prefetch('items', queryset=items)
+
+
+def _compras_qs():
+    """Órdenes listas para serializar en un número constante de consultas."""
+    return OrdenCompra.objects.select_related('proveedor').prefetch_related(_items_compra())
+
+
+_COMPRA = Recurso(
+    campos={
+        'id': columna('id'),
+        'numero': columna('numero'),
+        'fecha': columna('fecha', str),
+        'proveedor_id': columna('proveedor_id'),
+        'proveedor': relacionado('proveedor', 'empresa'),
+        'estado': columna('estado'),
+        'total': columna('total', _dinero),
+        'items': Campo(
+            valor=lambda o: [_compra_item_dict(i) for i in o.items.all()], prefetch=_items_compra, sello='productos',
+        ),
+    },
+    expansiones={'proveedor': expandido('proveedor', _PROVEEDOR)},
+)
+
+
 def _compra_dict(o: OrdenCompra):
-    return {
-        'id': o.id,
-        'numero': o.numero,
-        'fecha': str(o.fecha),
-        'proveedor_id': o.proveedor_id,
-        'proveedor': o.proveedor.empresa,
-        'estado': o.estado,
-        'total': str(o.total),
-        'items': [_compra_item_dict(i) for i in o.items.select_related('producto').all()],
-    }
+    """Serializa una orden obtenida con `_compras_qs()` (no consulta la BD)."""
+    return _COMPRA.forma().serializar(o)
 
 
 @csrf_exempt
@@ -515,8 +811,10 @@ def compras_list_create(request):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
     if request.method == 'GET':
-        compras = OrdenCompra.objects.select_related('proveedor').all().order_by('-fecha', 'numero')
-        return JsonResponse({'results': [_compra_dict(o) for o in compras]})
+        orden = _orden_pedido(request)
+        if orden is None:
+            return JsonResponse({'error': 'orden inválido'}, status=400)
+        return _listado(request, _COMPRA, OrdenCompra.objects.all(), orden, _SELLOS_COMPRA)
     if request.method == 'POST':
         try:
             payload = json.loads(request.body or '{}')
@@ -526,19 +824,17 @@ def compras_list_create(request):
         items = payload.get('items', [])
         if not proveedor_id or not items:
             return JsonResponse({'error': 'proveedor_id e items son obligatorios'}, status=400)
+        if not _existe(Proveedor, proveedor_id):
+            return JsonResponse({'error': 'proveedor_id inválido'}, status=400)
+        lineas, error = _validar_lineas(items, 'costo_unitario', 'precio_compra')
+        if error:
+            return JsonResponse({'error': error}, status=400)
         numero = payload.get('numero') or None
-        o = OrdenCompra(numero=numero, proveedor_id=proveedor_id, estado='pendiente')
-        o.save()
-        for it in items:
-            pid = it.get('producto_id')
-            cant = int(it.get('cantidad', 0) or 0)
-            if cant <= 0:
-                return JsonResponse({'error': 'cantidad debe ser > 0'}, status=400)
-            prod = Producto.objects.get(pk=pid)
-            costo = it.get('costo_unitario')
-            costo = Decimal(str(costo)) if costo is not None else prod.precio_compra
-            OrdenCompraItem.objects.create(orden=o, producto_id=pid, cantidad=cant, costo_unitario=costo)
-        return JsonResponse(_compra_dict(o), status=201)
+        with transaction.atomic():
+            o = OrdenCompra(numero=numero, proveedor_id=proveedor_id, estado='pendiente')
+            o.save()
+            _escribir_lineas(OrdenCompraItem, 'orden', 'costo_unitario', o, lineas)
+        return JsonResponse(_compra_dict(_compras_qs().get(pk=o.pk)), status=201)
     return HttpResponseNotAllowed(['GET', 'POST'])
 
 
@@ -546,44 +842,60 @@ def compras_list_create(request):
 def compra_detail_update_delete(request, pk: int):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if request.method == 'GET':
+        return _detalle(request, _COMPRA, OrdenCompra.objects.filter(pk=pk), _SELLOS_COMPRA)
     try:
-        o = OrdenCompra.objects.select_related('proveedor').get(pk=pk)
+        o = _compras_qs().get(pk=pk)
     except OrdenCompra.DoesNotExist:
         return JsonResponse({'error': 'No encontrado'}, status=404)
-    if request.method == 'GET':
-        return JsonResponse(_compra_dict(o))
     if request.method in ('PUT', 'PATCH'):
-        if o.estado != 'pendiente':
-            return JsonResponse({'error': 'Solo se puede editar si está pendiente'}, status=400)
+        if not o.editable:
+            return JsonResponse({'error': 'Solo se puede editar si está en borrador o pendiente'}, status=400)
         try:
             payload = json.loads(request.body or '{}')
         except json.JSONDecodeError:
             return JsonResponse({'error': 'JSON inválido'}, status=400)
+        lineas = None
+        if 'items' in payload:
+            lineas, error = _validar_lineas(payload['items'], 'costo_unitario', 'precio_compra')
+            if error:
+                return JsonResponse({'error': error}, status=400)
         if 'numero' in payload:
             o.numero = payload['numero']
         if 'proveedor_id' in payload:
+            if not _existe(Proveedor, payload['proveedor_id']):
+                return JsonResponse({'error': 'proveedor_id inválido'}, status=400)
             o.proveedor_id = payload['proveedor_id']
-        o.save()
-        if 'items' in payload:
-            o.items.all().delete()
-            for it in payload['items']:
-                pid = it.get('producto_id')
-                cant = int(it.get('cantidad', 0) or 0)
-                if cant <= 0:
-                    return JsonResponse({'error': 'cantidad debe ser > 0'}, status=400)
-                prod = Producto.objects.get(pk=pid)
-                costo = it.get('costo_unitario')
-                costo = Decimal(str(costo)) if costo is not None else prod.precio_compra
-                OrdenCompraItem.objects.create(orden=o, producto_id=pid, cantidad=cant, costo_unitario=costo)
-        return JsonResponse(_compra_dict(o))
+        with transaction.atomic():
+            o.save()
+            if lineas is not None:
+                _escribir_lineas(OrdenCompraItem, 'orden', 'costo_unitario', o, lineas, reemplazar=True)
+        return JsonResponse(_compra_dict(_compras_qs().get(pk=o.pk)))
     if request.method == 'DELETE':
-        if o.estado != 'pendiente':
-            return JsonResponse({'error': 'Solo se puede eliminar si está pendiente'}, status=400)
+        if not o.editable:
+            return JsonResponse({'error': 'Solo se puede eliminar si está en borrador o pendiente'}, status=400)
         o.delete()
         return JsonResponse({}, status=204)
     return HttpResponseNotAllowed(['GET', 'PUT', 'PATCH', 'DELETE'])
 
 
+@csrf_exempt
+def compra_confirmar(request, pk: int):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if err := _require_method(request, ['POST']):
+        return err
+    try:
+        o = OrdenCompra.objects.get(pk=pk)
+    except OrdenCompra.DoesNotExist:
+        return JsonResponse({'error': 'No encontrado'}, status=404)
+    try:
+        o.confirmar()
+    except ValidationError as e:
+        return JsonResponse({'error': ' '.join(e.messages)}, status=400)
+    return JsonResponse(_compra_dict(_compras_qs().get(pk=o.pk)))
+
+
 @csrf_exempt
 def compra_recibir(request, pk: int):
     if not request.user.is_authenticated:
@@ -596,7 +908,7 @@ def compra_recibir(request, pk: int):
             return JsonResponse({'error': 'La orden ya no está pendiente'}, status=400)
         o.estado = 'recibida'
         o.save()
-        return JsonResponse(_compra_dict(o))
+        return JsonResponse(_compra_dict(_compras_qs().get(pk=o.pk)))
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
@@ -608,13 +920,27 @@ def inventario_list(request):
         return HttpResponseNotAllowed(['GET'])
     categoria = request.GET.get('categoria')
     minimo = request.GET.get('min')
-    qs = Producto.objects.select_related('categoria', 'proveedor').all()
+    qs = Producto.objects.all()
     if categoria:
         qs = qs.filter(categoria_id=categoria)
     if minimo:
         with contextlib.suppress(ValueError):
             qs = qs.filter(cantidad_en_inventario__lte=int(minimo))
-    return JsonResponse({'results': [_producto_dict(p) for p in qs.order_by('cantidad_en_inventario')]})
+    # `id` desempata productos con el mismo stock para que el cursor sea único
+    orden = ('cantidad_en_inventario', 'id')
+    return _listado(request, _PRODUCTO, qs, orden, _SELLOS_PRODUCTO)
+
+
+_MOVIMIENTO = Recurso(campos={
+    'id': columna('id'),
+    'fecha': columna('fecha', lambda f: f.isoformat()),
+    'tipo': columna('tipo'),
+    'producto_id': columna('producto_id'),
+    'producto': relacionado('producto', 'nombre'),
+    'cantidad': columna('cantidad'),
+    'referencia': columna('referencia'),
+    'nota': columna('nota'),
+})
 
 
 def movimientos_list(request):
@@ -622,12 +948,13 @@ def movimientos_list(request):
         return JsonResponse({'error': 'Auth requerido'}, status=401)
     if request.method != 'GET':
         return HttpResponseNotAllowed(['GET'])
-    qs = MovimientoInventario.objects.select_related('producto').all()
+    qs = MovimientoInventario.objects.all()
     tipo = request.GET.get('tipo')
     pid = request.GET.get('producto')
     desde = request.GET.get('desde')
     hasta = request.GET.get('hasta')
     ref = request.GET.get('referencia')
+    ref_exacta = request.GET.get('referencia_exacta')
     if tipo:
         qs = qs.filter(tipo=tipo)
     if pid:
@@ -638,14 +965,69 @@ def movimientos_list(request):
         qs = qs.filter(fecha__lte=hasta)
     if ref:
         qs = qs.filter(referencia__icontains=ref)
+    if ref_exacta:
+        # Usa el índice `movimiento_referencia`; `referencia` (subcadena) no puede
+        qs = qs.filter(referencia=ref_exacta)
+    return _listado(request, _MOVIMIENTO, qs, ('-fecha', '-id'))
+
+
+@csrf_exempt
+def conteos_conciliar(request):
+    """Ajusta el stock a una hoja de conteo físico (ver `inventario.conteos`).
+
+    Hoja CSV/JSONL como cuerpo o `archivo` multipart (`codigo` o
+    `producto_id`, `cantidad`); `formato=csv|jsonl`, `simular=1` solo
+    devuelve las diferencias, `referencia` para los movimientos.
+    """
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    if request.content_type == 'multipart/form-data':
+        if 'archivo' not in request.FILES:
+            return JsonResponse({'error': 'Falta archivo'}, status=400)
+        origen = request.FILES['archivo']
+    else:
+        origen = request
+    try:
+        resultado = conciliar(
+            leer_conteo(origen, request.GET.get('formato', 'csv')),
+            simular=request.GET.get('simular') in ('1', 'true'),
+            referencia=request.GET.get('referencia', ''),
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except ValidationError as e:
+        return JsonResponse({'error': ' '.join(e.messages)}, status=409)
+    return JsonResponse(resultado.as_json())
+
+
+def existencias_fecha(request):
+    """Stock y valuación (precio de compra) de cada producto al cierre de `fecha`."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Auth requerido'}, status=401)
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    try:
+        fecha = date.fromisoformat(request.GET.get('fecha', ''))
+    except ValueError:
+        return JsonResponse({'error': 'fecha requerida (YYYY-MM-DD)'}, status=400)
+    qs = Producto.objects.all()
+    if request.GET.get('categoria'):
+        qs = qs.filter(categoria_id=request.GET['categoria'])
+    if request.GET.get('producto'):
+        qs = qs.filter(pk=request.GET['producto'])
+    page = paginar(request, qs, ('id',))
+    if page.error:
+        return page.error
+    # Solo se reconstruyen los productos de la página
+    existencias = existencias_al(fecha, Producto.objects.filter(pk__in=[p.id for p in page.items]))
     data = [{
-        'id': m.id,
-        'fecha': m.fecha.isoformat(),
-        'tipo': m.tipo,
-        'producto_id': m.producto_id,
-        'producto': m.producto.nombre,
-        'cantidad': m.cantidad,
-        'referencia': m.referencia,
-        'nota': m.nota,
-    } for m in qs.order_by('-fecha', '-id')]
-    return JsonResponse({'results': data})
+        'producto_id': p.id,
+        'codigo': p.codigo,
+        'nombre': p.nombre,
+        'cantidad': existencias.cantidades.get(p.id, 0),
+        'precio_compra': str(existencias.precios.get(p.id, p.precio_compra)),
+        'valor': _dinero(existencias.valor(p.id)),
+    } for p in page.items]
+    return JsonResponse({'fecha': fecha.isoformat(), 'origen': existencias.origen, 'results': data, 'next': page.next})
@@ -16,7 +16,8 @@ class OrdenCompraItemInline(admin.TabularInline):
 @admin.register(OrdenCompra)
 class OrdenCompraAdmin(admin.ModelAdmin):
     """Admin de órdenes de compra con ítems inline."""
-    list_display = ("numero", "fecha", "proveedor", "estado")
+    list_display = ("numero", "fecha", "proveedor", "estado", "total")
     list_filter = ("estado", "fecha")
     search_fields = ("numero", "proveedor__empresa")
+    readonly_fields = ("total", "num_items")
     inlines = [OrdenCompraItemInline]
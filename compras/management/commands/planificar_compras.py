@@ -0,0 +1,50 @@
+"""Sugiere reposiciones y crea órdenes de compra en borrador (ver `compras.reposicion`).
+
+Uso:
+    python manage.py planificar_compras --simular
+    python manage.py planificar_compras --plazo 10 --cobertura 30
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from compras import reposicion
+from compras.reposicion import Parametros, crear_borradores, planificar
+
+
+class Command(BaseCommand):
+    help = 'Calcula qué reponer con las salidas recientes y crea una OrdenCompra en borrador por proveedor.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=reposicion.DIAS, help='Días de historia de salidas.')
+        parser.add_argument('--plazo', type=int, default=reposicion.PLAZO, help='Días entre pedir y recibir.')
+        parser.add_argument('--cobertura', type=int, default=reposicion.COBERTURA,
+                            help='Días de venta que cubre cada pedido (además del plazo).')
+        parser.add_argument('--z', type=float, default=reposicion.Z, help='Factor de nivel de servicio.')
+        parser.add_argument('--simular', action='store_true', help='Solo muestra las sugerencias.')
+        parser.add_argument('--mostrar', type=int, default=20, help='Sugerencias a listar.')
+
+    def handle(self, *args, **opts):
+        if opts['dias'] < 1 or opts['plazo'] < 0 or opts['cobertura'] < 0 or opts['z'] < 0:
+            raise CommandError('--dias debe ser positivo; --plazo, --cobertura y --z, no negativos')
+        parametros = Parametros(dias=opts['dias'], plazo=opts['plazo'], cobertura=opts['cobertura'], z=opts['z'])
+        inicio = time.perf_counter()
+        plan = planificar(parametros)
+        calculo = time.perf_counter() - inicio
+        for s in plan.sugerencias[:opts['mostrar']]:
+            self.stdout.write(
+                f'producto {s.producto_id} (proveedor {s.proveedor_id}): stock {s.stock} + {s.en_camino} en camino, '
+                f'{s.venta_diaria:.2f}/día, {s.dias_cobertura:.1f} días de cobertura -> pedir {s.cantidad}'
+            )
+        resumen = (
+            f'{plan.productos} productos ({plan.con_salidas} con salidas hasta {plan.hasta}), '
+            f'{len(plan.sugerencias)} a reponer de {len(plan.por_proveedor())} proveedores; cálculo {calculo:.1f}s'
+        )
+        if opts['simular']:
+            self.stdout.write(self.style.SUCCESS(f'Simulación: {resumen}'))
+            return
+        ordenes = crear_borradores(plan)
+        self.stdout.write(self.style.SUCCESS(
+            f'{resumen}; {len(ordenes)} órdenes en borrador en {time.perf_counter() - inicio:.1f}s'
+        ))
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:38
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def calcular_totales(apps, schema_editor):
+    OrdenCompra = apps.get_model('compras', 'OrdenCompra')
+    OrdenCompraItem = apps.get_model('compras', 'OrdenCompraItem')
+    items = OrdenCompraItem.objects.filter(orden=OuterRef('pk')).order_by().values('orden')
+    moneda = DecimalField(max_digits=14, decimal_places=2)
+    OrdenCompra.objects.update(
+        total=Coalesce(
+            Subquery(items.annotate(t=Sum(F('cantidad') * F('costo_unitario'), output_field=moneda)).values('t')),
+            Value(Decimal('0.00')),
+            output_field=moneda,
+        ),
+        num_items=Coalesce(Subquery(items.annotate(n=Count('id')).values('n')), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ordencompra',
+            name='num_items',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='ordencompra',
+            name='total',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14),
+        ),
+        migrations.RunPython(calcular_totales, migrations.RunPython.noop),
+    ]
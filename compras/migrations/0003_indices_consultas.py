@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras', '0002_totales'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ordencompra',
+            index=models.Index(fields=['estado', 'fecha'], name='compra_estado_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='ordencompra',
+            index=models.Index(fields=['fecha', 'numero'], name='compra_fecha_numero'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('compras', '0004_fecha_actualizado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ordencompra',
+            name='estado',
+            field=models.CharField(choices=[('borrador', 'Borrador'), ('pendiente', 'Pendiente'), ('recibida', 'Recibida'), ('cancelada', 'Cancelada')], default='pendiente', max_length=12),
+        ),
+    ]
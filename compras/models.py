@@ -1,12 +1,19 @@
 """Modelos de compras.
 
-- OrdenCompra: cabecera; al marcar como 'recibida' genera entradas de inventario
+- OrdenCompra: cabecera; al marcar como 'recibida' genera entradas de inventario.
+  Las órdenes en 'borrador' (p. ej. sugeridas por `compras.reposicion`) se
+  revisan y se confirman a 'pendiente' antes de recibirlas
 - OrdenCompraItem: detalle (producto, cantidad, costo)
+
+`total` y `num_items` se guardan en la cabecera y se recalculan al guardar o
+borrar ítems (ver `OrdenCompra.actualizar_totales`).
 """
 
-import re
 from decimal import Decimal
 from django.db import models, transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 
 from inventario.models import Proveedor, Producto
@@ -15,52 +22,85 @@ from inventario.models import Proveedor, Producto
 class OrdenCompra(models.Model):
     """Cabecera de orden de compra.
 
-    - estado: pendiente|recibida|cancelada
-    - total: calculado a partir de los ítems
+    - estado: borrador|pendiente|recibida|cancelada
+    - total/num_items: columnas derivadas de los ítems, mantenidas por
+      OrdenCompraItem.save()/delete() y por actualizar_totales()
+    - confirmar(): borrador -> pendiente
     - recibir(): crea movimientos de inventario de entrada
     """
     ESTADOS = [
+        ('borrador', 'Borrador'),
         ('pendiente', 'Pendiente'),
         ('recibida', 'Recibida'),
         ('cancelada', 'Cancelada'),
     ]
 
+    PREFIJO_NUMERO = 'OC-'
+    # Órdenes que aún se pueden editar y cuya mercadería está por llegar
+    ABIERTAS = ('borrador', 'pendiente')
+
     numero = models.CharField(max_length=30, unique=True)
     fecha = models.DateField(auto_now_add=True)
     proveedor = models.ForeignKey(Proveedor, on_delete=models.PROTECT, related_name='ordenes')
     estado = models.CharField(max_length=12, choices=ESTADOS, default='pendiente')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), editable=False, db_index=True)
+    num_items = models.PositiveIntegerField(default=0, editable=False)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'fecha'], name='compra_estado_fecha'),
+            models.Index(fields=['fecha', 'numero'], name='compra_fecha_numero'),
+        ]
 
     def __str__(self):
         return f"OC {self.numero}"
 
     @classmethod
     def generar_numero(cls) -> str:
-        """Genera un número incremental con prefijo OC-."""
-        prefijo = "OC-"
-        with transaction.atomic():
-            ultimo = cls.objects.select_for_update().order_by('-id').first()
-            ultimo_num = 0
-            if ultimo and ultimo.numero:
-                match = re.search(r'(\d+)$', ultimo.numero)
-                if match:
-                    ultimo_num = int(match.group(1))
-            return f"{prefijo}{ultimo_num + 1:04d}"
+        """Siguiente número con prefijo OC- (ver `inventario.secuencias`)."""
+        from inventario.secuencias import generar_numero
+        return generar_numero(cls, cls.PREFIJO_NUMERO)
+
+    @staticmethod
+    def totales_calculados():
+        """Expresiones `total` y `num_items` calculadas desde los ítems de cada cabecera."""
+        items = OrdenCompraItem.objects.filter(orden=OuterRef('pk')).order_by().values('orden')
+        moneda = DecimalField(max_digits=14, decimal_places=2)
+        total = items.annotate(t=Sum(F('cantidad') * F('costo_unitario'), output_field=moneda)).values('t')
+        num_items = items.annotate(n=Count('id')).values('n')
+        return {
+            'total': Coalesce(Subquery(total), Value(Decimal('0.00')), output_field=moneda),
+            'num_items': Coalesce(Subquery(num_items), Value(0)),
+        }
+
+    def actualizar_totales(self):
+        """Recalcula `total` y `num_items` en la BD y refresca la instancia."""
+        OrdenCompra.objects.filter(pk=self.pk).update(**self.totales_calculados(), actualizado=timezone.now())
+        self.refresh_from_db(fields=['total', 'num_items', 'actualizado'])
 
     @property
-    def total(self) -> Decimal:
-        return sum((i.subtotal for i in self.items.all()), Decimal('0.00'))
+    def editable(self) -> bool:
+        return self.estado in self.ABIERTAS
+
+    def confirmar(self):
+        """Pasa un borrador a pendiente."""
+        if self.estado != 'borrador':
+            raise ValidationError('Solo se pueden confirmar órdenes en borrador')
+        self.estado = 'pendiente'
+        self.save()
 
     def recibir(self):
+        """Crea las entradas de todos los ítems en bloque."""
         from inventario.models import MovimientoInventario
-        for item in self.items.all():
-            MovimientoInventario.objects.create(
-                tipo=MovimientoInventario.ENTRADA,
-                producto=item.producto,
-                cantidad=item.cantidad,
-                referencia=self.numero,
-                nota='Compra recibida',
-                ref_compra_id=self.id,
-            )
+        from inventario.stock import aplicar_movimientos
+        aplicar_movimientos(
+            MovimientoInventario.ENTRADA,
+            self.items.values_list('producto_id', 'cantidad'),
+            referencia=self.numero,
+            nota='Compra recibida',
+            ref_compra_id=self.id,
+        )
 
     def clean(self):
         if self.pk:
@@ -71,17 +111,24 @@ class OrdenCompra(models.Model):
     def save(self, *args, **kwargs):
         # Al pasar a 'recibida' se generan movimientos de entrada.
         is_new = self.pk is None
-        old_estado = None
         if is_new and not self.numero:
             with transaction.atomic():
                 self.numero = self.generar_numero()
                 super().save(*args, **kwargs)
             return
-        if not is_new:
-            old_estado = OrdenCompra.objects.get(pk=self.pk).estado
-        super().save(*args, **kwargs)
-        if not is_new and old_estado != self.estado and self.estado == 'recibida':
-            with transaction.atomic():
+        if is_new:
+            super().save(*args, **kwargs)
+            return
+        # Cabecera y movimientos en la misma transacción; el bloqueo de la
+        # cabecera evita que dos peticiones apliquen la transición a la vez.
+        # `total`/`num_items` se toman de la fila bloqueada: una instancia
+        # leída antes de cambiar los ítems no debe pisarlos con valores viejos.
+        with transaction.atomic():
+            old_estado, self.total, self.num_items = OrdenCompra.objects.select_for_update().values_list(
+                'estado', 'total', 'num_items',
+            ).get(pk=self.pk)
+            super().save(*args, **kwargs)
+            if old_estado != self.estado and self.estado == 'recibida':
                 self.recibir()
 
 
@@ -96,5 +143,15 @@ class OrdenCompraItem(models.Model):
     def subtotal(self) -> Decimal:
         return (self.costo_unitario or Decimal('0.00')) * Decimal(self.cantidad or 0)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.orden.actualizar_totales()
+
+    def delete(self, *args, **kwargs):
+        orden = self.orden
+        resultado = super().delete(*args, **kwargs)
+        orden.actualizar_totales()
+        return resultado
+
     def __str__(self):
         return f"{self.producto} x {self.cantidad}"
@@ -0,0 +1,249 @@
+"""Planificador de reposición: qué comprar, cuánto y a quién.
+
+Para cada producto activo, con las salidas de los últimos `dias` días
+(`MovimientoInventario` SALIDA, sin los ajustes por conteo físico):
+
+- venta diaria media y su desviación estándar (un día sin salidas cuenta
+  como 0)
+- posición = stock + cantidades en órdenes de compra abiertas (borrador o
+  pendiente), así que volver a planificar no duplica lo ya pedido
+- días de cobertura = posición / venta diaria
+- stock de seguridad = z · desviación · √plazo
+- punto de reorden = venta diaria · plazo + stock de seguridad; si la
+  posición no lo supera se sugiere subir hasta
+  venta diaria · (plazo + cobertura) + stock de seguridad
+
+Las salidas se leen ya sumadas por producto y día en una sola consulta
+sobre el índice tipo/fecha (el día local de cada salida sale de un CASE
+sobre los cierres de cada día) y el cálculo se hace sobre arreglos con
+NumPy si está instalado; sin NumPy el mismo cálculo corre en Python puro (más
+lento con catálogos grandes).
+
+`crear_borradores` agrupa las sugerencias por `Producto.proveedor` en una
+OrdenCompra en borrador por proveedor, que se revisa y se confirma a mano.
+"""
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional
+    np = None
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from inventario.conteos import NOTA as NOTA_CONTEO
+from inventario.existencias import cierre
+from inventario.models import MovimientoInventario, Producto
+
+from .models import OrdenCompra, OrdenCompraItem
+
+DIAS = 90
+PLAZO = 7  # días entre pedir y recibir
+COBERTURA = 14  # días de venta que cubre cada pedido, además del plazo
+Z = 1.65  # ~95 % de nivel de servicio
+LOTE = 2000
+
+
+@dataclass(frozen=True)
+class Parametros:
+    dias: int = DIAS
+    plazo: int = PLAZO
+    cobertura: int = COBERTURA
+    z: float = Z
+
+
+@dataclass(frozen=True)
+class Sugerencia:
+    producto_id: int
+    proveedor_id: int
+    stock: int
+    en_camino: int
+    venta_diaria: float
+    desviacion: float
+    dias_cobertura: float
+    punto_reorden: float
+    cantidad: int
+
+    def as_json(self) -> dict:
+        return {
+            'producto_id': self.producto_id, 'proveedor_id': self.proveedor_id,
+            'stock': self.stock, 'en_camino': self.en_camino,
+            'venta_diaria': round(self.venta_diaria, 2), 'desviacion': round(self.desviacion, 2),
+            'dias_cobertura': round(self.dias_cobertura, 1), 'punto_reorden': round(self.punto_reorden, 1),
+            'cantidad': self.cantidad,
+        }
+
+
+@dataclass
+class Plan:
+    parametros: Parametros
+    hasta: date  # último día de historia considerado
+    productos: int = 0  # productos activos analizados
+    con_salidas: int = 0
+    sugerencias: list = field(default_factory=list)  # de menor a mayor cobertura
+
+    def por_proveedor(self) -> dict:
+        grupos = defaultdict(list)
+        for s in self.sugerencias:
+            grupos[s.proveedor_id].append(s)
+        return dict(grupos)
+
+
+def _productos():
+    """Filas (id, proveedor_id, stock) de los productos activos, por id."""
+    return list(
+        Producto.objects.filter(activo=True).order_by('pk')
+        .values_list('pk', 'proveedor_id', 'cantidad_en_inventario')
+    )
+
+
+def _salidas(desde: date, dias: int):
+    """Filas (producto_id, unidades) con las salidas sumadas por producto y día; una consulta.
+
+    El día se calcula comparando con los cierres locales (no con funciones de
+    fecha de la BD): respeta el horario de verano y no requiere las tablas de
+    zonas horarias de MySQL.
+    """
+    if dias <= 0:
+        return []
+    cierres = [cierre(desde + timedelta(days=i)) for i in range(dias)]
+    dia = Case(*[When(fecha__lt=c, then=Value(i)) for i, c in enumerate(cierres)], output_field=IntegerField())
+    return list(
+        MovimientoInventario.objects.filter(
+            tipo=MovimientoInventario.SALIDA, fecha__gte=cierre(desde - timedelta(days=1)), fecha__lt=cierres[-1],
+        )
+        .exclude(nota=NOTA_CONTEO)
+        .order_by()
+        .annotate(dia=dia)
+        .values('producto_id', 'dia')
+        .annotate(unidades=Sum('cantidad'))
+        .values_list('producto_id', 'unidades')
+    )
+
+
+def _en_camino():
+    """Filas (producto_id, cantidad) pedidas en órdenes de compra abiertas."""
+    return list(
+        OrdenCompraItem.objects.filter(orden__estado__in=OrdenCompra.ABIERTAS).order_by()
+        .values('producto_id').annotate(cantidad=Sum('cantidad')).values_list('producto_id', 'cantidad')
+    )
+
+
+def _calcular_numpy(productos, salidas, en_camino, p: Parametros):
+    """Productos con salidas y filas (índice, en_camino, media, desviación, cobertura, reorden, cantidad) a reponer."""
+    productos = np.array(productos, dtype=np.int64).reshape(-1, 3)
+    ids, stock = productos[:, 0], productos[:, 2]
+    n = len(ids)
+    # id -> posición en `ids` (-1 si no es un producto activo); los ids son autoincrementales
+    indice = np.full(int(ids[-1]) + 1 if n else 0, -1, dtype=np.int32)
+    indice[ids] = np.arange(n, dtype=np.int32)
+
+    def por_producto(filas, cuadrado=False):
+        filas = np.array(filas, dtype=np.int64).reshape(-1, 2)
+        pos = indice[np.minimum(filas[:, 0], len(indice) - 1)] if n else np.full(len(filas), -1)
+        pos[filas[:, 0] >= len(indice)] = -1
+        ok = pos >= 0
+        valores = filas[ok, 1].astype(np.float64)
+        return np.bincount(pos[ok], weights=valores * valores if cuadrado else valores, minlength=n)
+
+    media = por_producto(salidas) / p.dias
+    desviacion = np.sqrt(np.maximum(por_producto(salidas, cuadrado=True) / p.dias - media * media, 0))
+    camino = por_producto(en_camino)
+    posicion = stock + camino
+    cobertura = np.divide(posicion, media, out=np.full(n, np.inf), where=media > 0)
+    seguridad = p.z * desviacion * math.sqrt(p.plazo)
+    reorden = media * p.plazo + seguridad
+    cantidad = np.ceil(media * (p.plazo + p.cobertura) + seguridad - posicion)
+    indices = np.flatnonzero((media > 0) & (posicion <= reorden) & (cantidad > 0))
+    filas = zip(
+        indices.tolist(), camino[indices].tolist(), media[indices].tolist(), desviacion[indices].tolist(),
+        cobertura[indices].tolist(), reorden[indices].tolist(), cantidad[indices].tolist(),
+    )
+    return int(np.count_nonzero(media)), list(filas)
+
+
+def _calcular_python(productos, salidas, en_camino, p: Parametros):
+    """Lo mismo que `_calcular_numpy`, producto por producto."""
+    suma, cuadrados, camino = defaultdict(int), defaultdict(int), defaultdict(int)
+    for pid, cantidad in salidas:
+        suma[pid] += cantidad
+        cuadrados[pid] += cantidad * cantidad
+    for pid, cantidad in en_camino:
+        camino[pid] += cantidad
+    raiz_plazo = math.sqrt(p.plazo)
+    con_salidas, filas = 0, []
+    for i, (pid, _, stock) in enumerate(productos):
+        if not suma.get(pid):
+            continue
+        con_salidas += 1
+        media = suma[pid] / p.dias
+        desviacion = math.sqrt(max(cuadrados[pid] / p.dias - media * media, 0))
+        posicion = stock + camino[pid]
+        seguridad = p.z * desviacion * raiz_plazo
+        reorden = media * p.plazo + seguridad
+        cantidad = math.ceil(media * (p.plazo + p.cobertura) + seguridad - posicion)
+        if posicion <= reorden and cantidad > 0:
+            filas.append((i, camino[pid], media, desviacion, posicion / media, reorden, cantidad))
+    return con_salidas, filas
+
+
+def planificar(parametros: Parametros = Parametros(), hoy: date | None = None) -> Plan:
+    """Sugerencias de compra con la historia de los `dias` días anteriores a `hoy`."""
+    hoy = hoy or timezone.localdate()
+    productos = _productos()
+    calcular = _calcular_numpy if np is not None else _calcular_python
+    con_salidas, filas = calcular(
+        productos, _salidas(hoy - timedelta(days=parametros.dias), parametros.dias), _en_camino(), parametros,
+    )
+    sugerencias = [
+        Sugerencia(
+            producto_id=productos[i][0], proveedor_id=productos[i][1], stock=productos[i][2], en_camino=int(camino),
+            venta_diaria=media, desviacion=desviacion, dias_cobertura=cobertura,
+            punto_reorden=reorden, cantidad=int(cantidad),
+        )
+        for i, camino, media, desviacion, cobertura, reorden, cantidad in filas
+    ]
+    sugerencias.sort(key=lambda s: (s.dias_cobertura, s.producto_id))
+    return Plan(parametros, hoy - timedelta(days=1), len(productos), con_salidas, sugerencias)
+
+
+def _costos(producto_ids) -> dict:
+    costos = {}
+    for i in range(0, len(producto_ids), LOTE):
+        costos.update(Producto.objects.filter(pk__in=producto_ids[i:i + LOTE]).values_list('pk', 'precio_compra'))
+    return costos
+
+
+def crear_borradores(plan: Plan) -> list[OrdenCompra]:
+    """Una OrdenCompra en borrador por proveedor con las sugerencias de `plan`."""
+    costos = _costos([s.producto_id for s in plan.sugerencias])
+    grupos = sorted(plan.por_proveedor().items())
+    # Números tomados antes de la transacción (si falla quedan como huecos, ver `secuencias`)
+    numeros = [OrdenCompra.generar_numero() for _ in grupos]
+    ordenes = []
+    with transaction.atomic():
+        for numero, (proveedor_id, sugerencias) in zip(numeros, grupos):
+            orden = OrdenCompra(numero=numero, proveedor_id=proveedor_id, estado='borrador')
+            orden.save()
+            OrdenCompraItem.objects.bulk_create(
+                [
+                    OrdenCompraItem(
+                        orden=orden, producto_id=s.producto_id, cantidad=s.cantidad,
+                        costo_unitario=costos[s.producto_id],
+                    )
+                    for s in sorted(sugerencias, key=lambda s: s.producto_id)
+                ],
+                batch_size=LOTE,
+            )
+            ordenes.append(orden)
+        # bulk_create no pasa por OrdenCompraItem.save(): totales de todas las cabeceras en un UPDATE
+        OrdenCompra.objects.filter(pk__in=[o.pk for o in ordenes]).update(
+            **OrdenCompra.totales_calculados(), actualizado=timezone.now(),
+        )
+    return ordenes
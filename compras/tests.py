@@ -0,0 +1,152 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipIf
+
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from compras import reposicion
+from compras.models import OrdenCompra, OrdenCompraItem
+from compras.reposicion import Parametros, crear_borradores, planificar
+from inventario.conteos import NOTA as NOTA_CONTEO
+from inventario.existencias import cierre
+from inventario.models import CategoriaProducto, MovimientoInventario, Producto, Proveedor
+
+
+def _proveedor(empresa='Acme'):
+    return Proveedor.objects.create(empresa=empresa, contacto_principal='-', telefono='-', direccion='-')
+
+
+def _producto(codigo, proveedor, stock=0):
+    categoria, _ = CategoriaProducto.objects.get_or_create(nombre='General')
+    return Producto.objects.create(
+        codigo=codigo, nombre=codigo, precio_venta=Decimal('10.00'), precio_compra=Decimal('6.00'),
+        cantidad_en_inventario=stock, proveedor=proveedor, categoria=categoria,
+    )
+
+
+def _movimiento(producto, cantidad, fecha, tipo=MovimientoInventario.SALIDA, nota=''):
+    """Movimiento con `fecha` dada, sin tocar el stock."""
+    m = MovimientoInventario.objects.bulk_create([
+        MovimientoInventario(producto=producto, tipo=tipo, cantidad=cantidad, nota=nota),
+    ])[0]
+    MovimientoInventario.objects.filter(pk=m.pk).update(fecha=fecha)
+
+
+class TotalesCabeceraTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.proveedor = _proveedor()
+        cls.producto = _producto('P1', cls.proveedor)
+
+    def test_guardar_instancia_vieja_no_pisa_totales(self):
+        orden = OrdenCompra.objects.create(proveedor=self.proveedor, estado='borrador')
+        vieja = OrdenCompra.objects.get(pk=orden.pk)
+        OrdenCompraItem.objects.create(orden=orden, producto=self.producto, cantidad=4, costo_unitario=Decimal('6'))
+
+        vieja.confirmar()
+
+        self.assertEqual((vieja.total, vieja.num_items), (Decimal('24.00'), 1))
+        fila = OrdenCompra.objects.values_list('total', 'num_items', 'estado').get(pk=orden.pk)
+        self.assertEqual(fila, (Decimal('24.00'), 1, 'pendiente'))
+
+
+@override_settings(TIME_ZONE='America/New_York')
+class SalidasPorDiaTests(TestCase):
+    DESDE = date(2024, 3, 8)  # la ventana cruza el cambio al horario de verano (10 de marzo)
+    DIAS = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        proveedor = _proveedor()
+        cls.p1, cls.p2 = _producto('P1', proveedor), _producto('P2', proveedor)
+
+    def setUp(self):
+        # Salidas justo antes y justo en cada cierre (en hora local), más ruido que no cuenta
+        for i in range(-1, self.DIAS + 1):
+            dia = self.DESDE + timedelta(days=i)
+            _movimiento(self.p1, i + 2, cierre(dia) - timedelta(seconds=1))
+            _movimiento(self.p1, 10 * (i + 2), cierre(dia))
+            _movimiento(self.p2, 1, cierre(dia) - timedelta(hours=12))
+            _movimiento(self.p2, 100, cierre(dia) - timedelta(hours=1), nota=NOTA_CONTEO)
+            _movimiento(self.p2, 100, cierre(dia) - timedelta(hours=1), tipo=MovimientoInventario.ENTRADA)
+
+    def _dia_por_dia(self):
+        filas = []
+        for i in range(self.DIAS):
+            dia = self.DESDE + timedelta(days=i)
+            filas.extend(
+                MovimientoInventario.objects.filter(
+                    tipo=MovimientoInventario.SALIDA, fecha__gte=cierre(dia - timedelta(days=1)), fecha__lt=cierre(dia),
+                ).exclude(nota=NOTA_CONTEO).order_by()
+                .values('producto_id').annotate(unidades=Sum('cantidad')).values_list('producto_id', 'unidades')
+            )
+        return sorted(filas)
+
+    def test_una_consulta_con_los_mismos_totales_por_dia(self):
+        with self.assertNumQueries(1):
+            filas = reposicion._salidas(self.DESDE, self.DIAS)
+        esperado = self._dia_por_dia()
+        self.assertEqual(len(esperado), 2 * self.DIAS)
+        self.assertEqual(sorted(filas), esperado)
+
+    def test_sin_dias(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(reposicion._salidas(self.DESDE, 0), [])
+
+
+@skipIf(reposicion.np is None, 'requiere NumPy')
+class CalculoNumpyPythonTests(SimpleTestCase):
+    def test_mismo_resultado(self):
+        azar = random.Random(11)
+        productos = [(pid, pid % 3, azar.randint(0, 40)) for pid in range(1, 400) if azar.random() < 0.8]
+        activos = [pid for pid, _, _ in productos]
+        # Salidas también de productos inactivos o fuera del rango de ids activos
+        salidas = [(azar.choice(activos + [0, 401, 1000]), azar.randint(1, 9)) for _ in range(3000)]
+        en_camino = [(azar.choice(activos + [999]), azar.randint(1, 50)) for _ in range(100)]
+        parametros = Parametros(dias=30, plazo=5, cobertura=10, z=1.28)
+
+        con_numpy, filas_numpy = reposicion._calcular_numpy(productos, salidas, en_camino, parametros)
+        con_python, filas_python = reposicion._calcular_python(productos, salidas, en_camino, parametros)
+
+        self.assertEqual(con_numpy, con_python)
+        self.assertGreater(len(filas_python), 10)
+        self.assertEqual([f[0] for f in filas_numpy], [f[0] for f in filas_python])
+        for a, b in zip(filas_numpy, filas_python):
+            self.assertEqual((a[1], a[6]), (b[1], b[6]))
+            for x, y in zip(a[2:6], b[2:6]):
+                self.assertAlmostEqual(x, y, places=9)
+
+
+class PlanificarTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme, cls.otro = _proveedor('Acme'), _proveedor('Otro')
+        cls.rapido = _producto('RAPIDO', cls.acme, stock=20)
+        cls.quieto = _producto('QUIETO', cls.acme, stock=0)
+        cls.cubierto = _producto('CUBIERTO', cls.otro, stock=5)
+        hoy = timezone.localdate()
+        for k in range(1, 31):
+            _movimiento(cls.rapido, 10, cierre(hoy - timedelta(days=k)) - timedelta(hours=1))
+            _movimiento(cls.cubierto, 2, cierre(hoy - timedelta(days=k)) - timedelta(hours=1))
+        orden = OrdenCompra.objects.create(proveedor=cls.otro, estado='pendiente')
+        OrdenCompraItem.objects.create(orden=orden, producto=cls.cubierto, cantidad=100, costo_unitario=Decimal('6'))
+
+    def test_sugiere_hasta_cubrir_plazo_y_cobertura(self):
+        plan = planificar(Parametros(dias=30, plazo=7, cobertura=14))
+        self.assertEqual((plan.productos, plan.con_salidas), (3, 2))
+        [sugerencia] = plan.sugerencias
+        self.assertEqual(sugerencia.producto_id, self.rapido.pk)
+        self.assertEqual((sugerencia.venta_diaria, sugerencia.desviacion), (10, 0))
+        self.assertEqual((sugerencia.punto_reorden, sugerencia.cantidad), (70, 10 * 21 - 20))
+
+    def test_borradores_por_proveedor_y_sin_duplicar(self):
+        parametros = Parametros(dias=30, plazo=7, cobertura=14)
+        [orden] = crear_borradores(planificar(parametros))
+        orden.refresh_from_db()
+        self.assertEqual((orden.proveedor_id, orden.estado, orden.num_items), (self.acme.pk, 'borrador', 1))
+        self.assertEqual(orden.total, Decimal('6.00') * 190)
+        # Lo pedido en el borrador cuenta como en camino
+        self.assertEqual(planificar(parametros).sugerencias, [])
@@ -1,6 +1,6 @@
 """Rutas de Compras.
 
-- Órdenes de compra: listado, detalle, crear, editar, recibir
+- Órdenes de compra: listado, detalle, crear, editar, confirmar, recibir
 """
 
 from django.urls import path
@@ -11,5 +11,6 @@ urlpatterns = [
     path('ordenes/<int:pk>/', views.OrdenCompraDetailView.as_view(), name='orden_compra_detail'),
     path('ordenes/nueva/', views.orden_compra_create, name='orden_compra_create'),
     path('ordenes/<int:pk>/editar/', views.orden_compra_update, name='orden_compra_update'),
+    path('ordenes/<int:pk>/confirmar/', views.orden_compra_confirmar, name='orden_compra_confirm'),
     path('ordenes/<int:pk>/recibir/', views.orden_compra_recibir, name='orden_compra_receive'),
 ]
@@ -1,12 +1,12 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
 from django.shortcuts import render, redirect
 from django.views.generic import ListView, DetailView
 from .models import OrdenCompra
 from .forms import OrdenCompraForm, OrdenCompraItemFormSet
-from inventario.models import Producto
-import json
+from inventario.precios import url_mapa
 
 
 class OrdenCompraListView(LoginRequiredMixin, ListView):
@@ -36,13 +36,11 @@ def orden_compra_create(request):
     else:
         form = OrdenCompraForm(instance=orden)
         formset = OrdenCompraItemFormSet(instance=orden)
-    productos = Producto.objects.filter(activo=True).values('id', 'precio_compra')
-    price_map = {str(p['id']): str(p['precio_compra']) for p in productos}
     return render(request, 'compras/ordencompra_form.html', {
         'form': form,
         'formset': formset,
         'crear': True,
-        'price_map_json': json.dumps(price_map),
+        'price_map_url': url_mapa('compra'),
     })
 
 
@@ -50,8 +48,8 @@ def orden_compra_create(request):
 @permission_required('compras.change_ordencompra', raise_exception=True)
 def orden_compra_update(request, pk: int):
     orden = OrdenCompra.objects.get(pk=pk)
-    if orden.estado != 'pendiente':
-        messages.error(request, 'Solo se pueden editar órdenes en estado pendiente.')
+    if not orden.editable:
+        messages.error(request, 'Solo se pueden editar órdenes en borrador o pendientes.')
         return redirect('orden_compra_detail', pk=orden.pk)
     if request.method == 'POST':
         form = OrdenCompraForm(request.POST, instance=orden)
@@ -64,17 +62,28 @@ def orden_compra_update(request, pk: int):
     else:
         form = OrdenCompraForm(instance=orden)
         formset = OrdenCompraItemFormSet(instance=orden)
-    productos = Producto.objects.filter(activo=True).values('id', 'precio_compra')
-    price_map = {str(p['id']): str(p['precio_compra']) for p in productos}
     return render(request, 'compras/ordencompra_form.html', {
         'form': form,
         'formset': formset,
         'crear': False,
         'orden': orden,
-        'price_map_json': json.dumps(price_map),
+        'price_map_url': url_mapa('compra'),
     })
 
 
+@login_required
+@permission_required('compras.change_ordencompra', raise_exception=True)
+def orden_compra_confirmar(request, pk: int):
+    orden = OrdenCompra.objects.get(pk=pk)
+    if request.method == 'POST':
+        try:
+            orden.confirmar()
+            messages.success(request, 'Orden confirmada.')
+        except ValidationError as e:
+            messages.error(request, ' '.join(e.messages))
+    return redirect('orden_compra_detail', pk=orden.pk)
+
+
 @login_required
 @permission_required('compras.change_ordencompra', raise_exception=True)
 def orden_compra_recibir(request, pk: int):
@@ -96,6 +105,7 @@ Vistas del módulo de compras.
 
 - Listado y detalle de órdenes de compra (CBV)
 - Crear/editar órdenes con formset de ítems
+- Confirmar borrador (pasa a pendiente)
 - Recibir orden (genera movimientos de inventario de entrada)
 
 Permisos:
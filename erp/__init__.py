@@ -1 +1,5 @@
+import contextlib
 
+# Celery es opcional; si está instalado se registra la app para @shared_task
+with contextlib.suppress(ImportError):
+    from .celery import app as celery_app  # noqa: F401
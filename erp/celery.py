@@ -0,0 +1,16 @@
+"""App Celery del proyecto (opcional).
+
+Solo se usa con `EXPORTACIONES_BACKEND=celery`. Configuración con prefijo
+CELERY_ en settings (p. ej. CELERY_BROKER_URL, CELERY_TASK_ALWAYS_EAGER).
+Worker: `celery -A erp worker -l info`.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'erp.settings')
+
+app = Celery('erp')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
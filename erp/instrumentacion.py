@@ -0,0 +1,180 @@
+"""Instrumentación por petición: consultas SQL, tiempos y patrones N+1.
+
+`InstrumentacionMiddleware` envuelve la ejecución de SQL de todas las
+conexiones con `connection.execute_wrapper` (funciona con DEBUG=False) y por
+cada petición registra:
+
+- número de consultas y tiempo total en BD
+- las `INSTRUMENTACION_LENTAS` sentencias más lentas
+- sentencias repetidas (mismo SQL parametrizado) `INSTRUMENTACION_REPETIDAS`
+  o más veces (por vista en `INSTRUMENTACION_REPETIDAS_VISTAS`): la firma
+  típica de un N+1
+
+Se acumula por nombre de vista (`resumen_por_vista()`) y se registra como
+una línea JSON en el logger `erp.instrumentacion`: en WARNING si la vista
+supera su presupuesto de consultas (`INSTRUMENTACION_PRESUPUESTO`, o por
+vista en `INSTRUMENTACION_PRESUPUESTOS`) o repite sentencias, en DEBUG si
+no. La cabecera `Server-Timing` (visible en las herramientas del navegador)
+expone tiempos internos: según `INSTRUMENTACION_SERVER_TIMING` se envía solo
+a usuarios staff ('staff', por defecto), a todos ('todos') o a nadie ('no').
+
+El costo por consulta es un `perf_counter` y una entrada en un dict; el SQL
+ya viene con placeholders, así que no hay que normalizar literales. Las
+consultas que ocurren al iterar una respuesta en streaming no se cuentan.
+
+Se desactiva con `INSTRUMENTACION = False`.
+"""
+
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('erp.instrumentacion')
+
+_IN_LISTA = re.compile(r'IN \((?:%s, )*%s\)')
+_MAX_SQL = 300
+
+_lock = threading.Lock()
+_por_vista = {}
+
+
+def _patron(sql: str) -> str:
+    # `IN (%s, %s, ...)` de distinto largo es el mismo patrón
+    return _IN_LISTA.sub('IN (...)', sql)
+
+
+class _Registro:
+    """Consultas de una petición (lo alimenta `__call__` como execute_wrapper)."""
+
+    def __init__(self, lentas: int):
+        self.lentas = lentas
+        self.consultas = 0
+        self.segundos = 0.0
+        self.mas_lentas = []  # heap de (segundos, sql)
+        self.patrones = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.consultas += 1
+            self.segundos += duracion
+            self.patrones[_patron(sql)] += 1
+            if len(self.mas_lentas) < self.lentas:
+                heapq.heappush(self.mas_lentas, (duracion, sql))
+            elif duracion > self.mas_lentas[0][0]:
+                heapq.heapreplace(self.mas_lentas, (duracion, sql))
+
+
+def _acumular(vista, consultas, db_ms, total_ms, excedido, repetidas):
+    with _lock:
+        datos = _por_vista.setdefault(vista, {
+            'peticiones': 0, 'consultas': 0, 'db_ms': 0.0, 'total_ms': 0.0,
+            'max_consultas': 0, 'excedidas': 0, 'con_repetidas': 0,
+        })
+        datos['peticiones'] += 1
+        datos['consultas'] += consultas
+        datos['db_ms'] += db_ms
+        datos['total_ms'] += total_ms
+        datos['max_consultas'] = max(datos['max_consultas'], consultas)
+        datos['excedidas'] += int(excedido)
+        datos['con_repetidas'] += int(bool(repetidas))
+
+
+def resumen_por_vista() -> dict:
+    """Acumulado de este proceso por vista, con promedios, de más a menos consultas."""
+    with _lock:
+        copia = {vista: dict(datos) for vista, datos in _por_vista.items()}
+    for datos in copia.values():
+        n = datos['peticiones']
+        datos['consultas_prom'] = round(datos['consultas'] / n, 1)
+        datos['db_ms_prom'] = round(datos['db_ms'] / n, 2)
+        datos['total_ms_prom'] = round(datos['total_ms'] / n, 2)
+        datos['db_ms'] = round(datos['db_ms'], 2)
+        datos['total_ms'] = round(datos['total_ms'], 2)
+    return dict(sorted(copia.items(), key=lambda kv: -kv[1]['consultas_prom']))
+
+
+def reiniciar_resumen():
+    with _lock:
+        _por_vista.clear()
+
+
+class InstrumentacionMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'INSTRUMENTACION', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.presupuesto = getattr(settings, 'INSTRUMENTACION_PRESUPUESTO', 50)
+        self.presupuestos = getattr(settings, 'INSTRUMENTACION_PRESUPUESTOS', {})
+        self.repetidas = getattr(settings, 'INSTRUMENTACION_REPETIDAS', 5)
+        self.repetidas_vistas = getattr(settings, 'INSTRUMENTACION_REPETIDAS_VISTAS', {})
+        self.lentas = getattr(settings, 'INSTRUMENTACION_LENTAS', 3)
+        self.server_timing = getattr(settings, 'INSTRUMENTACION_SERVER_TIMING', 'staff')
+
+    def __call__(self, request):
+        registro = _Registro(self.lentas)
+        inicio = time.perf_counter()
+        with ExitStack() as stack:
+            for conexion in connections.all():
+                stack.enter_context(conexion.execute_wrapper(registro))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - inicio) * 1000
+        db_ms = registro.segundos * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        vista = (match.view_name or match._func_path) if match else 'sin_ruta'
+        presupuesto = self.presupuestos.get(vista, self.presupuesto)
+        excedido = registro.consultas > presupuesto
+        umbral = self.repetidas_vistas.get(vista, self.repetidas)
+        repetidas = [(n, sql) for sql, n in registro.patrones.most_common() if n >= umbral]
+
+        if self._con_server_timing(request):
+            response['Server-Timing'] = (
+                f'db;dur={db_ms:.1f};desc="{registro.consultas} consultas", app;dur={total_ms - db_ms:.1f}'
+            )
+        _acumular(vista, registro.consultas, db_ms, total_ms, excedido, repetidas)
+
+        nivel = logging.WARNING if excedido or repetidas else logging.DEBUG
+        if not logger.isEnabledFor(nivel):
+            return response
+
+        entrada = {
+            'vista': vista,
+            'metodo': request.method,
+            'ruta': request.path,
+            'status': response.status_code,
+            'consultas': registro.consultas,
+            'db_ms': round(db_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }
+        if registro.mas_lentas:
+            entrada['lentas'] = [
+                {'ms': round(s * 1000, 2), 'sql': sql[:_MAX_SQL]}
+                for s, sql in sorted(registro.mas_lentas, reverse=True)
+            ]
+        if repetidas:
+            entrada['repetidas'] = [{'veces': n, 'sql': sql[:_MAX_SQL]} for n, sql in repetidas]
+        if excedido:
+            entrada['presupuesto'] = presupuesto
+        logger.log(nivel, json.dumps(entrada, ensure_ascii=False))
+        return response
+
+    def _con_server_timing(self, request) -> bool:
+        if self.server_timing == 'todos':
+            return True
+        if self.server_timing != 'staff':
+            return False
+        usuario = getattr(request, 'user', None)
+        return bool(usuario and usuario.is_staff)
@@ -26,6 +26,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Consultas/tiempos por petición y detección de N+1 (ver erp.instrumentacion)
+    'erp.instrumentacion.InstrumentacionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -70,6 +72,14 @@ DATABASES = {
     }
 }
 
+# Conexión aparte para reservar bloques de numeración de documentos fuera de
+# transacciones; no se usa con SQLite (ver inventario.secuencias)
+DATABASES['secuencias'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+SECUENCIAS_DB = 'secuencias'
+SECUENCIAS_BLOQUE = int(os.environ.get('SECUENCIAS_BLOQUE', '20'))
+# Prefijos que deben numerarse sin huecos (p. ej. {'V-'}); serializa su creación
+SECUENCIAS_SIN_HUECOS = {p for p in os.environ.get('SECUENCIAS_SIN_HUECOS', '').split(',') if p}
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -89,6 +99,78 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Caché (local-memory por defecto; para varios workers usar un backend compartido,
+# p. ej. CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache y
+# CACHE_LOCATION=/var/tmp/erp-cache)
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'erp'),
+    }
+}
+
+# Segundos máximos que las métricas del dashboard pueden estar cacheadas (0 = sin caché)
+METRICAS_CACHE_TTL = int(os.environ.get('METRICAS_CACHE_TTL', '60'))
+
+# Segundos máximos que el mapa de precios de los formularios puede estar cacheado (0 = sin caché)
+PRECIOS_CACHE_TTL = int(os.environ.get('PRECIOS_CACHE_TTL', '300'))
+
+# Archivos generados (exportaciones de reportes)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = Path(os.environ.get('MEDIA_ROOT', BASE_DIR / 'media'))
+
+# Worker de exportaciones: 'hilo' | 'bd' | 'celery' | 'sincrono' (ver reportes.trabajos)
+EXPORTACIONES_BACKEND = os.environ.get('EXPORTACIONES_BACKEND', 'hilo')
+# Segundos sin latido tras los que un trabajo en proceso se da por abandonado
+EXPORTACIONES_VENCIMIENTO = int(os.environ.get('EXPORTACIONES_VENCIMIENTO', '600'))
+# Días que se conservan los trabajos terminados y sus archivos (`limpiar_exportaciones`)
+EXPORTACIONES_CONSERVAR_DIAS = int(os.environ.get('EXPORTACIONES_CONSERVAR_DIAS', '7'))
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', '0') == '1'
+
+# Operaciones máximas por lote en /api/batch/ (api.lote)
+API_BATCH_MAX = int(os.environ.get('API_BATCH_MAX', '100'))
+
+# Instrumentación por petición (erp.instrumentacion)
+INSTRUMENTACION = os.environ.get('INSTRUMENTACION', '1') == '1'
+# Consultas máximas esperadas por petición; por vista en INSTRUMENTACION_PRESUPUESTOS
+INSTRUMENTACION_PRESUPUESTO = int(os.environ.get('INSTRUMENTACION_PRESUPUESTO', '30'))
+INSTRUMENTACION_PRESUPUESTOS = {
+    'api_dashboard': 9,
+    # Alta de pedido/orden: 19 consultas medidas sin importar las líneas, 23
+    # cuando además se reserva un bloque de numeración
+    'api_ventas': 25,
+    'api_compras': 25,
+    # Un lote hace las consultas de todas sus operaciones
+    'api_batch': 25 * API_BATCH_MAX,
+}
+# Veces que una misma sentencia debe repetirse para reportarla como posible N+1
+INSTRUMENTACION_REPETIDAS = 5
+# Umbral por vista: un lote repite las sentencias de cada operación, así que
+# solo se reporta si además cada operación las repite
+INSTRUMENTACION_REPETIDAS_VISTAS = {
+    'api_batch': INSTRUMENTACION_REPETIDAS * API_BATCH_MAX,
+}
+INSTRUMENTACION_LENTAS = 3
+# A quién se envía la cabecera Server-Timing: 'staff' | 'todos' | 'no'
+INSTRUMENTACION_SERVER_TIMING = os.environ.get('INSTRUMENTACION_SERVER_TIMING', 'staff')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'erp.instrumentacion': {
+            'handlers': ['console'],
+            # DEBUG registra todas las peticiones; WARNING solo las que exceden o repiten
+            'level': os.environ.get('INSTRUMENTACION_LOG_NIVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 # Autenticación
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'dashboard'
@@ -0,0 +1,27 @@
+"""Settings para las pruebas (`pytest`): SQLite en memoria en lugar de MySQL.
+
+La conexión `secuencias` apunta a un archivo SQLite aparte: la aplicación
+no la usa con SQLite (ver `inventario.secuencias._alias`), pero permite
+probar la reserva de números desde varios hilos, cada uno con su propia
+conexión, sin la BD en memoria de `default`.
+"""
+
+import os
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+_TEMPORAL = tempfile.mkdtemp(prefix='erp-pruebas-')
+DATABASES['secuencias'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.path.join(_TEMPORAL, 'secuencias.sqlite3'),
+    'OPTIONS': {'timeout': 30},
+    'TEST': {'NAME': os.path.join(_TEMPORAL, 'test_secuencias.sqlite3')},
+}
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pruebas'}}
+MEDIA_ROOT = os.path.join(_TEMPORAL, 'media')
+EXPORTACIONES_BACKEND = 'sincrono'
@@ -0,0 +1,114 @@
+import json
+import logging
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from erp.instrumentacion import reiniciar_resumen
+from inventario.models import CategoriaProducto, Producto, Proveedor
+from ventas.models import Cliente
+
+
+@override_settings(
+    INSTRUMENTACION_PRESUPUESTO=100, INSTRUMENTACION_PRESUPUESTOS={},
+    INSTRUMENTACION_REPETIDAS=50, INSTRUMENTACION_REPETIDAS_VISTAS={},
+)
+class InstrumentacionTests(TestCase):
+    def setUp(self):
+        reiniciar_resumen()
+        self.addCleanup(reiniciar_resumen)
+
+    def test_server_timing_solo_para_staff(self):
+        self.assertNotIn('Server-Timing', self.client.get('/api/inventario/'))
+
+        self.client.force_login(User.objects.create_user('ana'))
+        self.assertNotIn('Server-Timing', self.client.get('/api/inventario/'))
+
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        respuesta = self.client.get('/api/inventario/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('consultas', respuesta['Server-Timing'])
+
+    @override_settings(INSTRUMENTACION_SERVER_TIMING='todos')
+    def test_server_timing_para_todos(self):
+        self.assertIn('Server-Timing', self.client.get('/api/inventario/'))
+
+    @override_settings(INSTRUMENTACION_SERVER_TIMING='no')
+    def test_server_timing_desactivado(self):
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        self.assertNotIn('Server-Timing', self.client.get('/api/inventario/'))
+
+    def test_peticion_normal_en_debug(self):
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        with self.assertLogs('erp.instrumentacion', level='DEBUG') as logs:
+            self.client.get('/api/inventario/')
+        self.assertEqual([r.levelno for r in logs.records], [logging.DEBUG])
+
+    def test_sin_registro_por_defecto(self):
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        with self.assertNoLogs('erp.instrumentacion', level='INFO'):
+            self.client.get('/api/inventario/')
+
+    @override_settings(INSTRUMENTACION_PRESUPUESTO=1)
+    def test_presupuesto_excedido_en_warning(self):
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        with self.assertLogs('erp.instrumentacion', level='WARNING') as logs:
+            self.client.get('/api/inventario/')
+        self.assertIn('"presupuesto": 1', logs.output[0])
+
+    @override_settings(INSTRUMENTACION_REPETIDAS=1)
+    def test_repetidas_en_warning(self):
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        with self.assertLogs('erp.instrumentacion', level='WARNING') as logs:
+            self.client.get('/api/inventario/')
+        self.assertIn('"repetidas"', logs.output[0])
+
+    @override_settings(INSTRUMENTACION_REPETIDAS=1, INSTRUMENTACION_REPETIDAS_VISTAS={'api_inventario': 100})
+    def test_umbral_de_repetidas_por_vista(self):
+        self.client.force_login(User.objects.create_user('admin', is_staff=True))
+        with self.assertNoLogs('erp.instrumentacion', level='WARNING'):
+            self.client.get('/api/inventario/')
+
+
+class PresupuestosTests(TestCase):
+    """Con los presupuestos del proyecto, las altas normales no se reportan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        proveedor = Proveedor.objects.create(empresa='Acme', contacto_principal='-', telefono='-', direccion='-')
+        categoria = CategoriaProducto.objects.create(nombre='General')
+        cls.productos = [
+            Producto.objects.create(
+                codigo=f'P{i}', nombre=f'Producto {i}', precio_venta=Decimal('10.00'), precio_compra=Decimal('6.00'),
+                cantidad_en_inventario=1000, proveedor=proveedor, categoria=categoria,
+            )
+            for i in range(5)
+        ]
+        cls.proveedor = proveedor
+        cls.cliente = Cliente.objects.create(nombre_completo='Cliente', direccion='-', telefono='-', email='c@x.com')
+        cls.user = User.objects.create_user('ana')
+
+    def setUp(self):
+        reiniciar_resumen()
+        self.addCleanup(reiniciar_resumen)
+        self.client.force_login(self.user)
+
+    def _post(self, ruta, cuerpo):
+        return self.client.post(ruta, json.dumps(cuerpo), content_type='application/json')
+
+    def _lineas(self):
+        return [{'producto_id': p.pk, 'cantidad': 1} for p in self.productos]
+
+    def test_altas_dentro_del_presupuesto(self):
+        with self.assertNoLogs('erp.instrumentacion', level='WARNING'):
+            for _ in range(2):
+                venta = self._post('/api/ventas/', {'cliente_id': self.cliente.pk, 'items': self._lineas()})
+                compra = self._post('/api/compras/', {'proveedor_id': self.proveedor.pk, 'items': self._lineas()})
+                self.assertEqual((venta.status_code, compra.status_code), (201, 201))
+
+    def test_lote_de_altas_sin_repetidas(self):
+        operacion = {'metodo': 'POST', 'ruta': 'ventas/', 'cuerpo': {'cliente_id': self.cliente.pk, 'items': self._lineas()}}
+        with self.assertNoLogs('erp.instrumentacion', level='WARNING'):
+            respuesta = self._post('/api/batch/', {'operaciones': [operacion] * 20, 'atomico': True})
+        self.assertEqual(respuesta.status_code, 200)
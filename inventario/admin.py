@@ -4,7 +4,7 @@ Registra modelos para gestión rápida desde el panel de administración.
 """
 
 from django.contrib import admin
-from .models import CategoriaProducto, Proveedor, Producto, MovimientoInventario
+from .models import CategoriaProducto, Proveedor, Producto, MovimientoInventario, SecuenciaDocumento
 
 
 @admin.register(CategoriaProducto)
@@ -35,3 +35,10 @@ class MovimientoInventarioAdmin(admin.ModelAdmin):
     list_display = ("fecha", "tipo", "producto", "cantidad", "referencia")
     list_filter = ("tipo", "fecha")
     search_fields = ("referencia", "producto__nombre", "producto__codigo")
+
+
+@admin.register(SecuenciaDocumento)
+class SecuenciaDocumentoAdmin(admin.ModelAdmin):
+    """Admin de contadores de numeración (solo lectura del prefijo)."""
+    list_display = ("prefijo", "siguiente")
+    readonly_fields = ("prefijo",)
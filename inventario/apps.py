@@ -7,3 +7,7 @@ class InventarioConfig(AppConfig):
     """Configuración de la aplicación de inventario."""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventario'
+
+    def ready(self):
+        # Mantienen el índice de búsqueda y la versión del mapa de precios
+        from . import busqueda, precios  # noqa: F401
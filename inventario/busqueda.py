@@ -0,0 +1,208 @@
+"""Búsqueda de productos (autocompletado) por código, nombre y descripción.
+
+Índice invertido en la tabla `TerminoProducto`: cada producto guarda sus
+términos normalizados (minúsculas, sin acentos, solo letras y dígitos) con
+un peso según el campo de origen. Buscar es leer rangos del índice
+`(termino, producto, peso)`, así que funciona igual en MySQL y en SQLite
+(no depende de FULLTEXT ni de FTS) y el costo depende de los candidatos
+leídos, no del tamaño del catálogo:
+
+- Cada término de la consulta se busca por prefijo (`termino >= t AND
+  termino < t'`), leyendo como máximo `CANDIDATOS` filas en orden del
+  índice; las coincidencias exactas salen primero
+- El término con menos candidatos guía la búsqueda; los demás se
+  verifican solo sobre esos productos (todos los términos deben coincidir).
+  Si todos los términos son muy comunes, el ranking se limita a esos
+  primeros candidatos
+- Puntos por término: el peso del campo, doble si la coincidencia es exacta
+- Si no hay resultados, los términos sin coincidencias se corrigen con los
+  términos más parecidos del índice que comparten sus primeras letras
+
+El índice se actualiza en `post_save` de Producto (el borrado cae en
+cascada). Las cargas que no pasan por `save()` (`bulk_create`, SQL directo)
+deben llamar a `indexar()`; `manage.py indexar_productos` reconstruye todo.
+"""
+
+import difflib
+import re
+import unicodedata
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+
+from .models import Producto, TerminoProducto
+
+CODIGO = 8
+NOMBRE = 3
+DESCRIPCION = 1
+
+CANDIDATOS = 1000  # filas del índice leídas por término
+MAX_TERMINOS = 5  # términos de la consulta que se consideran
+LOTE = 2000  # productos por bloque al reindexar
+
+_LARGO = TerminoProducto._meta.get_field('termino').max_length
+_CAMPOS = ('codigo', 'nombre', 'descripcion')
+_PALABRA = re.compile(r'[a-z0-9]+')
+_DATOS = ('id', 'codigo', 'nombre', 'precio_venta', 'cantidad_en_inventario', 'activo')
+
+
+def normalizar(texto: str) -> list[str]:
+    """Términos de `texto`: minúsculas, sin acentos, separados por lo que no sea letra o dígito."""
+    plano = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode().lower()
+    return [t[:_LARGO] for t in _PALABRA.findall(plano)]
+
+
+def terminos_producto(codigo: str, nombre: str, descripcion: str) -> dict[str, int]:
+    """{termino: peso} de un producto; si un término sale de varios campos gana el mayor peso."""
+    terminos = {}
+    partes = normalizar(codigo)
+    # El código también completo sin separadores: "AB-12/3" -> "ab123"
+    compacto = ''.join(partes)[:_LARGO]
+    for peso, lista in ((DESCRIPCION, normalizar(descripcion)), (NOMBRE, normalizar(nombre)),
+                        (CODIGO, [*partes, compacto])):
+        for t in lista:
+            # Se omiten letras sueltas de nombre/descripción ("a", "y")
+            if t and (peso == CODIGO or len(t) > 1 or t.isdigit()):
+                terminos[t] = max(peso, terminos.get(t, 0))
+    return terminos
+
+
+def _insertar(filas):
+    """Inserta `(termino, producto_id, peso)` con `executemany` (sin instanciar modelos)."""
+    opts = TerminoProducto._meta
+    columnas = ', '.join(connection.ops.quote_name(opts.get_field(c).column) for c in ('termino', 'producto', 'peso'))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {connection.ops.quote_name(opts.db_table)} ({columnas}) VALUES (%s, %s, %s)', filas,
+        )
+
+
+def indexar(productos=None):
+    """Reconstruye los términos de `productos` (queryset; todos por defecto).
+
+    Devuelve el número de productos indexados. Trabaja por bloques de
+    `LOTE` productos, una transacción por bloque.
+    """
+    qs = (Producto.objects.all() if productos is None else productos).order_by('pk')
+    total = 0
+    ultimo = None
+    while True:
+        bloque = qs.filter(pk__gt=ultimo) if ultimo is not None else qs
+        filas = list(bloque.values_list('pk', *_CAMPOS)[:LOTE])
+        if not filas:
+            return total
+        with transaction.atomic():
+            ids = [f[0] for f in filas]
+            TerminoProducto.objects.filter(producto_id__in=ids).delete()
+            _insertar([(t, pid, peso) for pid, *campos in filas for t, peso in terminos_producto(*campos).items()])
+        total += len(filas)
+        ultimo = ids[-1]
+
+
+def _producto_guardado(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and not set(update_fields) & set(_CAMPOS)):
+        return
+    with transaction.atomic():
+        if not created:
+            TerminoProducto.objects.filter(producto_id=instance.pk).delete()
+        TerminoProducto.objects.bulk_create([
+            TerminoProducto(termino=t, producto_id=instance.pk, peso=peso)
+            for t, peso in terminos_producto(instance.codigo, instance.nombre, instance.descripcion).items()
+        ])
+
+
+post_save.connect(_producto_guardado, sender=Producto, dispatch_uid='busqueda_producto')
+
+
+def _rango(t: str) -> Q:
+    # Prefijo como rango del índice; todos los términos son [a-z0-9]
+    return Q(termino__gte=t, termino__lt=t[:-1] + chr(ord(t[-1]) + 1))
+
+
+def _candidatos(condicion, productos=None) -> tuple[list, bool]:
+    """Filas `(termino, producto_id, peso)` que cumplen `condicion` y si se truncaron."""
+    qs = TerminoProducto.objects.filter(condicion)
+    if productos is not None:
+        qs = qs.filter(producto_id__in=productos)
+    filas = list(qs.order_by('termino', 'producto_id').values_list('termino', 'producto_id', 'peso')[:CANDIDATOS])
+    return filas, len(filas) == CANDIDATOS
+
+
+def _puntuar(filas, exactos) -> dict[int, int]:
+    puntos = {}
+    for termino, pid, peso in filas:
+        valor = peso * 2 if termino in exactos else peso
+        if valor > puntos.get(pid, 0):
+            puntos[pid] = valor
+    return puntos
+
+
+def _corregir(t: str) -> list[str]:
+    """Términos del índice parecidos a `t` (errores de tecleo)."""
+    if len(t) < 4:
+        return []
+    vecinos = list(
+        TerminoProducto.objects.filter(_rango(t[:2])).order_by('termino')
+        .values_list('termino', flat=True).distinct()[:CANDIDATOS * 5]
+    )
+    return difflib.get_close_matches(t, vecinos, n=3, cutoff=0.75)
+
+
+def _coincidencias(condiciones, exactos) -> dict[int, int]:
+    """Productos que cumplen todas las `condiciones` con la suma de sus puntos."""
+    leidos = [_candidatos(c) for c in condiciones]
+    guia = min(range(len(leidos)), key=lambda i: len(leidos[i][0]))
+    puntos = _puntuar(leidos[guia][0], exactos[guia])
+    for i, (filas, truncado) in enumerate(leidos):
+        if i == guia or not puntos:
+            continue
+        if truncado:
+            # Faltan filas de este término: se relee restringido a los candidatos
+            filas, _ = _candidatos(condiciones[i], productos=list(puntos))
+        otros = _puntuar(filas, exactos[i])
+        puntos = {pid: p + otros[pid] for pid, p in puntos.items() if pid in otros}
+    return puntos
+
+
+def buscar(texto: str, limite: int = 10, activos: bool = False) -> tuple[list[dict], dict]:
+    """Mejores `limite` productos para `texto`.
+
+    Devuelve `(resultados, correcciones)`; `resultados` son dicts con los
+    datos del producto y `puntos`, ordenados por relevancia (a igualdad de
+    puntos, por id); `correcciones` es {termino: [términos usados]} cuando
+    hubo que corregir la consulta.
+    """
+    terminos = list(dict.fromkeys(normalizar(texto)))[:MAX_TERMINOS]
+    if not terminos:
+        return [], {}
+    puntos = _coincidencias([_rango(t) for t in terminos], [{t} for t in terminos])
+    correcciones = {}
+    if not puntos:
+        condiciones, exactos = [], []
+        for t in terminos:
+            if TerminoProducto.objects.filter(_rango(t)).exists():
+                condiciones.append(_rango(t))
+                exactos.append({t})
+                continue
+            alternativas = _corregir(t)
+            if not alternativas:
+                return [], {}
+            correcciones[t] = alternativas
+            condiciones.append(Q(termino__in=alternativas))
+            # Un término corregido nunca cuenta como exacto
+            exactos.append(set())
+        puntos = _coincidencias(condiciones, exactos)
+
+    orden = sorted(puntos, key=lambda pid: (-puntos[pid], pid))
+    resultados = []
+    for i in range(0, len(orden), limite * 2):
+        bloque = orden[i:i + limite * 2]
+        qs = Producto.objects.filter(pk__in=bloque)
+        if activos:
+            qs = qs.filter(activo=True)
+        productos = {p['id']: p for p in qs.values(*_DATOS)}
+        resultados += [{**productos[pid], 'puntos': puntos[pid]} for pid in bloque if pid in productos]
+        if len(resultados) >= limite:
+            break
+    return resultados[:limite], correcciones
@@ -0,0 +1,208 @@
+"""Conciliación de conteos físicos: ajusta el stock y deja el rastro en movimientos.
+
+La hoja de conteo (CSV/JSONL, ver `lectura`) trae por fila el producto
+(`codigo` o `producto_id`) y la `cantidad` contada; si un producto aparece
+en varias filas (varias ubicaciones) se suman. Los productos que no están
+en la hoja no se tocan.
+
+Todo ocurre en una transacción:
+
+- Por bloques de `LOTE` productos, una consulta bloquea las filas
+  (`select_for_update`, en orden de id) y trae el stock actual; la
+  diferencia contra lo contado se calcula en memoria
+- El stock se ajusta con `stock.aplicar_deltas` (UPDATE por bloque sobre
+  `F()`, no una escritura por producto)
+- Por cada diferencia se crea un MovimientoInventario ENTRADA o SALIDA con
+  `bulk_create` y al final se envía `movimientos_aplicados`
+
+Con `simular=True` se calcula el mismo resultado sin bloquear ni escribir.
+Las filas inválidas (producto desconocido, cantidad no entera o negativa)
+se reportan y no impiden ajustar las demás.
+"""
+
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from .lectura import leer
+from .models import MovimientoInventario, Producto
+from .signals import movimientos_aplicados
+from .stock import aplicar_deltas
+
+LOTE = 2000
+MAX_ERRORES = 1000
+COLUMNAS = (('codigo', 'producto_id'), 'cantidad')
+NOTA = 'Ajuste por conteo físico'
+_LARGO_REFERENCIA = MovimientoInventario._meta.get_field('referencia').max_length
+
+
+@dataclass(frozen=True)
+class Diferencia:
+    producto_id: int
+    codigo: str
+    sistema: int
+    contado: int
+
+    @property
+    def diferencia(self) -> int:
+        return self.contado - self.sistema
+
+    def as_json(self) -> dict:
+        return {
+            'producto_id': self.producto_id, 'codigo': self.codigo,
+            'sistema': self.sistema, 'contado': self.contado, 'diferencia': self.diferencia,
+        }
+
+
+@dataclass
+class Conciliacion:
+    referencia: str
+    simulado: bool
+    contados: int = 0  # productos distintos en la hoja
+    diferencias: list = field(default_factory=list)
+    errores_total: int = 0
+    errores: list = field(default_factory=list)  # (línea, mensaje), hasta MAX_ERRORES
+
+    def error(self, linea: int, mensaje: str):
+        self.errores_total += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append((linea, mensaje))
+
+    def unidades(self, signo: int) -> int:
+        return sum(abs(d.diferencia) for d in self.diferencias if d.diferencia * signo > 0)
+
+    def as_json(self) -> dict:
+        return {
+            'referencia': self.referencia,
+            'simulado': self.simulado,
+            'contados': self.contados,
+            'sin_cambio': self.contados - len(self.diferencias),
+            'entradas': self.unidades(1),
+            'salidas': self.unidades(-1),
+            'diferencias': [d.as_json() for d in self.diferencias],
+            'errores_total': self.errores_total,
+            'errores': [{'linea': linea, 'error': mensaje} for linea, mensaje in self.errores],
+        }
+
+
+def leer_conteo(lineas, formato: str):
+    """Filas de la hoja de conteo (ver `lectura.leer`)."""
+    return leer(lineas, formato, COLUMNAS)
+
+
+def _clave(datos):
+    """('id', n) o ('codigo', texto); lanza ValueError."""
+    if str(datos.get('producto_id') or '').strip():
+        try:
+            return 'id', int(datos['producto_id'])
+        except (TypeError, ValueError):
+            raise ValueError('producto_id inválido') from None
+    codigo = str(datos.get('codigo') or '').strip()
+    if not codigo:
+        raise ValueError('falta codigo o producto_id')
+    return 'codigo', codigo
+
+
+def _cantidad(valor) -> int:
+    try:
+        cantidad = int(str(valor).strip())
+    except (TypeError, ValueError):
+        raise ValueError('cantidad inválida') from None
+    if cantidad < 0:
+        raise ValueError('cantidad negativa')
+    return cantidad
+
+
+def _hoja(filas, conciliacion: Conciliacion) -> dict:
+    """{clave: (primera línea, cantidad total)} de las filas válidas."""
+    contado = {}
+    for linea, datos, error in filas:
+        if error:
+            conciliacion.error(linea, error)
+            continue
+        try:
+            clave, cantidad = _clave(datos), _cantidad(datos.get('cantidad'))
+        except ValueError as e:
+            conciliacion.error(linea, str(e))
+            continue
+        primera, total = contado.get(clave, (linea, 0))
+        contado[clave] = (primera, total + cantidad)
+    return contado
+
+
+def _bloque(claves, bloquear: bool):
+    """Productos de `claves` con su stock: {clave: (id, codigo, stock)}; una consulta."""
+    ids = [v for tipo, v in claves if tipo == 'id']
+    codigos = [v for tipo, v in claves if tipo == 'codigo']
+    qs = Producto.objects.filter(pk__in=ids) | Producto.objects.filter(codigo__in=codigos)
+    if bloquear:
+        qs = qs.select_for_update()
+    encontrados = {}
+    for pid, codigo, stock in qs.order_by('pk').values_list('pk', 'codigo', 'cantidad_en_inventario'):
+        encontrados['id', pid] = encontrados['codigo', codigo] = (pid, codigo, stock)
+    return encontrados
+
+
+def _referencia_por_defecto() -> str:
+    return f'CONTEO-{timezone.localdate():%Y%m%d}'
+
+
+def conciliar(filas, simular: bool = False, referencia: str = '', nota: str = NOTA) -> Conciliacion:
+    """Ajusta el stock a lo contado en `filas` (de `leer_conteo`).
+
+    Devuelve la `Conciliacion` con las diferencias aplicadas (o que se
+    aplicarían, si `simular`). Lanza ValueError si la referencia es muy
+    larga y ValidationError si el stock cambió entre la lectura y el
+    ajuste (solo posible en motores sin `select_for_update`); en ese caso
+    no se aplica nada.
+    """
+    referencia = referencia or _referencia_por_defecto()
+    if len(referencia) > _LARGO_REFERENCIA:
+        raise ValueError(f'referencia excede {_LARGO_REFERENCIA} caracteres')
+    conciliacion = Conciliacion(referencia=referencia, simulado=simular)
+    contado = _hoja(filas, conciliacion)
+    with transaction.atomic():
+        vistos = {}  # producto_id -> [codigo, stock, contado]; dos claves pueden ser el mismo producto
+        claves = list(contado)
+        for i in range(0, len(claves), LOTE):
+            bloque = claves[i:i + LOTE]
+            encontrados = _bloque(bloque, bloquear=not simular)
+            for clave in bloque:
+                linea, cantidad = contado[clave]
+                if clave not in encontrados:
+                    conciliacion.error(linea, f'producto desconocido: {clave[1]}')
+                    continue
+                pid, codigo, stock = encontrados[clave]
+                vistos.setdefault(pid, [codigo, stock, 0])[2] += cantidad
+        conciliacion.contados = len(vistos)
+        conciliacion.diferencias = [
+            Diferencia(pid, codigo, stock, total)
+            for pid, (codigo, stock, total) in sorted(vistos.items()) if total != stock
+        ]
+        if not simular and conciliacion.diferencias:
+            _aplicar(conciliacion, nota)
+    conciliacion.errores.sort()
+    return conciliacion
+
+
+def _aplicar(conciliacion: Conciliacion, nota: str):
+    diferencias = conciliacion.diferencias
+    aplicar_deltas({d.producto_id: d.diferencia for d in diferencias})
+    MovimientoInventario.objects.bulk_create(
+        [
+            MovimientoInventario(
+                tipo=MovimientoInventario.ENTRADA if d.diferencia > 0 else MovimientoInventario.SALIDA,
+                producto_id=d.producto_id,
+                cantidad=abs(d.diferencia),
+                referencia=conciliacion.referencia,
+                nota=nota,
+            )
+            for d in diferencias
+        ],
+        batch_size=LOTE,
+    )
+    for tipo, signo in ((MovimientoInventario.ENTRADA, 1), (MovimientoInventario.SALIDA, -1)):
+        ids = [d.producto_id for d in diferencias if d.diferencia * signo > 0]
+        if ids:
+            movimientos_aplicados.send(sender=MovimientoInventario, tipo=tipo, producto_ids=ids)
@@ -0,0 +1,136 @@
+"""Existencias de inventario a una fecha (consultas point-in-time).
+
+`MovimientoInventario` es la única historia del stock; reconstruir una fecha
+pasada sumando todos los movimientos cuesta O(historia). Con cortes
+periódicos (CorteInventario) se parte de la foto más cercana a la fecha
+pedida y se aplican solo los movimientos intermedios:
+
+- hacia adelante desde el último corte anterior o igual a la fecha
+- hacia atrás desde el primer corte posterior, o desde el stock actual
+
+Una fecha `D` significa "al cierre de D" en hora local: incluye los
+movimientos con fecha anterior a las 00:00 de D+1.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Sum, When
+from django.utils import timezone
+
+from .models import CorteInventario, MovimientoInventario, Producto
+
+LOTE = 2000
+
+
+@dataclass(frozen=True)
+class Existencias:
+    """Resultado de `existencias_al`; `origen` indica la foto usada como base."""
+    fecha: date
+    origen: str
+    cantidades: dict = field(default_factory=dict)
+    precios: dict = field(default_factory=dict)
+
+    def valor(self, producto_id) -> Decimal:
+        return self.cantidades.get(producto_id, 0) * self.precios.get(producto_id, Decimal('0.00'))
+
+    @property
+    def valor_total(self) -> Decimal:
+        return sum((self.valor(pid) for pid in self.cantidades), Decimal('0.00'))
+
+
+def cierre(fecha: date) -> datetime:
+    """Instante de cierre de `fecha`: 00:00 local del día siguiente."""
+    return timezone.make_aware(datetime.combine(fecha + timedelta(days=1), time.min))
+
+
+def _netos(productos, desde=None, hasta=None) -> dict:
+    """Entradas menos salidas por producto con `desde <= fecha < hasta`."""
+    qs = MovimientoInventario.objects.filter(producto__in=productos)
+    if desde:
+        qs = qs.filter(fecha__gte=desde)
+    if hasta:
+        qs = qs.filter(fecha__lt=hasta)
+    signo = Case(
+        When(tipo=MovimientoInventario.ENTRADA, then=F('cantidad')),
+        default=-F('cantidad'),
+        output_field=IntegerField(),
+    )
+    return dict(qs.order_by().values('producto_id').annotate(neto=Sum(signo)).values_list('producto_id', 'neto'))
+
+
+def existencias_al(fecha: date, productos=None) -> Existencias:
+    """Existencias al cierre de `fecha` de `productos` (queryset; todos por defecto)."""
+    productos = Producto.objects.all() if productos is None else productos
+    hoy = timezone.localdate()
+    if fecha >= hoy:
+        actuales = productos.values_list('id', 'cantidad_en_inventario', 'precio_compra')
+        return Existencias(
+            fecha, 'actual', {pid: cant for pid, cant, _ in actuales}, {pid: precio for pid, _, precio in actuales},
+        )
+
+    anterior = CorteInventario.objects.filter(fecha__lte=fecha).order_by('-fecha').values_list('fecha', flat=True).first()
+    posterior = CorteInventario.objects.filter(fecha__gt=fecha).order_by('fecha').values_list('fecha', flat=True).first()
+    distancia_atras = (posterior or hoy) - fecha
+    ids = productos.order_by().values('id')
+
+    if anterior and fecha - anterior <= distancia_atras:
+        base = _corte(anterior, ids)
+        netos = _netos(ids, desde=cierre(anterior), hasta=cierre(fecha))
+        signo, origen = 1, f'corte:{anterior.isoformat()}'
+    elif posterior:
+        base = _corte(posterior, ids)
+        netos = _netos(ids, desde=cierre(fecha), hasta=cierre(posterior))
+        signo, origen = -1, f'corte:{posterior.isoformat()}'
+    else:
+        base = {pid: (cant, precio) for pid, cant, precio in
+                productos.values_list('id', 'cantidad_en_inventario', 'precio_compra')}
+        netos = _netos(ids, desde=cierre(fecha))
+        signo, origen = -1, 'actual'
+
+    # Productos sin fila en el corte (creados después) parten de 0
+    faltantes = set(netos) - set(base)
+    if faltantes:
+        base.update((pid, (0, precio)) for pid, precio in
+                    Producto.objects.filter(pk__in=faltantes).values_list('id', 'precio_compra'))
+    cantidades = {pid: cant + signo * netos.get(pid, 0) for pid, (cant, _) in base.items()}
+    precios = {pid: precio for pid, (_, precio) in base.items()}
+    return Existencias(fecha, origen, cantidades, precios)
+
+
+def _corte(fecha, ids) -> dict:
+    filas = CorteInventario.objects.filter(fecha=fecha, producto__in=ids)
+    return {pid: (cant, precio) for pid, cant, precio in filas.values_list('producto_id', 'cantidad', 'precio_compra')}
+
+
+def tomar_corte(fecha: date | None = None) -> int:
+    """Guarda (o reemplaza) el corte al cierre de `fecha` para todos los productos.
+
+    Parte del stock actual y descuenta los movimientos posteriores al cierre,
+    así que puede correrse después de la fecha (p. ej. un cron a las 00:05).
+    """
+    fecha = fecha or timezone.localdate()
+    # MySQL hace el upsert con ON DUPLICATE KEY (sobre `corte_inventario_unico`) y no admite indicar la clave
+    opciones = {'update_conflicts': True, 'update_fields': ['cantidad', 'precio_compra']}
+    if connection.features.supports_update_conflicts_with_target:
+        opciones['unique_fields'] = ['fecha', 'producto']
+    # Una sola transacción: stock y movimientos se leen del mismo estado
+    with transaction.atomic():
+        netos = _netos(Producto.objects.order_by().values('id'), desde=cierre(fecha))
+        productos = Producto.objects.order_by('id').values_list('id', 'cantidad_en_inventario', 'precio_compra')
+        n, ultimo = 0, 0
+        while True:
+            lote = list(productos.filter(id__gt=ultimo)[:LOTE])
+            if not lote:
+                return n
+            CorteInventario.objects.bulk_create(
+                [
+                    CorteInventario(fecha=fecha, producto_id=pid, cantidad=cant - netos.get(pid, 0), precio_compra=precio)
+                    for pid, cant, precio in lote
+                ],
+                **opciones,
+            )
+            n += len(lote)
+            ultimo = lote[-1][0]
@@ -0,0 +1,240 @@
+"""Importación masiva del catálogo de productos (CSV o JSONL) con upsert por `codigo`.
+
+Las filas se leen en streaming (archivo, cuerpo de la petición) y se
+procesan por bloques de `LOTE`:
+
+- Se validan y convierten todas las filas del bloque; una fila inválida se
+  reporta con su número de línea y no detiene la importación
+- Proveedores y categorías (por nombre o por id) se resuelven con una sola
+  consulta por bloque para cada uno
+- Los productos se escriben con un único `bulk_create(update_conflicts=True)`
+  por bloque (INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE): los códigos
+  nuevos se crean y los existentes se actualizan, sin una consulta por fila
+- El índice de búsqueda de los productos nuevos o con otro nombre o
+  descripción se reconstruye en la misma transacción
+
+La fila reemplaza los datos de catálogo del producto existente (nombre,
+descripción, precios, proveedor, categoría, activo); `stock` solo se usa
+al crear: las existencias de un producto existente no se tocan (ver
+conteos físicos para ajustarlas).
+
+Columnas: codigo, nombre, precio_venta, precio_compra, proveedor (empresa)
+o proveedor_id, categoria (nombre) o categoria_id; opcionales descripcion,
+stock (0) y activo (sí).
+
+Como `bulk_create` no dispara `post_save`, al final se invalida el mapa de
+precios y se envía `productos_importados`.
+"""
+
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, connection, transaction
+
+from .busqueda import indexar
+from .lectura import leer
+from .models import CategoriaProducto, Producto, Proveedor
+from .precios import invalidar_precios
+from .signals import productos_importados
+
+LOTE = 2000
+MAX_ERRORES = 1000  # errores detallados que se conservan (el total se cuenta siempre)
+
+OBLIGATORIOS = ('codigo', 'nombre', 'precio_venta', 'precio_compra')
+COLUMNAS = (*OBLIGATORIOS, ('proveedor', 'proveedor_id'), ('categoria', 'categoria_id'))
+# Campos que se actualizan si el código ya existe
+_ACTUALIZABLES = [
+    'nombre', 'descripcion', 'precio_venta', 'precio_compra', 'proveedor', 'categoria', 'activo', 'actualizado',
+]
+_VERDADERO = {'1', 'true', 'si', 'sí', 's', 'yes', 'y', 'x'}
+_FALSO = {'0', 'false', 'no', 'n'}
+_CENTAVO = Decimal('0.01')
+_MAX_PRECIO = Decimal(10) ** (
+    Producto._meta.get_field('precio_venta').max_digits - Producto._meta.get_field('precio_venta').decimal_places
+)
+_LARGOS = {nombre: Producto._meta.get_field(nombre).max_length for nombre in ('codigo', 'nombre')}
+
+
+@dataclass
+class Resultado:
+    creados: int = 0
+    actualizados: int = 0
+    errores_total: int = 0
+    errores: list = field(default_factory=list)  # (línea, mensaje), hasta MAX_ERRORES
+
+    def error(self, linea: int, mensaje: str):
+        self.errores_total += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append((linea, mensaje))
+
+    def as_json(self) -> dict:
+        return {
+            'creados': self.creados,
+            'actualizados': self.actualizados,
+            'errores_total': self.errores_total,
+            'errores': [{'linea': linea, 'error': mensaje} for linea, mensaje in self.errores],
+        }
+
+
+def leer_catalogo(lineas, formato: str):
+    """Filas del catálogo (ver `lectura.leer`); valida el encabezado del CSV."""
+    return leer(lineas, formato, COLUMNAS)
+
+
+def _precio(valor, nombre):
+    try:
+        precio = Decimal(str(valor).strip()).quantize(_CENTAVO)
+    except (InvalidOperation, ValueError):
+        raise ValueError(f'{nombre} inválido') from None
+    if not 0 <= precio < _MAX_PRECIO:
+        raise ValueError(f'{nombre} fuera de rango')
+    return precio
+
+
+def _booleano(valor) -> bool:
+    if isinstance(valor, bool) or valor is None:
+        return valor is not False
+    texto = str(valor).strip().lower()
+    if texto in _VERDADERO or not texto:  # vacío = valor por defecto
+        return True
+    if texto in _FALSO:
+        return False
+    raise ValueError('activo inválido')
+
+
+def _vacio(valor) -> bool:
+    return valor is None or (isinstance(valor, str) and not valor.strip())
+
+
+def _referencia(datos, nombre):
+    """('id', n) o ('nombre', texto) del proveedor/categoría de la fila."""
+    if not _vacio(datos.get(f'{nombre}_id')):
+        try:
+            return 'id', int(datos[f'{nombre}_id'])
+        except (TypeError, ValueError):
+            raise ValueError(f'{nombre}_id inválido') from None
+    if _vacio(datos.get(nombre)):
+        raise ValueError(f'falta {nombre}')
+    return 'nombre', str(datos[nombre]).strip()
+
+
+def _convertir(datos) -> dict:
+    """Valores de la fila validados; lanza ValueError con el mensaje para el reporte."""
+    for nombre in OBLIGATORIOS:
+        if _vacio(datos.get(nombre)):
+            raise ValueError(f'falta {nombre}')
+    fila = {nombre: str(datos[nombre]).strip() for nombre in ('codigo', 'nombre')}
+    for nombre, largo in _LARGOS.items():
+        if len(fila[nombre]) > largo:
+            raise ValueError(f'{nombre} excede {largo} caracteres')
+    fila['descripcion'] = '' if _vacio(datos.get('descripcion')) else str(datos['descripcion'])
+    fila['precio_venta'] = _precio(datos['precio_venta'], 'precio_venta')
+    fila['precio_compra'] = _precio(datos['precio_compra'], 'precio_compra')
+    try:
+        fila['stock'] = 0 if _vacio(datos.get('stock')) else int(datos['stock'])
+    except (TypeError, ValueError):
+        raise ValueError('stock inválido') from None
+    fila['activo'] = _booleano(datos.get('activo'))
+    fila['proveedor'] = _referencia(datos, 'proveedor')
+    fila['categoria'] = _referencia(datos, 'categoria')
+    return fila
+
+
+def _resolver(modelo, campo: str, referencias) -> dict:
+    """{('id'|'nombre', valor): id | None si es ambiguo}; una consulta.
+
+    Los nombres que no existen no aparecen en el resultado.
+    """
+    ids = {valor for tipo, valor in referencias if tipo == 'id'}
+    nombres = {valor for tipo, valor in referencias if tipo == 'nombre'}
+    resueltos = {}
+    filas = modelo.objects.filter(**{f'{campo}__in': nombres}) | modelo.objects.filter(pk__in=ids)
+    for pk, nombre in filas.values_list('pk', campo):
+        if pk in ids:
+            resueltos['id', pk] = pk
+        if nombre in nombres:
+            # Dos proveedores con la misma empresa: el nombre no alcanza
+            resueltos['nombre', nombre] = None if ('nombre', nombre) in resueltos else pk
+    return resueltos
+
+
+def _no_resuelto(nombre: str, referencia, resueltos: dict) -> str:
+    return f'{nombre} {"ambiguo" if referencia in resueltos else "desconocido"}: {referencia[1]}'
+
+
+def _escribir(productos):
+    opciones = {'update_conflicts': True, 'update_fields': _ACTUALIZABLES}
+    if connection.features.supports_update_conflicts_with_target:
+        opciones['unique_fields'] = ['codigo']
+    Producto.objects.bulk_create(productos, batch_size=LOTE, **opciones)
+
+
+def _procesar(bloque, resultado: Resultado):
+    filas = {}  # codigo -> (línea, valores); el último del bloque gana
+    for linea, datos in bloque:
+        try:
+            valores = _convertir(datos)
+        except ValueError as e:
+            resultado.error(linea, str(e))
+            continue
+        filas[valores['codigo']] = (linea, valores)
+    if not filas:
+        return
+    proveedores = _resolver(Proveedor, 'empresa', {v['proveedor'] for _, v in filas.values()})
+    categorias = _resolver(CategoriaProducto, 'nombre', {v['categoria'] for _, v in filas.values()})
+    productos = []
+    for codigo, (linea, v) in list(filas.items()):
+        proveedor_id, categoria_id = proveedores.get(v['proveedor']), categorias.get(v['categoria'])
+        if proveedor_id is None or categoria_id is None:
+            if proveedor_id is None:
+                resultado.error(linea, _no_resuelto('proveedor', v['proveedor'], proveedores))
+            else:
+                resultado.error(linea, _no_resuelto('categoria', v['categoria'], categorias))
+            del filas[codigo]
+            continue
+        productos.append(Producto(
+            codigo=codigo, nombre=v['nombre'], descripcion=v['descripcion'],
+            precio_venta=v['precio_venta'], precio_compra=v['precio_compra'],
+            cantidad_en_inventario=v['stock'], activo=v['activo'],
+            proveedor_id=proveedor_id, categoria_id=categoria_id,
+        ))
+    if not productos:
+        return
+    try:
+        with transaction.atomic():
+            existentes = {
+                codigo: (nombre, descripcion) for codigo, nombre, descripcion in
+                Producto.objects.filter(codigo__in=list(filas)).values_list('codigo', 'nombre', 'descripcion')
+            }
+            _escribir(productos)
+            # Solo cambia el índice de los productos nuevos o con otro nombre/descripción
+            reindexar = [p.codigo for p in productos if existentes.get(p.codigo) != (p.nombre, p.descripcion)]
+            if reindexar:
+                indexar(Producto.objects.filter(codigo__in=reindexar))
+    except DatabaseError as e:
+        for linea, _ in filas.values():
+            resultado.error(linea, f'error al guardar el bloque: {e}')
+        return
+    resultado.actualizados += len(existentes)
+    resultado.creados += len(productos) - len(existentes)
+
+
+def importar(filas, lote: int = LOTE) -> Resultado:
+    """Importa `filas` (de `leer_catalogo`); cada bloque de `lote` filas se confirma por separado."""
+    resultado = Resultado()
+    bloque = []
+    for linea, datos, error in filas:
+        if error:
+            resultado.error(linea, error)
+            continue
+        bloque.append((linea, datos))
+        if len(bloque) >= lote:
+            _procesar(bloque, resultado)
+            bloque = []
+    if bloque:
+        _procesar(bloque, resultado)
+    resultado.errores.sort()
+    if resultado.creados or resultado.actualizados:
+        transaction.on_commit(invalidar_precios)
+        productos_importados.send(sender=Producto, creados=resultado.creados, actualizados=resultado.actualizados)
+    return resultado
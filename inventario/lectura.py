@@ -0,0 +1,82 @@
+"""Lectura en streaming de archivos CSV/JSONL (importación de catálogo, conteos físicos).
+
+`leer(lineas, formato, columnas)` recibe cualquier iterable de líneas
+(archivo abierto en binario, `request`, `UploadedFile`, stdin) y devuelve
+un generador de `(línea, datos, error)`: `datos` es un dict por fila o
+None si la fila no se pudo leer, con el mensaje en `error`. Las filas se
+leen de a una, así que el archivo nunca se carga completo en memoria.
+
+`columnas` son las columnas requeridas en el encabezado del CSV; cada una
+es un nombre o una tupla de alternativas (`('proveedor', 'proveedor_id')`).
+Si falta alguna se lanza `ErrorArchivo` al empezar a iterar.
+"""
+
+import codecs
+import csv
+import json
+
+FORMATOS = ('csv', 'jsonl')
+
+
+class ErrorArchivo(ValueError):
+    """El archivo no se puede procesar (formato o columnas)."""
+
+
+def _cadena(inicio, resto):
+    yield from inicio
+    yield from resto
+
+
+def _texto(lineas):
+    """Decodifica líneas en bytes (UTF-8, con o sin BOM); deja pasar las que ya son str."""
+    lineas = iter(lineas)
+    primera = next(lineas, None)
+    if primera is None:
+        return iter(())
+    if isinstance(primera, str):
+        return _cadena([primera], lineas)
+    return codecs.iterdecode(_cadena([primera], lineas), 'utf-8-sig', errors='replace')
+
+
+def filas_csv(lineas, columnas=()):
+    """(línea, datos, error) de un CSV con encabezado."""
+    lector = csv.DictReader(_texto(lineas))
+    encabezado = set(lector.fieldnames or ())
+    faltan = []
+    for requerida in columnas:
+        alternativas = (requerida,) if isinstance(requerida, str) else requerida
+        if not encabezado.intersection(alternativas):
+            faltan.append(alternativas[0])
+    if faltan:
+        raise ErrorArchivo(f'faltan columnas: {", ".join(faltan)}')
+    while True:
+        try:
+            datos = next(lector)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield lector.line_num, None, f'CSV inválido: {e}'
+            continue
+        yield lector.line_num, datos, None
+
+
+def filas_jsonl(lineas):
+    """(línea, datos, error) de un archivo con un objeto JSON por línea."""
+    for numero, linea in enumerate(_texto(lineas), start=1):
+        if not linea.strip():
+            continue
+        try:
+            datos = json.loads(linea)
+        except json.JSONDecodeError as e:
+            yield numero, None, f'JSON inválido: {e.msg}'
+            continue
+        if not isinstance(datos, dict):
+            yield numero, None, 'cada línea debe ser un objeto'
+            continue
+        yield numero, datos, None
+
+
+def leer(lineas, formato: str, columnas=()):
+    if formato not in FORMATOS:
+        raise ErrorArchivo(f'formato debe ser {" o ".join(FORMATOS)}')
+    return filas_csv(lineas, columnas) if formato == 'csv' else filas_jsonl(lineas)
@@ -0,0 +1,65 @@
+"""Prueba de concurrencia de la numeración de documentos.
+
+Varios hilos (cada uno con su conexión) piden números del mismo prefijo y se
+verifica que no haya duplicados; reporta números por segundo. La secuencia
+de prueba se borra al terminar.
+
+Uso:
+    python manage.py benchmark_numeracion --hilos 8 --por-hilo 500
+"""
+
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from inventario import secuencias
+from inventario.models import SecuenciaDocumento
+
+
+class Command(BaseCommand):
+    help = 'Pide números en paralelo desde varios hilos y verifica que no se repitan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--por-hilo', type=int, default=200)
+        parser.add_argument('--prefijo', default='BENCH-')
+
+    def handle(self, *args, **opts):
+        prefijo = opts['prefijo']
+        if SecuenciaDocumento.objects.filter(prefijo=prefijo).exists():
+            raise CommandError(f'La secuencia {prefijo} ya existe; usa otro --prefijo')
+        resultados = [[] for _ in range(opts['hilos'])]
+        errores = []
+
+        def trabajar(destino):
+            try:
+                for _ in range(opts['por_hilo']):
+                    destino.append(secuencias.siguiente_numero(prefijo))
+            except Exception as e:  # se reporta al final
+                errores.append(e)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=trabajar, args=(r,)) for r in resultados]
+        t0 = time.perf_counter()
+        for h in hilos:
+            h.start()
+        for h in hilos:
+            h.join()
+        segundos = time.perf_counter() - t0
+
+        numeros = [n for r in resultados for n in r]
+        duplicados = len(numeros) - len(set(numeros))
+        SecuenciaDocumento.objects.filter(prefijo=prefijo).delete()
+        secuencias.olvidar_bloques()
+
+        self.stdout.write(
+            f'{len(numeros)} números en {segundos:.2f}s ({len(numeros) / segundos:.0f}/s), '
+            f'{opts["hilos"]} hilos, duplicados: {duplicados}'
+        )
+        if errores:
+            raise CommandError(f'{len(errores)} hilos fallaron: {errores[0]!r}')
+        if duplicados:
+            raise CommandError('Se entregaron números duplicados')
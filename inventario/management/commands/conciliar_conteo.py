@@ -0,0 +1,56 @@
+"""Concilia una hoja de conteo físico contra el stock (ver `inventario.conteos`).
+
+Genera los movimientos de ajuste (ENTRADA/SALIDA) y deja el stock igual a
+lo contado, todo en una transacción. `--simular` solo muestra las
+diferencias.
+
+Uso:
+    python manage.py conciliar_conteo conteo.csv --simular
+    python manage.py conciliar_conteo conteo.csv --referencia CONTEO-BODEGA-1
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.conteos import conciliar, leer_conteo
+from inventario.lectura import FORMATOS
+
+
+class Command(BaseCommand):
+    help = 'Ajusta el stock a un conteo físico (CSV/JSONL con codigo|producto_id y cantidad).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo o '-' para leer de stdin.")
+        parser.add_argument('--formato', choices=FORMATOS, help='Por defecto según la extensión (.csv, .jsonl).')
+        parser.add_argument('--simular', action='store_true', help='Calcula las diferencias sin aplicarlas.')
+        parser.add_argument('--referencia', default='', help='Referencia de los movimientos (CONTEO-AAAAMMDD por defecto).')
+        parser.add_argument('--mostrar', type=int, default=20, help='Diferencias y errores a listar.')
+
+    def handle(self, *args, **opts):
+        formato = opts['formato'] or Path(opts['archivo']).suffix.lstrip('.').lower()
+        if formato not in FORMATOS:
+            raise CommandError('indica --formato csv|jsonl')
+        inicio = time.perf_counter()
+        try:
+            if opts['archivo'] == '-':
+                resultado = conciliar(leer_conteo(sys.stdin.buffer, formato), opts['simular'], opts['referencia'])
+            else:
+                with open(opts['archivo'], 'rb') as f:
+                    resultado = conciliar(leer_conteo(f, formato), opts['simular'], opts['referencia'])
+        except (OSError, ValueError, ValidationError) as e:
+            raise CommandError(str(e)) from e
+        for d in resultado.diferencias[:opts['mostrar']]:
+            self.stdout.write(f'{d.codigo}: {d.sistema} -> {d.contado} ({d.diferencia:+d})')
+        for linea, mensaje in resultado.errores[:opts['mostrar']]:
+            self.stderr.write(f'línea {linea}: {mensaje}')
+        resumen = resultado.as_json()
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Simulación: ' if resultado.simulado else ''}{resumen['contados']} productos contados, "
+            f"{len(resultado.diferencias)} con diferencia (+{resumen['entradas']} / -{resumen['salidas']} unidades), "
+            f"{resultado.errores_total} filas con error, referencia {resultado.referencia} "
+            f"en {time.perf_counter() - inicio:.1f}s"
+        ))
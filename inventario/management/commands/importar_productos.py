@@ -0,0 +1,55 @@
+"""Importa el catálogo de productos desde CSV o JSONL (upsert por `codigo`).
+
+Ver `inventario.importacion` para las columnas y reglas. El archivo se lee
+en streaming; cada bloque se confirma por separado y las filas con error
+se reportan al final sin detener la carga.
+
+Uso:
+    python manage.py importar_productos catalogo.csv
+    python manage.py importar_productos catalogo.jsonl --lote 5000
+    zcat catalogo.csv.gz | python manage.py importar_productos - --formato csv
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from inventario.importacion import LOTE, importar, leer_catalogo
+from inventario.lectura import FORMATOS, ErrorArchivo
+
+
+class Command(BaseCommand):
+    help = 'Importa productos desde CSV o JSONL (crea o actualiza por código).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del archivo o '-' para leer de stdin.")
+        parser.add_argument('--formato', choices=FORMATOS, help='Por defecto según la extensión (.csv, .jsonl).')
+        parser.add_argument('--lote', type=int, default=LOTE, help='Filas por bloque/transacción.')
+        parser.add_argument('--errores', type=int, default=20, help='Errores a mostrar (el total siempre se informa).')
+
+    def handle(self, *args, **opts):
+        formato = opts['formato'] or Path(opts['archivo']).suffix.lstrip('.').lower()
+        if formato == 'ndjson':
+            formato = 'jsonl'
+        if formato not in FORMATOS:
+            raise CommandError('indica --formato csv|jsonl')
+        inicio = time.perf_counter()
+        try:
+            if opts['archivo'] == '-':
+                resultado = importar(leer_catalogo(sys.stdin.buffer, formato), lote=opts['lote'])
+            else:
+                with open(opts['archivo'], 'rb') as f:
+                    resultado = importar(leer_catalogo(f, formato), lote=opts['lote'])
+        except (OSError, ErrorArchivo) as e:
+            raise CommandError(str(e)) from e
+        segundos = time.perf_counter() - inicio
+        filas = resultado.creados + resultado.actualizados
+        for linea, mensaje in resultado.errores[:opts['errores']]:
+            self.stderr.write(f'línea {linea}: {mensaje}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado.creados} creados, {resultado.actualizados} actualizados, '
+            f'{resultado.errores_total} con error en {segundos:.1f}s '
+            f'({filas / segundos * 60 if segundos else 0:,.0f} filas/min)'
+        ))
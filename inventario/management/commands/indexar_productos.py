@@ -0,0 +1,28 @@
+"""Reconstruye el índice de búsqueda de productos (TerminoProducto).
+
+Necesario tras cargas que no pasan por `Producto.save()` (SQL directo,
+`bulk_create`, restauraciones) o si cambian las reglas de normalización.
+
+Uso:
+    python manage.py indexar_productos
+    python manage.py indexar_productos --desde 5000   # solo productos con id >= 5000
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from inventario.busqueda import indexar
+from inventario.models import Producto
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de búsqueda de productos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=int, default=0, help='Primer id de producto a indexar.')
+
+    def handle(self, *args, **opts):
+        inicio = time.perf_counter()
+        n = indexar(Producto.objects.filter(pk__gte=opts['desde']))
+        self.stdout.write(self.style.SUCCESS(f'{n} productos indexados en {time.perf_counter() - inicio:.1f}s'))
@@ -0,0 +1,48 @@
+"""Guarda el corte de existencias por producto (CorteInventario).
+
+Pensado para cron: diario justo después de medianoche (corte del día
+anterior) o mensual (`--mensual`, solo actúa el último día del mes).
+
+Uso:
+    python manage.py tomar_corte_inventario                    # cierre de ayer
+    python manage.py tomar_corte_inventario --fecha 2024-01-31
+    python manage.py tomar_corte_inventario --conservar 90     # borra cortes diarios viejos
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from inventario.existencias import tomar_corte
+from inventario.models import CorteInventario
+
+
+class Command(BaseCommand):
+    help = 'Guarda las existencias de todos los productos al cierre de una fecha.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help='YYYY-MM-DD (por defecto ayer).')
+        parser.add_argument('--mensual', action='store_true', help='Solo si la fecha es fin de mes.')
+        parser.add_argument(
+            '--conservar', type=int, default=0,
+            help='Días de cortes diarios a conservar (los de fin de mes no se borran; 0 = todos).',
+        )
+
+    def handle(self, *args, **opts):
+        try:
+            fecha = date.fromisoformat(opts['fecha']) if opts['fecha'] else timezone.localdate() - timedelta(days=1)
+        except ValueError:
+            raise CommandError('--fecha debe tener formato YYYY-MM-DD')
+        if opts['mensual'] and (fecha + timedelta(days=1)).day != 1:
+            self.stdout.write(f'{fecha} no es fin de mes; nada que hacer')
+            return
+        n = tomar_corte(fecha)
+        self.stdout.write(f'Corte {fecha}: {n} productos')
+        if opts['conservar']:
+            limite = fecha - timedelta(days=opts['conservar'])
+            viejos = CorteInventario.objects.filter(fecha__lt=limite)
+            # Se conservan los cierres de mes (el día siguiente es día 1)
+            fines_de_mes = {d for d in viejos.values_list('fecha', flat=True).distinct() if (d + timedelta(days=1)).day == 1}
+            borrados, _ = viejos.exclude(fecha__in=fines_de_mes).delete()
+            self.stdout.write(f'{borrados} filas de cortes anteriores a {limite} borradas')
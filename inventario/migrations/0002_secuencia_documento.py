@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaDocumento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefijo', models.CharField(max_length=20, unique=True)),
+                ('siguiente', models.PositiveBigIntegerField(default=1)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0002_secuencia_documento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CorteInventario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('cantidad', models.IntegerField()),
+                ('precio_compra', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventario.producto')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='corteinventario',
+            constraint=models.UniqueConstraint(fields=('fecha', 'producto'), name='corte_inventario_unico'),
+        ),
+    ]
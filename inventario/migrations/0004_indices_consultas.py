@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0003_corte_inventario'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['producto', 'fecha'], name='movimiento_prod_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['tipo', 'fecha'], name='movimiento_tipo_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['fecha', 'id'], name='movimiento_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['referencia'], name='movimiento_referencia'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['cantidad_en_inventario', 'id'], name='producto_stock'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['activo', 'id'], name='producto_activo'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0004_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=50)),
+                ('peso', models.PositiveSmallIntegerField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventario.producto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['termino', 'producto', 'peso'], name='termino_producto')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0005_termino_producto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categoriaproducto',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='producto',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name='proveedor',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
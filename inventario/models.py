@@ -2,18 +2,29 @@
 
 - CategoriaProducto, Proveedor, Producto
 - MovimientoInventario: aplica entradas/salidas y ajusta stock al guardarse
+- CorteInventario: existencias por producto al cierre de un día (ver
+  `inventario.existencias`)
+- SecuenciaDocumento: contador por prefijo para numerar ventas/compras
+  (ver `inventario.secuencias`)
+- TerminoProducto: índice de búsqueda de productos (ver `inventario.busqueda`)
 
 Nota: el ajuste de stock ocurre solo al crear el movimiento (save nuevo).
+Para aplicar muchos movimientos a la vez ver `inventario.stock`.
+
+`actualizado` (en catálogos, ventas y compras) es el validador de los GET
+condicionales de la API: `save()` lo fija solo, pero los `update()` masivos
+deben fijarlo explícitamente.
 """
 
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 
 
 class CategoriaProducto(models.Model):
     """Clasificación de productos."""
     nombre = models.CharField(max_length=100, unique=True)
     descripcion = models.TextField(blank=True)
+    actualizado = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.nombre
@@ -25,6 +36,7 @@ class Proveedor(models.Model):
     contacto_principal = models.CharField(max_length=100)
     telefono = models.CharField(max_length=30)
     direccion = models.CharField(max_length=255)
+    actualizado = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.empresa
@@ -41,6 +53,15 @@ class Producto(models.Model):
     proveedor = models.ForeignKey(Proveedor, on_delete=models.PROTECT, related_name='productos')
     categoria = models.ForeignKey(CategoriaProducto, on_delete=models.PROTECT, related_name='productos')
     activo = models.BooleanField(default=True)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Stock bajo y listado de inventario ordenado por stock
+            models.Index(fields=['cantidad_en_inventario', 'id'], name='producto_stock'),
+            # Productos activos de los formularios de venta/compra
+            models.Index(fields=['activo', 'id'], name='producto_activo'),
+        ]
 
     def __str__(self):
         return f"{self.codigo} - {self.nombre}"
@@ -71,27 +92,96 @@ class MovimientoInventario(models.Model):
     ref_venta_id = models.IntegerField(null=True, blank=True)
     ref_compra_id = models.IntegerField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Kardex por producto y consultas de existencias a una fecha
+            models.Index(fields=['producto', 'fecha'], name='movimiento_prod_fecha'),
+            models.Index(fields=['tipo', 'fecha'], name='movimiento_tipo_fecha'),
+            # Listado general (`-fecha,-id`) y movimientos posteriores a un corte
+            models.Index(fields=['fecha', 'id'], name='movimiento_fecha'),
+            models.Index(fields=['referencia'], name='movimiento_referencia'),
+        ]
+
     def clean(self):
         if self.tipo == self.SALIDA and self.cantidad > self.producto.cantidad_en_inventario:
             raise ValidationError('Stock insuficiente para realizar la salida')
 
     def aplicar(self):
-        """Aplica el efecto del movimiento sobre el stock del producto."""
-        if self.tipo == self.ENTRADA:
-            self.producto.cantidad_en_inventario += int(self.cantidad)
-        else:
-            if self.cantidad > self.producto.cantidad_en_inventario:
-                raise ValidationError('Stock insuficiente para realizar la salida')
-            self.producto.cantidad_en_inventario -= int(self.cantidad)
-        self.producto.save(update_fields=['cantidad_en_inventario'])
+        """Aplica el efecto del movimiento sobre el stock del producto.
+
+        Usa un UPDATE condicional en la BD (no lee-modifica-escribe), así dos
+        salidas concurrentes no pueden dejar el stock en negativo.
+        """
+        from .stock import aplicar_deltas
+        delta = int(self.cantidad) if self.tipo == self.ENTRADA else -int(self.cantidad)
+        aplicar_deltas({self.producto_id: delta})
+        self.producto.refresh_from_db(fields=['cantidad_en_inventario'])
 
     def save(self, *args, **kwargs):
         # Solo al crear el movimiento se ajusta el stock.
         is_new = self.pk is None
-        super().save(*args, **kwargs)
-        if is_new:
+        if not is_new:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            super().save(*args, **kwargs)
             # aplicar efecto sobre el stock solo al crear
             self.aplicar()
 
     def __str__(self):
         return f"{self.get_tipo_display()} {self.cantidad} de {self.producto}"
+
+
+class SecuenciaDocumento(models.Model):
+    """Contador de numeración de documentos por prefijo (V-, OC-, ...).
+
+    `siguiente` es el primer número aún no reservado. Se avanza por bloques
+    desde `inventario.secuencias`; no editar a mano hacia atrás.
+    """
+    prefijo = models.CharField(max_length=20, unique=True)
+    siguiente = models.PositiveBigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.prefijo} -> {self.siguiente}"
+
+
+class CorteInventario(models.Model):
+    """Existencia de un producto al cierre de `fecha` (hora local).
+
+    Lo escribe `manage.py tomar_corte_inventario` (diario o mensual). Las
+    consultas a una fecha parten del corte más cercano y aplican solo los
+    movimientos entre ambas fechas. Guarda `precio_compra` para valuar.
+    """
+    fecha = models.DateField()
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='+')
+    cantidad = models.IntegerField()
+    precio_compra = models.DecimalField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'producto'], name='corte_inventario_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.producto_id}: {self.cantidad}"
+
+
+class TerminoProducto(models.Model):
+    """Término normalizado de `codigo`/`nombre`/`descripcion` de un producto.
+
+    Índice invertido para la búsqueda de productos; lo mantiene
+    `inventario.busqueda` al guardar cada producto. `peso` indica de qué
+    campo viene el término (mayor = más relevante).
+    """
+    termino = models.CharField(max_length=50)
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='+')
+    peso = models.PositiveSmallIntegerField()
+
+    class Meta:
+        indexes = [
+            # Búsqueda por prefijo; cubre la consulta completa (sin ir a la tabla)
+            models.Index(fields=['termino', 'producto', 'peso'], name='termino_producto'),
+        ]
+
+    def __str__(self):
+        return f"{self.termino} -> {self.producto_id}"
@@ -0,0 +1,99 @@
+"""Mapa de precios de productos activos para los formularios de venta/compra.
+
+`mapa_precios('venta'|'compra')` devuelve el JSON `{producto_id: precio}`
+ya serializado y su ETag (hash del contenido), cacheados bajo una versión
+del catálogo que se incrementa (al confirmar la transacción) cuando se
+guarda o borra un producto. Los formularios ya no incrustan el mapa: lo
+piden a `/api/productos/precios/` con el ETag en la URL, así el navegador
+lo descarga una vez por versión del catálogo y las demás veces lo toma de
+su caché.
+
+`PRECIOS_CACHE_TTL` acota la antigüedad del mapa si el catálogo cambia por
+caminos que no disparan señales (`update()`, SQL directo) o si la caché no
+es compartida entre procesos (LocMemCache).
+"""
+
+import hashlib
+import json
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.urls import reverse
+
+from .models import Producto
+
+VERSION_KEY = 'precios:version'
+
+CAMPOS = {'venta': 'precio_venta', 'compra': 'precio_compra'}
+# Campos de Producto que cambian el mapa
+_AFECTAN = {'precio_venta', 'precio_compra', 'activo'}
+
+
+@dataclass(frozen=True)
+class MapaPrecios:
+    """JSON serializado del mapa y su ETag."""
+    contenido: str
+    etag: str
+
+
+def _cache():
+    return caches[getattr(settings, 'PRECIOS_CACHE', 'default')]
+
+
+def version_precios() -> int:
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def invalidar_precios():
+    """Pasa a una nueva versión del catálogo; los mapas anteriores expiran solos."""
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, 1, timeout=None)
+
+
+def calcular_mapa(tipo: str) -> MapaPrecios:
+    """Mapa sin caché; `tipo` es 'venta' o 'compra'."""
+    campo = CAMPOS[tipo]
+    filas = Producto.objects.filter(activo=True).order_by('id').values_list('id', campo)
+    contenido = json.dumps({str(pid): str(precio) for pid, precio in filas}, separators=(',', ':'))
+    # ETag por contenido: igual en todos los procesos aunque la versión local difiera
+    return MapaPrecios(contenido=contenido, etag=hashlib.sha1(contenido.encode()).hexdigest()[:20])
+
+
+def mapa_precios(tipo: str) -> MapaPrecios:
+    """`calcular_mapa` cacheado por versión del catálogo."""
+    ttl = getattr(settings, 'PRECIOS_CACHE_TTL', 300)
+    if not ttl:
+        return calcular_mapa(tipo)
+    key = f'precios:{version_precios()}:{tipo}'
+    cache = _cache()
+    mapa = cache.get(key)
+    if mapa is None:
+        mapa = calcular_mapa(tipo)
+        cache.set(key, mapa, timeout=ttl)
+    return mapa
+
+
+def url_mapa(tipo: str) -> str:
+    """URL del mapa con el ETag vigente (cacheable por el navegador)."""
+    return f"{reverse('api_productos_precios')}?tipo={tipo}&v={mapa_precios(tipo).etag}"
+
+
+def _producto_cambiado(sender, update_fields=None, **kwargs):
+    if update_fields is not None and not set(update_fields) & _AFECTAN:
+        return
+    transaction.on_commit(invalidar_precios)
+
+
+post_save.connect(_producto_cambiado, sender=Producto, dispatch_uid='precios_save')
+post_delete.connect(_producto_cambiado, sender=Producto, dispatch_uid='precios_delete')
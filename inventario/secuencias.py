@@ -0,0 +1,127 @@
+"""Numeración de documentos (ventas, compras) sin contención.
+
+Cada prefijo tiene una fila en SecuenciaDocumento. En lugar de bloquear la
+última venta/compra y parsear su número, cada proceso reserva un bloque de
+`SECUENCIAS_BLOQUE` números con una transacción corta sobre esa fila y los
+entrega desde memoria; solo el primer pedido de cada bloque toca el contador.
+
+- La reserva usa la conexión `SECUENCIAS_DB` (si existe en DATABASES), que
+  confirma por su cuenta. Con SQLite se usa `default`: hay un solo escritor
+  por archivo y la segunda conexión esperaría a la transacción abierta
+- Dentro de una transacción de `default` (la del pedido puede tener ya
+  bloqueos de escritura que otra conexión esperaría) el bloque se reserva
+  en esa misma transacción y pasa a la caché solo al confirmar (un
+  rollback no deja números reservados en caché)
+- Los números de un bloque no usado (reinicio del proceso) quedan como huecos
+- Prefijos en `SECUENCIAS_SIN_HUECOS`: modo estricto, se toma un número a la
+  vez dentro de la transacción del documento (serializa por prefijo, pero un
+  rollback devuelve el número)
+
+El contador se inicializa la primera vez desde el mayor número existente.
+"""
+
+import re
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, transaction
+from django.db.models import F
+
+from .models import SecuenciaDocumento
+
+BLOQUE = 20
+
+_lock = threading.Lock()
+_bloques = {}  # prefijo -> lista de rangos [desde, hasta) reservados y sin usar
+
+
+def _alias() -> str:
+    alias = getattr(settings, 'SECUENCIAS_DB', DEFAULT_DB_ALIAS)
+    if alias not in connections.databases or connections[alias].vendor == 'sqlite':
+        return DEFAULT_DB_ALIAS
+    return alias
+
+
+def mayor_numero(modelo, prefijo, campo='numero') -> int:
+    """Mayor sufijo numérico de `campo` entre los registros con `prefijo`."""
+    mayor = 0
+    valores = modelo._default_manager.filter(**{f'{campo}__startswith': prefijo}).values_list(campo, flat=True)
+    for valor in valores.iterator():
+        match = re.search(r'(\d+)$', valor)
+        if match:
+            mayor = max(mayor, int(match.group(1)))
+    return mayor
+
+
+def reservar(prefijo, cantidad=1, inicial=None, using=None) -> int:
+    """Avanza el contador de `prefijo` en `cantidad` y devuelve el primer número reservado.
+
+    `inicial` (callable) da el primer número si la secuencia aún no existe.
+    """
+    using = using or _alias()
+    secuencias = SecuenciaDocumento.objects.using(using)
+    with transaction.atomic(using=using):
+        # UPDATE primero: toma el bloqueo de escritura de entrada, sin leer antes
+        if not secuencias.filter(prefijo=prefijo).update(siguiente=F('siguiente') + cantidad):
+            try:
+                with transaction.atomic(using=using):
+                    secuencias.create(prefijo=prefijo, siguiente=(inicial() if inicial else 1) + cantidad)
+            except IntegrityError:
+                # Otro proceso la creó primero
+                secuencias.filter(prefijo=prefijo).update(siguiente=F('siguiente') + cantidad)
+        siguiente = secuencias.filter(prefijo=prefijo).values_list('siguiente', flat=True).get()
+    return siguiente - cantidad
+
+
+def _guardar_bloque(prefijo, desde, hasta):
+    if desde < hasta:
+        with _lock:
+            _bloques.setdefault(prefijo, []).append([desde, hasta])
+
+
+def _tomar_de_cache(prefijo):
+    with _lock:
+        rangos = _bloques.get(prefijo)
+        while rangos:
+            rango = rangos[0]
+            if rango[0] < rango[1]:
+                rango[0] += 1
+                return rango[0] - 1
+            rangos.pop(0)
+    return None
+
+
+def siguiente_numero(prefijo, inicial=None) -> int:
+    """Siguiente número de `prefijo` (único entre procesos, no necesariamente consecutivo)."""
+    if prefijo in getattr(settings, 'SECUENCIAS_SIN_HUECOS', ()):
+        return reservar(prefijo, 1, inicial, using=DEFAULT_DB_ALIAS)
+    numero = _tomar_de_cache(prefijo)
+    if numero is not None:
+        return numero
+    tamano = max(int(getattr(settings, 'SECUENCIAS_BLOQUE', BLOQUE)), 1)
+    using = DEFAULT_DB_ALIAS if connections[DEFAULT_DB_ALIAS].in_atomic_block else _alias()
+    primero = reservar(prefijo, tamano, inicial, using=using)
+    if connections[using].in_atomic_block:
+        transaction.on_commit(lambda: _guardar_bloque(prefijo, primero + 1, primero + tamano), using=using)
+    else:
+        _guardar_bloque(prefijo, primero + 1, primero + tamano)
+    return primero
+
+
+def generar_numero(modelo, prefijo, campo='numero', ancho=4) -> str:
+    """Número de documento libre para `modelo`, p. ej. `V-0042`.
+
+    Salta números ya usados (registros creados o editados a mano con un
+    número adelantado al contador).
+    """
+    while True:
+        n = siguiente_numero(prefijo, inicial=lambda: mayor_numero(modelo, prefijo, campo) + 1)
+        numero = f'{prefijo}{n:0{ancho}d}'
+        if not modelo._default_manager.filter(**{campo: numero}).exists():
+            return numero
+
+
+def olvidar_bloques():
+    """Descarta los bloques en memoria (p. ej. tras ajustar un contador a mano)."""
+    with _lock:
+        _bloques.clear()
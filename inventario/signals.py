@@ -0,0 +1,14 @@
+"""Señales propias de inventario.
+
+- movimientos_aplicados: se envía tras registrar movimientos por lotes
+  (`inventario.stock.aplicar_movimientos`), que usa bulk_create y por lo
+  tanto no dispara post_save. Argumentos: `tipo`, `producto_ids`.
+- productos_importados: se envía tras una importación del catálogo
+  (`inventario.importacion.importar`, también bulk_create). Argumentos:
+  `creados`, `actualizados`.
+"""
+
+from django.dispatch import Signal
+
+movimientos_aplicados = Signal()
+productos_importados = Signal()
@@ -0,0 +1,118 @@
+"""Aplicación de movimientos de stock por lotes.
+
+Usado por `PedidoVenta.completar()` y `OrdenCompra.recibir()` (y por
+`MovimientoInventario.aplicar()` para un solo movimiento):
+
+- Bloquea los productos afectados en orden de id (evita deadlocks entre
+  pedidos concurrentes que comparten productos)
+- Aplica los deltas con un UPDATE condicional sobre `F()`; una salida solo
+  descuenta si hay stock suficiente, así que nunca se sobrevende
+- Inserta los MovimientoInventario con bulk_create (sin re-aplicar stock)
+  y avisa con la señal `movimientos_aplicados`
+
+El número de consultas no depende del número de líneas (salvo por bloques
+de `LOTE` productos).
+"""
+
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from .models import MovimientoInventario, Producto
+from .signals import movimientos_aplicados
+
+LOTE = 500
+
+
+class ProductoInexistente(ValidationError):
+    """Algún producto de las líneas no existe (o se borró mientras tanto)."""
+
+
+def _agrupar(lineas):
+    """Suma cantidades por producto: [(producto_id, cantidad)] -> {id: cantidad}."""
+    por_producto = defaultdict(int)
+    for producto_id, cantidad in lineas:
+        por_producto[producto_id] += int(cantidad)
+    return dict(por_producto)
+
+
+def aplicar_deltas(deltas):
+    """Suma `deltas` ({producto_id: delta}) a `cantidad_en_inventario`.
+
+    Un delta negativo solo se aplica si el stock alcanza; si algún producto
+    no alcanza se lanza ValidationError, y ProductoInexistente (también un
+    ValidationError) si algún id no existe. Llamar dentro de una transacción
+    para que el fallo deshaga también los bloques ya actualizados.
+    """
+    ids = sorted(deltas)
+    ahora = timezone.now()
+    for i in range(0, len(ids), LOTE):
+        bloque = ids[i:i + LOTE]
+        # Una condición por valor de delta, no por producto: en ajustes
+        # masivos (conteos) muchos productos comparten el mismo delta
+        por_delta = defaultdict(list)
+        for pid in bloque:
+            por_delta[deltas[pid]].append(pid)
+        suficiente = Q(*[
+            Q(pk__in=pids, cantidad_en_inventario__gte=max(-delta, 0)) for delta, pids in por_delta.items()
+        ], _connector=Q.OR)
+        actualizados = Producto.objects.filter(suficiente).update(
+            cantidad_en_inventario=F('cantidad_en_inventario') + Case(
+                *[When(pk__in=pids, then=Value(delta)) for delta, pids in por_delta.items()],
+                default=Value(0),
+                output_field=IntegerField(),
+            ),
+            actualizado=ahora,
+        )
+        if actualizados != len(bloque):
+            # Solo en el camino de error: distinguir ids inexistentes de falta de stock
+            faltantes = set(bloque) - set(Producto.objects.filter(pk__in=bloque).values_list('pk', flat=True))
+            if faltantes:
+                raise ProductoInexistente(f'Productos inexistentes: {", ".join(map(str, sorted(faltantes)))}')
+            raise ValidationError('Stock insuficiente para realizar la salida')
+
+
+def aplicar_movimientos(tipo, lineas, referencia='', nota='', ref_venta_id=None, ref_compra_id=None):
+    """Registra movimientos de `tipo` para `lineas` y ajusta el stock.
+
+    `lineas` es un iterable de `(producto_id, cantidad)`. Todo ocurre en una
+    sola transacción: o se aplican todas las líneas o ninguna.
+    """
+    lineas = [(pid, int(cant)) for pid, cant in lineas]
+    if not lineas:
+        return []
+    signo = 1 if tipo == MovimientoInventario.ENTRADA else -1
+    cantidades = _agrupar(lineas)
+    with transaction.atomic():
+        # Bloqueo en orden determinista de id
+        productos = list(
+            Producto.objects.select_for_update()
+            .filter(pk__in=cantidades)
+            .order_by('pk')
+            .only('id', 'codigo', 'nombre', 'cantidad_en_inventario')
+        )
+        if tipo == MovimientoInventario.SALIDA:
+            for p in productos:
+                if cantidades[p.pk] > p.cantidad_en_inventario:
+                    raise ValidationError(f'Stock insuficiente para {p}')
+        aplicar_deltas({pid: signo * cant for pid, cant in cantidades.items()})
+        creados = MovimientoInventario.objects.bulk_create(
+            [
+                MovimientoInventario(
+                    tipo=tipo,
+                    producto_id=pid,
+                    cantidad=cant,
+                    referencia=referencia,
+                    nota=nota,
+                    ref_venta_id=ref_venta_id,
+                    ref_compra_id=ref_compra_id,
+                )
+                for pid, cant in lineas
+            ],
+            batch_size=LOTE,
+        )
+        movimientos_aplicados.send(sender=MovimientoInventario, tipo=tipo, producto_ids=sorted(cantidades))
+        return creados
@@ -0,0 +1,313 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipIf
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from inventario import secuencias
+from inventario.conteos import NOTA, conciliar, leer_conteo
+from inventario.existencias import cierre, existencias_al, tomar_corte
+from inventario.importacion import importar, leer_catalogo
+from inventario.models import (
+    CategoriaProducto, CorteInventario, MovimientoInventario, Producto, Proveedor, SecuenciaDocumento,
+)
+from inventario.stock import ProductoInexistente, aplicar_deltas, aplicar_movimientos
+from ventas.models import Cliente, PedidoVenta
+
+
+def _cliente():
+    return Cliente.objects.create(nombre_completo='Ana', direccion='-', telefono='-', email='ana@example.com')
+
+
+class NumeracionTransaccionTests(TestCase):
+    """Numeración dentro de la transacción del pedido (TestCase ya abre una)."""
+
+    def setUp(self):
+        secuencias.olvidar_bloques()
+        self.addCleanup(secuencias.olvidar_bloques)
+
+    @skipIf(connection.vendor != 'sqlite', 'solo SQLite')
+    def test_sqlite_reserva_en_default(self):
+        self.assertEqual(secuencias._alias(), 'default')
+
+    def test_venta_dentro_de_atomic(self):
+        with transaction.atomic():
+            cliente = _cliente()
+            pedidos = [PedidoVenta.objects.create(cliente=cliente) for _ in range(3)]
+        numeros = [p.numero for p in pedidos]
+        self.assertEqual(len(set(numeros)), 3)
+        self.assertTrue(all(n.startswith(PedidoVenta.PREFIJO_NUMERO) for n in numeros))
+
+    def test_bloque_en_transaccion_no_queda_en_cache(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                PedidoVenta.generar_numero()
+                raise RuntimeError
+        self.assertEqual(secuencias._bloques, {})
+        self.assertFalse(SecuenciaDocumento.objects.filter(prefijo=PedidoVenta.PREFIJO_NUMERO).exists())
+
+
+class NumeracionUnicaTests(TransactionTestCase):
+    databases = {'default', 'secuencias'}
+
+    def setUp(self):
+        secuencias.olvidar_bloques()
+        self.addCleanup(secuencias.olvidar_bloques)
+
+    def test_bloques_de_varios_procesos_no_se_repiten(self):
+        # Cada "proceso" reserva su bloque y reparte desde memoria; olvidar la caché simula otro proceso
+        numeros = []
+        for _ in range(5):
+            numeros.extend(secuencias.siguiente_numero('T-') for _ in range(7))
+            secuencias.olvidar_bloques()
+        self.assertEqual(len(numeros), len(set(numeros)))
+
+    def test_bloque_fuera_de_transaccion_se_usa_desde_memoria(self):
+        primero = secuencias.siguiente_numero('T-')
+        with self.assertNumQueries(0):
+            segundo = secuencias.siguiente_numero('T-')
+        self.assertEqual(segundo, primero + 1)
+
+    def test_salta_numeros_ocupados(self):
+        cliente = _cliente()
+        PedidoVenta.objects.create(cliente=cliente, numero='V-0001')
+        self.assertEqual(PedidoVenta.generar_numero(), 'V-0002')
+
+    def test_hilos_concurrentes(self):
+        # Cada hilo abre su propia conexión a `secuencias` (archivo aparte, también con SQLite)
+        resultados = [[] for _ in range(4)]
+        listos = threading.Barrier(len(resultados))
+
+        def trabajar(destino):
+            try:
+                listos.wait()
+                for _ in range(50):
+                    destino.append(secuencias.siguiente_numero('T-'))
+            finally:
+                connections.close_all()
+
+        with mock.patch.object(secuencias, '_alias', return_value='secuencias'), \
+                self.settings(SECUENCIAS_BLOQUE=3):
+            hilos = [threading.Thread(target=trabajar, args=(r,)) for r in resultados]
+            for h in hilos:
+                h.start()
+            for h in hilos:
+                h.join()
+        numeros = [n for r in resultados for n in r]
+        self.assertEqual(len(numeros), 200)
+        self.assertEqual(len(numeros), len(set(numeros)))
+        siguiente = SecuenciaDocumento.objects.using('secuencias').get(prefijo='T-').siguiente
+        self.assertLess(max(numeros), siguiente)
+
+
+class AplicarDeltasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        proveedor = Proveedor.objects.create(empresa='Acme', contacto_principal='-', telefono='-', direccion='-')
+        categoria = CategoriaProducto.objects.create(nombre='General')
+        cls.producto = Producto.objects.create(
+            codigo='P1', nombre='Tornillo', precio_venta=Decimal('10'), precio_compra=Decimal('6'),
+            cantidad_en_inventario=5, proveedor=proveedor, categoria=categoria,
+        )
+
+    def test_stock_insuficiente(self):
+        with self.assertRaisesMessage(ValidationError, 'Stock insuficiente') as ctx:
+            with transaction.atomic():
+                aplicar_deltas({self.producto.pk: -6})
+        self.assertNotIsInstance(ctx.exception, ProductoInexistente)
+
+    def test_producto_inexistente(self):
+        with self.assertRaisesMessage(ProductoInexistente, f'Productos inexistentes: {self.producto.pk + 1}'):
+            with transaction.atomic():
+                aplicar_deltas({self.producto.pk: 1, self.producto.pk + 1: 1})
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.cantidad_en_inventario, 5)
+
+    def test_entrada_de_producto_borrado(self):
+        with self.assertRaises(ProductoInexistente):
+            aplicar_movimientos(MovimientoInventario.ENTRADA, [(self.producto.pk + 1, 3)])
+        self.assertFalse(MovimientoInventario.objects.exists())
+
+
+class ExistenciasTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        proveedor = Proveedor.objects.create(empresa='Acme', contacto_principal='-', telefono='-', direccion='-')
+        cls.producto = Producto.objects.create(
+            codigo='P1', nombre='Tornillo', precio_venta=Decimal('10'), precio_compra=Decimal('6'),
+            proveedor=proveedor, categoria=CategoriaProducto.objects.create(nombre='General'),
+        )
+        cls.hoy = timezone.localdate()
+        # Historia: +10 hace 10 días, -3 hace 5, +5 ayer; stock actual 12
+        for dias, tipo, cantidad in ((10, 'entrada', 10), (5, 'salida', 3), (1, 'entrada', 5)):
+            m = MovimientoInventario.objects.create(producto=cls.producto, tipo=tipo, cantidad=cantidad)
+            MovimientoInventario.objects.filter(pk=m.pk).update(fecha=cierre(cls.hoy - timedelta(days=dias + 1)))
+
+    def _al(self, dias):
+        existencias = existencias_al(self.hoy - timedelta(days=dias))
+        return existencias.origen, existencias.cantidades[self.producto.pk]
+
+    def test_sin_cortes_parte_del_stock_actual(self):
+        self.assertEqual(self._al(0), ('actual', 12))
+        self.assertEqual(self._al(7), ('actual', 10))
+        self.assertEqual(self._al(11), ('actual', 0))
+
+    def test_tomar_corte_descuenta_movimientos_posteriores(self):
+        fecha = self.hoy - timedelta(days=6)
+        self.assertEqual(tomar_corte(fecha), 1)
+        corte = CorteInventario.objects.get(fecha=fecha, producto=self.producto)
+        self.assertEqual((corte.cantidad, corte.precio_compra), (10, Decimal('6')))
+
+        # Desde el corte, hacia adelante y hacia atrás
+        self.assertEqual(self._al(5), (f'corte:{fecha}', 7))
+        self.assertEqual(self._al(8), (f'corte:{fecha}', 10))
+        self.assertEqual(self._al(11), (f'corte:{fecha}', 0))
+
+    def test_tomar_corte_reemplaza_el_de_la_misma_fecha(self):
+        fecha = self.hoy - timedelta(days=6)
+        tomar_corte(fecha)
+        Producto.objects.filter(pk=self.producto.pk).update(precio_compra=Decimal('7'))
+        tomar_corte(fecha)
+        self.assertEqual(
+            list(CorteInventario.objects.values_list('cantidad', 'precio_compra')), [(10, Decimal('7'))],
+        )
+
+    def test_tomar_corte_sin_clave_de_conflicto_en_mysql(self):
+        # MySQL no admite `unique_fields` en el upsert (ON DUPLICATE KEY usa la restricción única)
+        with mock.patch.object(connection.features, 'supports_update_conflicts_with_target', False), \
+                mock.patch.object(CorteInventario.objects, 'bulk_create') as bulk_create:
+            tomar_corte(self.hoy - timedelta(days=6))
+        self.assertNotIn('unique_fields', bulk_create.call_args.kwargs)
+        self.assertTrue(bulk_create.call_args.kwargs['update_conflicts'])
+
+
+def _csv(*filas):
+    return [linea + '\n' for linea in filas]
+
+
+class ImportacionTests(TestCase):
+    ENCABEZADO = 'codigo,nombre,precio_venta,precio_compra,proveedor,categoria,stock'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.acme = Proveedor.objects.create(empresa='Acme', contacto_principal='-', telefono='-', direccion='-')
+        for _ in range(2):
+            Proveedor.objects.create(empresa='Repetido', contacto_principal='-', telefono='-', direccion='-')
+        cls.general = CategoriaProducto.objects.create(nombre='General')
+        cls.existente = Producto.objects.create(
+            codigo='P1', nombre='Viejo', precio_venta=Decimal('10'), precio_compra=Decimal('6'),
+            cantidad_en_inventario=50, proveedor=cls.acme, categoria=cls.general,
+        )
+
+    def _importar(self, *filas, lote=100):
+        return importar(leer_catalogo(_csv(self.ENCABEZADO, *filas), 'csv'), lote=lote)
+
+    def test_crea_y_actualiza_por_codigo(self):
+        resultado = self._importar('P1,Nuevo nombre,12.5,7,Acme,General,999', 'P2,Tuerca,3,1.2,Acme,General,7')
+        self.assertEqual((resultado.creados, resultado.actualizados, resultado.errores), (1, 1, []))
+
+        self.existente.refresh_from_db()
+        self.assertEqual(self.existente.nombre, 'Nuevo nombre')
+        self.assertEqual(self.existente.precio_venta, Decimal('12.50'))
+        # El stock de un producto existente no se toca
+        self.assertEqual(self.existente.cantidad_en_inventario, 50)
+        nuevo = Producto.objects.get(codigo='P2')
+        self.assertEqual((nuevo.cantidad_en_inventario, nuevo.proveedor_id), (7, self.acme.pk))
+
+    def test_referencias_desconocidas_o_ambiguas(self):
+        resultado = self._importar(
+            'P2,A,1,1,Nadie,General,0',
+            'P3,B,1,1,Repetido,General,0',
+            'P4,C,1,1,Acme,Otra,0',
+            'P5,D,1,1,Acme,General,0',
+        )
+        self.assertEqual(resultado.errores, [
+            (2, 'proveedor desconocido: Nadie'),
+            (3, 'proveedor ambiguo: Repetido'),
+            (4, 'categoria desconocido: Otra'),
+        ])
+        self.assertEqual(resultado.creados, 1)
+        self.assertEqual(sorted(Producto.objects.values_list('codigo', flat=True)), ['P1', 'P5'])
+
+    def test_proveedor_y_categoria_por_id(self):
+        filas = [{'codigo': 'P2', 'nombre': 'A', 'precio_venta': 1, 'precio_compra': 1,
+                  'proveedor_id': self.acme.pk, 'categoria_id': self.general.pk}]
+        resultado = importar(leer_catalogo([f'{json.dumps(f)}\n' for f in filas], 'jsonl'))
+        self.assertEqual((resultado.creados, resultado.errores), (1, []))
+
+    def test_fila_invalida_no_detiene_su_bloque(self):
+        resultado = self._importar(
+            'P2,A,1,1,Acme,General,0', 'P3,B,caro,1,Acme,General,0', 'P4,C,1,1,Acme,General,0', lote=10,
+        )
+        self.assertEqual(resultado.errores, [(3, 'precio_venta inválido')])
+        self.assertEqual((resultado.creados, resultado.errores_total), (2, 1))
+        self.assertEqual(Producto.objects.filter(codigo__in=['P2', 'P4']).count(), 2)
+
+    def test_comando(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as f:
+            f.writelines(_csv(self.ENCABEZADO, 'P1,Nuevo,1,1,Acme,General,0', 'P2,Tuerca,1,1,Acme,General,0'))
+        self.addCleanup(os.remove, f.name)
+        salida = StringIO()
+        call_command('importar_productos', f.name, stdout=salida, stderr=StringIO())
+        self.assertIn('1 creados, 1 actualizados, 0 con error', salida.getvalue())
+
+
+class ConteoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        proveedor = Proveedor.objects.create(empresa='Acme', contacto_principal='-', telefono='-', direccion='-')
+        categoria = CategoriaProducto.objects.create(nombre='General')
+        cls.p1, cls.p2, cls.p3 = (
+            Producto.objects.create(
+                codigo=codigo, nombre=codigo, precio_venta=Decimal('10'), precio_compra=Decimal('6'),
+                cantidad_en_inventario=stock, proveedor=proveedor, categoria=categoria,
+            )
+            for codigo, stock in (('P1', 10), ('P2', 10), ('P3', 10))
+        )
+
+    def _conciliar(self, *filas, **opciones):
+        return conciliar(leer_conteo(_csv('codigo,producto_id,cantidad', *filas), 'csv'), referencia='C-1', **opciones)
+
+    def _stock(self):
+        return dict(Producto.objects.values_list('codigo', 'cantidad_en_inventario'))
+
+    def test_filas_repetidas_se_suman(self):
+        # P1 en dos ubicaciones, una por código y otra por id
+        resultado = self._conciliar('P1,,4', f',{self.p1.pk},8', 'P2,,10')
+        self.assertEqual(resultado.contados, 2)
+        self.assertEqual([d.as_json() for d in resultado.diferencias], [
+            {'producto_id': self.p1.pk, 'codigo': 'P1', 'sistema': 10, 'contado': 12, 'diferencia': 2},
+        ])
+        self.assertEqual(self._stock()['P1'], 12)
+
+    def test_simular_no_escribe(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resultado = self._conciliar('P1,,15', 'P2,,3', simular=True)
+        escrituras = [q['sql'] for q in ctx.captured_queries if q['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+        self.assertEqual(escrituras, [])
+        self.assertNotIn('FOR UPDATE', ' '.join(q['sql'] for q in ctx.captured_queries))
+        self.assertEqual((resultado.unidades(1), resultado.unidades(-1)), (5, 7))
+        self.assertEqual(self._stock(), {'P1': 10, 'P2': 10, 'P3': 10})
+        self.assertFalse(MovimientoInventario.objects.exists())
+
+    def test_crea_entradas_y_salidas_con_el_stock(self):
+        resultado = self._conciliar('P1,,15', 'P2,,3', 'P3,,10', 'XX,,1', 'P2,,-1')
+        self.assertEqual(resultado.errores, [(5, 'producto desconocido: XX'), (6, 'cantidad negativa')])
+        self.assertEqual(self._stock(), {'P1': 15, 'P2': 3, 'P3': 10})
+        movimientos = MovimientoInventario.objects.order_by('producto_id').values_list(
+            'producto__codigo', 'tipo', 'cantidad', 'referencia', 'nota',
+        )
+        self.assertEqual(list(movimientos), [
+            ('P1', MovimientoInventario.ENTRADA, 5, 'C-1', NOTA),
+            ('P2', MovimientoInventario.SALIDA, 7, 'C-1', NOTA),
+        ])
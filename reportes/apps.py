@@ -7,3 +7,7 @@ class ReportesConfig(AppConfig):
     """Configuración de la aplicación de reportes."""
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reportes'
+
+    def ready(self):
+        # Invalidación de la caché de métricas del dashboard
+        from . import signals  # noqa: F401
@@ -0,0 +1,226 @@
+"""Generación de filas CSV de los reportes (compartida por vistas y trabajos).
+
+Cada reporte es una función `params -> Exportacion` que no toca la BD hasta
+que se iteran sus filas. Las filas se leen con `values_list(...).iterator()`
+en bloques de `LOTE_CSV`: una sola consulta y sin caché del queryset, así
+la memoria de Python no crece con el tamaño del reporte.
+
+Formato compatible con Excel: BOM UTF-8, delimitador ';' y CRLF.
+"""
+
+import csv
+import hashlib
+import json
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+from typing import Iterable
+
+from django.db.models import Count, Max
+
+from compras.models import OrdenCompra, OrdenCompraItem
+from inventario.existencias import existencias_al
+from inventario.models import CategoriaProducto, CorteInventario, MovimientoInventario, Producto, Proveedor
+from ventas.models import Cliente, PedidoVenta, PedidoVentaItem
+
+LOTE_CSV = 2000
+
+
+@dataclass
+class Exportacion:
+    nombre: str
+    encabezado: list
+    filas: Iterable
+
+
+class _Eco:
+    """Buffer mínimo para csv.writer: devuelve la línea en vez de guardarla."""
+    def write(self, valor):
+        return valor
+
+
+def filas_por_lotes(qs, campos, orden, lote=None):
+    """Itera `values_list(*campos)` ordenado por `orden`, `lote` filas por vez.
+
+    Una sola consulta leída con `iterator(chunk_size=lote)`: SQLite y
+    PostgreSQL entregan las filas por bloques desde el servidor; con MySQL el
+    driver recibe el resultado completo, pero sin instanciar modelos ni
+    llenar la caché del queryset.
+    """
+    return qs.order_by(*orden).values_list(*campos).iterator(chunk_size=lote or LOTE_CSV)
+
+
+def lineas_csv(exportacion: Exportacion):
+    """Texto del CSV línea por línea (la primera incluye solo el BOM)."""
+    writer = csv.writer(_Eco(), delimiter=';', lineterminator='\r\n')
+    yield '\ufeff'
+    yield writer.writerow(exportacion.encabezado)
+    for fila in exportacion.filas:
+        yield writer.writerow(fila)
+
+
+def reporte_ventas(params) -> Exportacion:
+    desde = params.get('desde')
+    hasta = params.get('hasta')
+    cliente_id = params.get('cliente')
+    producto_id = params.get('producto')
+    qs = PedidoVenta.objects.all()
+    if desde:
+        qs = qs.filter(fecha__gte=desde)
+    if hasta:
+        qs = qs.filter(fecha__lte=hasta)
+    if cliente_id:
+        qs = qs.filter(cliente_id=cliente_id)
+    if producto_id:
+        qs = qs.filter(items__producto_id=producto_id).distinct()
+
+    # Una fila por ítem
+    items = PedidoVentaItem.objects.filter(pedido__in=qs)
+    if producto_id:
+        items = items.filter(producto_id=producto_id)
+    campos = ('pedido__numero', 'pedido__fecha', 'pedido__cliente__nombre_completo', 'producto__nombre',
+              'cantidad', 'precio_unitario', 'pedido__estado')
+    filas = (
+        (numero, fecha, cliente, producto, cantidad, precio, precio * Decimal(cantidad), estado)
+        for numero, fecha, cliente, producto, cantidad, precio, estado
+        in filas_por_lotes(items, campos, ('-pedido__fecha', 'pedido__numero', 'id'))
+    )
+    return Exportacion(
+        'reporte_ventas.csv',
+        ['numero', 'fecha', 'cliente', 'producto', 'cantidad', 'precio_unitario', 'subtotal', 'estado'],
+        filas,
+    )
+
+
+def reporte_compras(params) -> Exportacion:
+    desde = params.get('desde')
+    hasta = params.get('hasta')
+    proveedor_id = params.get('proveedor')
+    producto_id = params.get('producto')
+    qs = OrdenCompra.objects.all()
+    if desde:
+        qs = qs.filter(fecha__gte=desde)
+    if hasta:
+        qs = qs.filter(fecha__lte=hasta)
+    if proveedor_id:
+        qs = qs.filter(proveedor_id=proveedor_id)
+    if producto_id:
+        qs = qs.filter(items__producto_id=producto_id).distinct()
+
+    items = OrdenCompraItem.objects.filter(orden__in=qs)
+    if producto_id:
+        items = items.filter(producto_id=producto_id)
+    campos = ('orden__numero', 'orden__fecha', 'orden__proveedor__empresa', 'producto__nombre',
+              'cantidad', 'costo_unitario', 'orden__estado')
+    filas = (
+        (numero, fecha, proveedor, producto, cantidad, costo, costo * Decimal(cantidad), estado)
+        for numero, fecha, proveedor, producto, cantidad, costo, estado
+        in filas_por_lotes(items, campos, ('-orden__fecha', 'orden__numero', 'id'))
+    )
+    return Exportacion(
+        'reporte_compras.csv',
+        ['numero', 'fecha', 'proveedor', 'producto', 'cantidad', 'costo_unitario', 'subtotal', 'estado'],
+        filas,
+    )
+
+
+def reporte_inventario(params) -> Exportacion:
+    categoria_id = params.get('categoria')
+    cantidad_min = params.get('min', '')
+    fecha = params.get('fecha')
+    qs = Producto.objects.all()
+    if categoria_id:
+        qs = qs.filter(categoria_id=categoria_id)
+    maximo = None
+    if cantidad_min:
+        try:
+            maximo = int(cantidad_min)
+        except ValueError:
+            pass
+    campos = ('codigo', 'nombre', 'categoria__nombre', 'proveedor__empresa', 'cantidad_en_inventario', 'precio_venta')
+    try:
+        fecha = date.fromisoformat(fecha) if fecha else None
+    except ValueError:
+        fecha = None
+    if fecha:
+        filas = _filas_inventario_al(qs, campos, fecha, maximo)
+    else:
+        if maximo is not None:
+            qs = qs.filter(cantidad_en_inventario__lte=maximo)
+        filas = filas_por_lotes(qs, campos, ('id',))
+    return Exportacion(
+        'reporte_inventario.csv',
+        ['codigo', 'nombre', 'categoria', 'proveedor', 'stock', 'precio_venta'],
+        filas,
+    )
+
+
+def _filas_inventario_al(qs, campos, fecha, maximo):
+    """Como `filas_por_lotes`, con el stock al cierre de `fecha` (una reconstrucción por lote)."""
+    filas = filas_por_lotes(qs, ('id', *campos), ('id',))
+    stock = campos.index('cantidad_en_inventario')
+    while True:
+        lote = list(islice(filas, LOTE_CSV))
+        if not lote:
+            return
+        existencias = existencias_al(fecha, Producto.objects.filter(pk__in=[f[0] for f in lote]))
+        for pid, *fila in lote:
+            fila[stock] = existencias.cantidades.get(pid, 0)
+            if maximo is None or fila[stock] <= maximo:
+                yield fila
+
+
+REPORTES = {
+    'ventas': reporte_ventas,
+    'compras': reporte_compras,
+    'inventario': reporte_inventario,
+}
+
+# Parámetros que afectan a cada reporte (el resto se ignora al calcular la huella)
+FILTROS = {
+    'ventas': ('desde', 'hasta', 'cliente', 'producto'),
+    'compras': ('desde', 'hasta', 'proveedor', 'producto'),
+    'inventario': ('categoria', 'min', 'fecha'),
+}
+
+
+def normalizar_filtros(reporte, params) -> dict:
+    return {k: str(params.get(k)) for k in FILTROS[reporte] if params.get(k)}
+
+
+def _tablas(reporte, filtros) -> list:
+    """(modelo, campo de cambio) de cada tabla que lee `reporte` con `filtros`.
+
+    El campo es `actualizado` donde existe; las tablas de detalle usan el id
+    (editar o borrar un ítem toca el `actualizado` de su cabecera) y las de
+    movimientos y cortes solo crecen.
+    """
+    catalogo = [(Producto, 'actualizado')]
+    if reporte == 'ventas':
+        return [(PedidoVenta, 'actualizado'), (PedidoVentaItem, 'id'), (Cliente, 'actualizado'), *catalogo]
+    if reporte == 'compras':
+        return [(OrdenCompra, 'actualizado'), (OrdenCompraItem, 'id'), (Proveedor, 'actualizado'), *catalogo]
+    tablas = [*catalogo, (CategoriaProducto, 'actualizado'), (Proveedor, 'actualizado')]
+    if filtros.get('fecha'):
+        tablas += [(MovimientoInventario, 'id'), (CorteInventario, 'id')]
+    return tablas
+
+
+def estado_datos(reporte, filtros=None) -> dict:
+    """Cuántas filas y último cambio de cada tabla que lee el reporte.
+
+    Cambia cuando se crea, borra o edita cualquier registro que aparece en el
+    CSV (también nombres de productos, clientes, proveedores o categorías); se
+    usa para reutilizar artefactos. Un COUNT y un MAX indexado por tabla.
+    """
+    return {
+        modelo._meta.db_table: modelo.objects.aggregate(n=Count('pk'), ultimo=Max(campo))
+        for modelo, campo in _tablas(reporte, filtros or {})
+    }
+
+
+def huella(reporte, filtros) -> str:
+    """Identifica un artefacto: reporte + filtros + estado de los datos."""
+    raw = json.dumps([reporte, filtros, estado_datos(reporte, filtros)], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
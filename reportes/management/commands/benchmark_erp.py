@@ -0,0 +1,256 @@
+"""Benchmarks de endpoints y rutas críticas con líneas base versionadas.
+
+Crea una BD de prueba (como el test runner de Django), siembra un dataset de
+tamaño fijo con `reportes.sintetico`, ejecuta cada caso con el cliente de
+pruebas y registra por caso:
+
+- latencia p50/p95/máx (ms), de la mejor de `--rondas` rondas con el GC
+  desactivado
+- número de consultas SQL
+- pico de memoria Python (tracemalloc, en una pasada aparte para no
+  distorsionar los tiempos)
+
+Los resultados se comparan con `benchmarks/<motor>.json`. Falla si un caso
+hace más consultas que la línea base o si su p50 o su memoria crecen más de
+`--umbral` (con un piso de ruido en ms/KB). `--guardar` reescribe la línea
+base; se versiona junto con el cambio que la justifica.
+
+Uso:
+    python manage.py benchmark_erp
+    python manage.py benchmark_erp --solo ventas --repeticiones 50
+    python manage.py benchmark_erp --guardar
+"""
+
+import gc
+import json
+import statistics
+import time
+import tracemalloc
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_databases, setup_test_environment, teardown_databases, \
+    teardown_test_environment
+
+from inventario.models import Producto
+from reportes.metricas import invalidar_metricas
+from reportes.sintetico import Volumenes, sembrar
+from ventas.models import Cliente, PedidoVenta, PedidoVentaItem
+
+DATASET = Volumenes(
+    categorias=10, proveedores=20, productos=500, clientes=500, ventas=5000, items=4, dias=90,
+    hasta=date(2024, 6, 30), semilla=1, prefijo='BENCH-', lote=2000,
+)
+PISO_MS = 2.0
+PISO_KB = 64
+
+
+class _Casos:
+    """Casos del benchmark: nombre -> (preparar, ejecutar).
+
+    `preparar()` corre fuera de la medición y su resultado se pasa a
+    `ejecutar()`.
+    """
+
+    def __init__(self, cliente: Client):
+        self.cliente = cliente
+        self.productos = list(Producto.objects.filter(activo=True).order_by('id').values_list('id', flat=True)[:50])
+        self.cliente_id = Cliente.objects.order_by('id').values_list('id', flat=True).first()
+        # Stock de sobra para que crear/completar no dependa del número de repeticiones
+        Producto.objects.filter(pk__in=self.productos).update(cantidad_en_inventario=10 ** 7)
+
+    def _get(self, url):
+        respuesta = self.cliente.get(url)
+        if respuesta.status_code != 200:
+            raise CommandError(f'GET {url}: {respuesta.status_code}')
+        if respuesta.streaming:
+            for _ in respuesta.streaming_content:
+                pass
+        return respuesta
+
+    def _no_modificado(self, url, etag):
+        respuesta = self.cliente.get(url, HTTP_IF_NONE_MATCH=etag)
+        if respuesta.status_code != 304:
+            raise CommandError(f'GET {url} con If-None-Match: {respuesta.status_code}')
+
+    def _lineas(self, n=5):
+        return [{'producto_id': pid, 'cantidad': 1} for pid in self.productos[:n]]
+
+    def _pedido_pendiente(self):
+        pedido = PedidoVenta.objects.create(cliente_id=self.cliente_id)
+        PedidoVentaItem.objects.bulk_create([
+            PedidoVentaItem(pedido=pedido, producto_id=pid, cantidad=1, precio_unitario=10) for pid in self.productos[:5]
+        ])
+        pedido.actualizar_totales()
+        return pedido
+
+    def _completar(self, pedido):
+        pedido.estado = 'completado'
+        pedido.save()
+
+    def _crear_venta(self, _):
+        respuesta = self.cliente.post(
+            '/api/ventas/', json.dumps({'cliente_id': self.cliente_id, 'items': self._lineas()}),
+            content_type='application/json',
+        )
+        if respuesta.status_code != 201:
+            raise CommandError(f'POST /api/ventas/: {respuesta.status_code} {respuesta.content[:200]}')
+
+    def _lote_ventas(self, _, n=10):
+        operaciones = [
+            {'metodo': 'POST', 'ruta': 'ventas/', 'cuerpo': {'cliente_id': self.cliente_id, 'items': self._lineas()}}
+            for _ in range(n)
+        ]
+        respuesta = self.cliente.post(
+            '/api/batch/', json.dumps({'operaciones': operaciones, 'atomico': True}), content_type='application/json',
+        )
+        if respuesta.status_code != 200:
+            raise CommandError(f'POST /api/batch/: {respuesta.status_code} {respuesta.content[:200]}')
+
+    def todos(self) -> dict:
+        nada = lambda: None  # noqa: E731
+        return {
+            'api ventas: listado': (nada, lambda _: self._get('/api/ventas/')),
+            'api ventas: listado sin cambios (304)': (
+                lambda: self._get('/api/ventas/')['ETag'], lambda etag: self._no_modificado('/api/ventas/', etag),
+            ),
+            'api ventas: crear': (nada, self._crear_venta),
+            'api batch: crear 10 ventas': (nada, self._lote_ventas),
+            'api dashboard: sin caché': (invalidar_metricas, lambda _: self._get('/api/dashboard/')),
+            'api dashboard: con caché': (nada, lambda _: self._get('/api/dashboard/')),
+            'api inventario: listado': (nada, lambda _: self._get('/api/inventario/')),
+            'api movimientos: listado': (nada, lambda _: self._get('/api/inventario/movimientos/')),
+            'reporte ventas: csv': (nada, lambda _: self._get('/reportes/ventas.csv?desde=2024-06-01&hasta=2024-06-30')),
+            'PedidoVenta.completar': (self._pedido_pendiente, self._completar),
+            'PedidoVenta.generar_numero': (nada, lambda _: PedidoVenta.generar_numero()),
+        }
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def _ronda(preparar, ejecutar, repeticiones):
+    tiempos, consultas = [], []
+    gc.collect()
+    gc.disable()  # las pausas del GC son la mayor fuente de ruido
+    try:
+        for _ in range(repeticiones):
+            arg = preparar()
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                ejecutar(arg)
+                tiempos.append((time.perf_counter() - t0) * 1000)
+            consultas.append(len(ctx.captured_queries))
+    finally:
+        gc.enable()
+    return tiempos, consultas
+
+
+def medir(preparar, ejecutar, repeticiones, rondas=3, calentamiento=3, memoria=5) -> dict:
+    """Mide un caso; de las `rondas` se queda con la de menor p50 (la menos perturbada)."""
+    for _ in range(calentamiento):
+        ejecutar(preparar())
+    tiempos, consultas = min(
+        (_ronda(preparar, ejecutar, repeticiones) for _ in range(rondas)),
+        key=lambda r: statistics.median(r[0]),
+    )
+    picos = []
+    for _ in range(memoria):
+        arg = preparar()
+        tracemalloc.start()
+        try:
+            ejecutar(arg)
+            picos.append(tracemalloc.get_traced_memory()[1] / 1024)
+        finally:
+            tracemalloc.stop()
+    return {
+        'p50_ms': round(statistics.median(tiempos), 2),
+        'p95_ms': round(_percentil(tiempos, 0.95), 2),
+        'max_ms': round(max(tiempos), 2),
+        'consultas': int(statistics.median(consultas)),
+        'memoria_kb': round(max(picos), 1),
+    }
+
+
+def regresiones(actual: dict, base: dict, umbral: float) -> list:
+    """Mensajes de regresión de un caso respecto a su línea base."""
+    problemas = []
+    if actual['consultas'] > base['consultas']:
+        problemas.append(f"consultas {base['consultas']} -> {actual['consultas']}")
+    if actual['p50_ms'] > base['p50_ms'] * (1 + umbral) and actual['p50_ms'] - base['p50_ms'] > PISO_MS:
+        problemas.append(f"p50 {base['p50_ms']} -> {actual['p50_ms']} ms")
+    if actual['memoria_kb'] > base['memoria_kb'] * (1 + umbral) and actual['memoria_kb'] - base['memoria_kb'] > PISO_KB:
+        problemas.append(f"memoria {base['memoria_kb']} -> {actual['memoria_kb']} KB")
+    return problemas
+
+
+class Command(BaseCommand):
+    help = 'Corre los benchmarks sobre una BD de prueba y los compara con la línea base versionada.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=30)
+        parser.add_argument('--rondas', type=int, default=3, help='Se reporta la ronda con menor p50.')
+        parser.add_argument('--umbral', type=float, default=0.25, help='Crecimiento tolerado de p50/memoria (0.25 = 25%%).')
+        parser.add_argument('--solo', help='Corre solo los casos cuyo nombre contiene este texto.')
+        parser.add_argument('--guardar', action='store_true', help='Reescribe la línea base con estos resultados.')
+        parser.add_argument('--base', help='Archivo de línea base (por defecto benchmarks/<motor>.json).')
+
+    def handle(self, *args, **opts):
+        archivo = opts['base'] or settings.BASE_DIR / 'benchmarks' / f'{connection.vendor}.json'
+        setup_test_environment()
+        bases = setup_databases(verbosity=0, interactive=False, aliases=set(connections))
+        try:
+            resultados = self._correr(opts)
+        finally:
+            teardown_databases(bases, verbosity=0)
+            teardown_test_environment()
+
+        if opts['guardar']:
+            with open(archivo, 'w', encoding='utf-8') as f:
+                json.dump(resultados, f, indent=2, ensure_ascii=False, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(f'Línea base guardada en {archivo}')
+            return
+        try:
+            with open(archivo, encoding='utf-8') as f:
+                linea_base = json.load(f)
+        except FileNotFoundError:
+            self.stdout.write(self.style.WARNING(f'Sin línea base en {archivo}; usa --guardar para crearla'))
+            return
+        fallas = 0
+        for nombre, actual in resultados.items():
+            if nombre not in linea_base:
+                self.stdout.write(self.style.WARNING(f'{nombre}: sin línea base'))
+                continue
+            problemas = regresiones(actual, linea_base[nombre], opts['umbral'])
+            if problemas:
+                fallas += 1
+                self.stdout.write(self.style.ERROR(f'REGRESIÓN {nombre}: {"; ".join(problemas)}'))
+        if fallas:
+            raise CommandError(f'{fallas} casos con regresión respecto a {archivo}')
+        self.stdout.write(self.style.SUCCESS('Sin regresiones'))
+
+    def _correr(self, opts) -> dict:
+        t0 = time.perf_counter()
+        sembrar(DATASET)
+        self.stdout.write(f'Dataset sembrado en {time.perf_counter() - t0:.1f}s')
+        usuario = User.objects.create_user('benchmark', is_staff=True)
+        cliente = Client()
+        cliente.force_login(usuario)
+
+        resultados = {}
+        for nombre, (preparar, ejecutar) in _Casos(cliente).todos().items():
+            if opts['solo'] and opts['solo'] not in nombre:
+                continue
+            r = resultados[nombre] = medir(preparar, ejecutar, opts['repeticiones'], max(opts['rondas'], 1))
+            self.stdout.write(
+                f"{nombre:32} p50 {r['p50_ms']:8.2f} ms  p95 {r['p95_ms']:8.2f} ms  "
+                f"{r['consultas']:3} consultas  {r['memoria_kb']:9.1f} KB"
+            )
+        return resultados
@@ -0,0 +1,73 @@
+"""Benchmark de `calcular_metricas` sobre un dataset sintético.
+
+El dataset lo genera `reportes.sintetico` (el mismo de `seed_erp`) dentro de
+una transacción que se deshace al terminar, así que se puede correr contra
+cualquier BD sin dejar datos.
+
+Uso:
+    python manage.py benchmark_metricas --pedidos 50000 --items 5 --repeticiones 20
+"""
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from reportes.metricas import calcular_metricas
+from reportes.sintetico import Volumenes, sembrar
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide consultas y latencia de las métricas del dashboard sobre datos sintéticos (se deshacen al final).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pedidos', type=int, default=20000)
+        parser.add_argument('--items', type=int, default=5, help='Ítems promedio por pedido.')
+        parser.add_argument('--productos', type=int, default=2000)
+        parser.add_argument('--dias', type=int, default=365, help='Días de historia a repartir.')
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--semilla', type=int, default=1)
+
+    def handle(self, *args, **opts):
+        try:
+            with transaction.atomic():
+                self._sembrar(opts)
+                self._medir(opts)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _sembrar(self, opts):
+        t0 = time.perf_counter()
+        volumenes = Volumenes(
+            productos=opts['productos'], clientes=max(opts['pedidos'] // 10, 1), ventas=opts['pedidos'],
+            items=opts['items'], dias=opts['dias'], semilla=opts['semilla'], prefijo='BENCH-',
+        )
+        totales = sembrar(volumenes)
+        self.stdout.write(
+            f"Dataset: {totales['PedidoVenta']} pedidos, {totales['PedidoVentaItem']} ítems, "
+            f"{totales['MovimientoInventario']} movimientos, {opts['productos']} productos "
+            f'({time.perf_counter() - t0:.1f}s)'
+        )
+
+    def _medir(self, opts):
+        tiempos = []
+        consultas = 0
+        for _ in range(opts['repeticiones']):
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                calcular_metricas()
+                tiempos.append((time.perf_counter() - t0) * 1000)
+            consultas = len(ctx.captured_queries)
+        tiempos.sort()
+        p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+        self.stdout.write(
+            f'calcular_metricas: {consultas} consultas, p50 {statistics.median(tiempos):.1f} ms, '
+            f'p95 {p95:.1f} ms, max {tiempos[-1]:.1f} ms'
+        )
@@ -0,0 +1,22 @@
+"""Borra exportaciones terminadas antiguas y sus archivos.
+
+Uso (p. ej. desde cron, una vez al día):
+    python manage.py limpiar_exportaciones            # EXPORTACIONES_CONSERVAR_DIAS
+    python manage.py limpiar_exportaciones --dias 2
+"""
+
+from django.core.management.base import BaseCommand
+
+from reportes.trabajos import limpiar
+
+
+class Command(BaseCommand):
+    help = 'Borra las exportaciones terminadas hace más de N días junto con sus archivos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None,
+                            help='Días a conservar (por defecto EXPORTACIONES_CONSERVAR_DIAS).')
+
+    def handle(self, *args, **options):
+        n = limpiar(options['dias'])
+        self.stdout.write(f'{n} exportaciones borradas')
@@ -0,0 +1,29 @@
+"""Worker de exportaciones con respaldo en BD (EXPORTACIONES_BACKEND='bd').
+
+Uso:
+    python manage.py procesar_exportaciones           # procesa lo pendiente y termina
+    python manage.py procesar_exportaciones --loop 5  # revisa cada 5 segundos
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from reportes.trabajos import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Genera los archivos de exportaciones pendientes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', type=float, default=0, help='Segundos entre revisiones (0 = una sola pasada).')
+        parser.add_argument('--limite', type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            n = procesar_pendientes(options['limite'])
+            if n:
+                self.stdout.write(f'{n} exportaciones generadas')
+            if not options['loop']:
+                return
+            time.sleep(options['loop'])
@@ -0,0 +1,42 @@
+"""Calcula los pronósticos de demanda semanal por producto (ver `reportes.pronosticos`).
+
+Uso:
+    python manage.py pronosticar_demanda
+    python manage.py pronosticar_demanda --semanas 156 --horizonte 8 --procesos 4
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reportes import pronosticos
+from reportes.pronosticos import Parametros, pronosticar
+
+
+class Command(BaseCommand):
+    help = 'Ajusta media móvil, suavizado exponencial y estacional ingenuo a las ventas semanales y guarda el mejor.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--semanas', type=int, default=pronosticos.SEMANAS, help='Semanas de historia.')
+        parser.add_argument('--horizonte', type=int, default=pronosticos.HORIZONTE, help='Semanas a pronosticar.')
+        parser.add_argument('--ventana', type=int, default=pronosticos.VENTANA, help='Semanas de la media móvil.')
+        parser.add_argument('--alfa', type=float, default=pronosticos.ALFA, help='Factor del suavizado exponencial.')
+        parser.add_argument('--temporada', type=int, default=pronosticos.TEMPORADA, help='Semanas de la temporada.')
+        parser.add_argument('--evaluacion', type=int, default=pronosticos.EVALUACION,
+                            help='Últimas semanas con las que se elige el modelo.')
+        parser.add_argument('--procesos', type=int, help='Procesos del pool (por defecto, uno por CPU).')
+
+    def handle(self, *args, **opts):
+        parametros = Parametros(**{
+            nombre: opts[nombre] for nombre in ('semanas', 'horizonte', 'ventana', 'alfa', 'temporada', 'evaluacion')
+        })
+        inicio = time.perf_counter()
+        try:
+            resultado = pronosticar(parametros, procesos=opts['procesos'])
+        except (ValueError, RuntimeError) as e:
+            raise CommandError(str(e)) from e
+        modelos = ', '.join(f'{nombre}: {n}' for nombre, n in resultado.por_modelo.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado.productos} productos con ventas desde {resultado.desde} ({modelos}); '
+            f'{resultado.filas} pronósticos desde la semana {resultado.semana} en {time.perf_counter() - inicio:.1f}s'
+        ))
@@ -0,0 +1,62 @@
+"""Genera datos sintéticos (catálogos, ventas, compras y movimientos).
+
+Ver `reportes.sintetico` para el modelo de simulación. Con la misma semilla,
+volúmenes y `--hasta` sobre una BD vacía produce los mismos datos.
+
+Uso:
+    python manage.py seed_erp                                  # ~20k ventas, 1 año
+    python manage.py seed_erp --ventas 2000000 --productos 50000 --clientes 200000
+    python manage.py seed_erp --semilla 7 --hasta 2024-12-31 --prefijo S7-
+"""
+
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reportes.sintetico import Volumenes, sembrar
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError as e:
+        raise CommandError(f'Fecha inválida: {valor} (usa YYYY-MM-DD)') from e
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos realistas para pruebas de carga (deterministas por semilla).'
+
+    def add_arguments(self, parser):
+        defecto = Volumenes()
+        parser.add_argument('--categorias', type=int, default=defecto.categorias)
+        parser.add_argument('--proveedores', type=int, default=defecto.proveedores)
+        parser.add_argument('--productos', type=int, default=defecto.productos)
+        parser.add_argument('--clientes', type=int, default=defecto.clientes)
+        parser.add_argument('--ventas', type=int, default=defecto.ventas)
+        parser.add_argument('--items', type=int, default=defecto.items, help='Líneas promedio por venta.')
+        parser.add_argument('--dias', type=int, default=defecto.dias, help='Días de historia.')
+        parser.add_argument('--hasta', type=_fecha, help='Último día simulado (por defecto hoy).')
+        parser.add_argument('--semilla', type=int, default=defecto.semilla)
+        parser.add_argument('--prefijo', default=defecto.prefijo, help='Prefijo de códigos de producto.')
+        parser.add_argument('--lote', type=int, default=defecto.lote, help='Filas por INSERT/transacción.')
+        parser.add_argument('--sin-resumen', action='store_true', help='No reconstruir ResumenVentaDiaria.')
+
+    def handle(self, *args, **opts):
+        for campo in ('categorias', 'proveedores', 'productos', 'clientes', 'dias', 'items', 'lote'):
+            if opts[campo] < 1:
+                raise CommandError(f'--{campo} debe ser >= 1')
+        volumenes = Volumenes(
+            categorias=opts['categorias'], proveedores=opts['proveedores'], productos=opts['productos'],
+            clientes=opts['clientes'], ventas=opts['ventas'], items=opts['items'], dias=opts['dias'],
+            hasta=opts['hasta'], semilla=opts['semilla'], prefijo=opts['prefijo'], lote=opts['lote'],
+            resumen=not opts['sin_resumen'],
+        )
+        t0 = time.perf_counter()
+        try:
+            totales = sembrar(volumenes, escribir=self.stdout.write)
+        except ValueError as e:
+            raise CommandError(str(e)) from e
+        for modelo, filas in totales.items():
+            self.stdout.write(f'{modelo}: {filas}')
+        self.stdout.write(f'Listo en {time.perf_counter() - t0:.1f}s')
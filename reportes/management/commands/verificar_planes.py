@@ -0,0 +1,42 @@
+"""Verifica con EXPLAIN que las consultas frecuentes usen índices.
+
+Ejecuta las rutas reales de `reportes.planes` (dashboard, API, reportes
+CSV, planificador y pronóstico), captura su SQL y pide el plan de cada
+SELECT a la BD; falla si alguna tabla se recorre completa fuera de las
+excepciones documentadas en `reportes.planes.EXCEPCIONES`.
+
+Conviene correrlo con datos de volumen realista (con tablas casi vacías el
+optimizador de MySQL puede preferir el recorrido completo aunque exista el
+índice). Termina con error si alguna consulta falla, para usarlo en CI.
+
+Uso:
+    python manage.py verificar_planes [--verbose 2] [--solo api]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reportes.planes import verificar
+
+
+class Command(BaseCommand):
+    help = 'Verifica con EXPLAIN que las consultas frecuentes no recorran tablas completas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--solo', help='Solo los escenarios cuyo nombre contiene este texto.')
+
+    def handle(self, *args, **opts):
+        fallas = 0
+        for consulta in verificar(opts['solo']):
+            if not consulta.ok:
+                fallas += 1
+                self.stdout.write(self.style.ERROR(
+                    f'FALLA {consulta.escenario}: recorrido completo de {", ".join(consulta.recorridos)}'
+                ))
+            elif consulta.motivos:
+                self.stdout.write(self.style.WARNING(f'aviso {consulta.escenario}: {"; ".join(consulta.motivos)}'))
+            else:
+                self.stdout.write(f'ok    {consulta.escenario}')
+            if opts['verbosity'] > 1 or not consulta.ok:
+                self.stdout.write(f'      {consulta.sql}\n      {consulta.plan.replace(chr(10), chr(10) + "      ")}')
+        if fallas:
+            raise CommandError(f'{fallas} consultas sin índice')
@@ -0,0 +1,201 @@
+"""Métricas del dashboard (vista HTML y /api/dashboard/).
+
+`calcular_metricas()` resume ventas, compras e inventario en 7 consultas fijas:
+
+1. Ventas: totales y conteos de hoy, mes y histórico con agregación
+   condicional sobre la columna guardada `PedidoVenta.total`
+2. Compras pendientes
+3. Stock total
+4. Top productos vendidos (desde ResumenVentaDiaria, agrupado por producto)
+5. Nombre y código de esos productos
+6. Productos con stock bajo
+7. Últimas ventas
+
+`metricas_dashboard()` es la versión cacheada que usan las vistas. La llave
+incluye la fecha local y un número de versión que se incrementa (al confirmar
+la transacción) cuando cambian ventas, compras, productos o movimientos
+(ver `reportes.signals`). `METRICAS_CACHE_TTL` acota la antigüedad máxima
+para cambios que no pasan por esas señales.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from compras.models import OrdenCompra
+from inventario.models import Producto
+from ventas.models import PedidoVenta, ResumenVentaDiaria
+
+STOCK_BAJO = 5
+TOP_N = 5
+
+_MONEDA = DecimalField(max_digits=14, decimal_places=2)
+
+VERSION_KEY = 'metricas:version'
+
+
+@dataclass(frozen=True)
+class MetricasDashboard:
+    """Resultado de `calcular_metricas`; las listas son dicts listos para JSON."""
+    fecha: date
+    total_hoy: Decimal
+    total_mes: Decimal
+    total_completado: Decimal
+    ventas_mes_count: int
+    ventas_pendientes: int
+    compras_pendientes: int
+    stock_total: int
+    top_productos: list = field(default_factory=list)
+    stock_bajo: list = field(default_factory=list)
+    ultimas_ventas: list = field(default_factory=list)
+
+    def as_json(self) -> dict:
+        """Forma de la respuesta de /api/dashboard/."""
+        return {
+            'total_hoy': str(self.total_hoy),
+            'total_mes': str(self.total_mes),
+            'total_completado': str(self.total_completado),
+            'ventas_mes_count': self.ventas_mes_count,
+            'ventas_pendientes': self.ventas_pendientes,
+            'compras_pendientes': self.compras_pendientes,
+            'top_productos': self.top_productos,
+            'stock_bajo': self.stock_bajo,
+            'stock_total': self.stock_total,
+            'ultimas_ventas': self.ultimas_ventas,
+        }
+
+
+def _dinero(valor) -> Decimal:
+    return Decimal(valor).quantize(Decimal('0.01'))
+
+
+def _suma(filtro):
+    return Coalesce(Sum('total', filter=filtro), Value(Decimal('0.00')), output_field=_MONEDA)
+
+
+def calcular_metricas(hoy: date | None = None) -> MetricasDashboard:
+    """Calcula las métricas del dashboard para `hoy` (fecha local por defecto)."""
+    hoy = hoy or timezone.localdate()
+    inicio_mes = hoy.replace(day=1)
+
+    completado = Q(estado='completado')
+    del_mes = completado & Q(fecha__gte=inicio_mes, fecha__lte=hoy)
+    # Solo estados que cuentan: el filtro deja usar el índice (estado, fecha)
+    ventas = PedidoVenta.objects.filter(estado__in=('completado', 'pendiente')).aggregate(
+        total_hoy=_suma(completado & Q(fecha=hoy)),
+        total_mes=_suma(del_mes),
+        total_completado=_suma(completado),
+        ventas_mes_count=Count('id', filter=del_mes),
+        ventas_pendientes=Count('id', filter=Q(estado='pendiente')),
+    )
+
+    compras_pendientes = OrdenCompra.objects.filter(estado='pendiente').count()
+    stock_total = Producto.objects.aggregate(total=Sum('cantidad_en_inventario'))['total'] or 0
+
+    # Se agrupa solo el resumen; nombre y código se leen después para los TOP_N
+    top = list(
+        ResumenVentaDiaria.objects.values('producto_id')
+        .annotate(unidades=Sum('unidades'), monto=Sum('monto'))
+        .order_by('-unidades', 'producto_id')[:TOP_N]
+    )
+    nombres = dict(
+        (pid, (nombre, codigo)) for pid, nombre, codigo in
+        Producto.objects.filter(pk__in=[t['producto_id'] for t in top]).values_list('pk', 'nombre', 'codigo')
+    )
+    top_productos = [
+        {'producto__nombre': nombres[t['producto_id']][0], 'producto__codigo': nombres[t['producto_id']][1],
+         'unidades': t['unidades'], 'monto': t['monto']}
+        for t in top
+    ]
+    stock_bajo = list(
+        Producto.objects.filter(cantidad_en_inventario__lte=STOCK_BAJO)
+        .order_by('cantidad_en_inventario')
+        .values('id', 'nombre', 'cantidad_en_inventario')[:TOP_N]
+    )
+    ultimas_ventas = list(
+        PedidoVenta.objects.order_by('-fecha', '-id')
+        .values('id', 'numero', 'cliente__nombre_completo', 'fecha', 'estado', monto=F('total'))[:TOP_N]
+    )
+
+    return MetricasDashboard(
+        fecha=hoy,
+        total_hoy=_dinero(ventas['total_hoy']),
+        total_mes=_dinero(ventas['total_mes']),
+        total_completado=_dinero(ventas['total_completado']),
+        ventas_mes_count=ventas['ventas_mes_count'],
+        ventas_pendientes=ventas['ventas_pendientes'],
+        compras_pendientes=compras_pendientes,
+        stock_total=stock_total,
+        top_productos=top_productos,
+        stock_bajo=stock_bajo,
+        ultimas_ventas=ultimas_ventas,
+    )
+
+
+def _cache():
+    return caches[getattr(settings, 'METRICAS_CACHE', 'default')]
+
+
+def version_metricas() -> int:
+    cache = _cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, timeout=None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def invalidar_metricas():
+    """Pasa a una nueva versión; las entradas anteriores expiran solas."""
+    cache = _cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # La llave no existe (caché recién iniciada o purgada)
+        cache.add(VERSION_KEY, 1, timeout=None)
+
+
+def metricas_dashboard(hoy: date | None = None) -> MetricasDashboard:
+    """`calcular_metricas` cacheado por fecha local y versión de datos."""
+    hoy = hoy or timezone.localdate()
+    ttl = getattr(settings, 'METRICAS_CACHE_TTL', 60)
+    if not ttl:
+        return calcular_metricas(hoy)
+    key = f'metricas:{version_metricas()}:{hoy.isoformat()}'
+    cache = _cache()
+    metricas = cache.get(key)
+    if metricas is None:
+        metricas = calcular_metricas(hoy)
+        cache.set(key, metricas, timeout=ttl)
+    return metricas
+
+
+def resumen_ventas(desde=None, hasta=None, cliente_id=None, producto_id=None) -> dict:
+    """Unidades y monto de ventas completadas en un rango, desde el resumen diario.
+
+    El costo depende del número de días/productos/clientes del rango, no del
+    número de ítems vendidos. Incluye la serie `por_dia` para gráficas.
+    """
+    qs = ResumenVentaDiaria.objects.all()
+    if desde:
+        qs = qs.filter(fecha__gte=desde)
+    if hasta:
+        qs = qs.filter(fecha__lte=hasta)
+    if cliente_id:
+        qs = qs.filter(cliente_id=cliente_id)
+    if producto_id:
+        qs = qs.filter(producto_id=producto_id)
+    por_dia = list(
+        qs.values('fecha').annotate(unidades=Sum('unidades'), monto=Sum('monto')).order_by('fecha')
+    )
+    return {
+        'unidades': sum(d['unidades'] for d in por_dia),
+        'monto': _dinero(sum((d['monto'] for d in por_dia), Decimal('0.00'))),
+        'por_dia': por_dia,
+    }
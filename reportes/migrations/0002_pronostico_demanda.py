@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0006_fecha_actualizado'),
+        ('reportes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PronosticoDemanda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semana', models.DateField()),
+                ('modelo', models.CharField(choices=[('media_movil', 'Media móvil'), ('suavizado', 'Suavizado exponencial'), ('estacional', 'Estacional ingenuo')], max_length=12)),
+                ('unidades', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('error', models.DecimalField(decimal_places=2, max_digits=12, null=True)),
+                ('calculado', models.DateTimeField()),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventario.producto')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='pronosticodemanda',
+            constraint=models.UniqueConstraint(fields=('producto', 'semana'), name='pronostico_producto_semana'),
+        ),
+    ]
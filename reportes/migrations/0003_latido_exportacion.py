@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportes', '0002_pronostico_demanda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajoexportacion',
+            name='iniciado',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='trabajoexportacion',
+            name='latido',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,76 @@
+"""Modelos de reportes.
+
+- TrabajoExportacion: exportación CSV generada en segundo plano. Se reutiliza
+  mientras `huella` (reporte + filtros + estado de los datos) no cambie y,
+  si está en proceso, mientras su worker siga dando señales (`latido`).
+- PronosticoDemanda: unidades pronosticadas por producto y semana (ver
+  `reportes.pronosticos`).
+"""
+
+from django.conf import settings
+from django.db import models
+
+from inventario.models import Producto
+
+
+class TrabajoExportacion(models.Model):
+    """Trabajo de exportación de un reporte y su archivo generado."""
+    PENDIENTE = 'pendiente'
+    PROCESANDO = 'procesando'
+    LISTO = 'listo'
+    ERROR = 'error'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (PROCESANDO, 'Procesando'),
+        (LISTO, 'Listo'),
+        (ERROR, 'Error'),
+    ]
+
+    reporte = models.CharField(max_length=20)
+    filtros = models.JSONField(default=dict)
+    huella = models.CharField(max_length=64, db_index=True)
+    estado = models.CharField(max_length=12, choices=ESTADOS, default=PENDIENTE)
+    archivo = models.FileField(upload_to='exportaciones/', blank=True)
+    filas = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    creado = models.DateTimeField(auto_now_add=True)
+    iniciado = models.DateTimeField(null=True, blank=True)
+    latido = models.DateTimeField(null=True, blank=True)  # última señal del worker mientras genera
+    terminado = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['estado', 'creado'], name='exportacion_estado_creado')]
+
+    def __str__(self):
+        return f"Exportación {self.reporte} #{self.pk} ({self.estado})"
+
+
+class PronosticoDemanda(models.Model):
+    """Unidades pronosticadas de un producto para la semana que empieza en `semana` (lunes).
+
+    `manage.py pronosticar_demanda` reemplaza la tabla completa; solo tiene
+    los productos con ventas en la historia usada. `error` es el error
+    absoluto medio semanal del modelo elegido (nulo si la historia no
+    alcanzó para medirlo).
+    """
+    MODELOS = [
+        ('media_movil', 'Media móvil'),
+        ('suavizado', 'Suavizado exponencial'),
+        ('estacional', 'Estacional ingenuo'),
+    ]
+
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='+')
+    semana = models.DateField()
+    modelo = models.CharField(max_length=12, choices=MODELOS)
+    unidades = models.DecimalField(max_digits=12, decimal_places=2)
+    error = models.DecimalField(max_digits=12, decimal_places=2, null=True)
+    calculado = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['producto', 'semana'], name='pronostico_producto_semana'),
+        ]
+
+    def __str__(self):
+        return f"{self.producto_id} {self.semana}: {self.unidades}"
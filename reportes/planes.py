@@ -0,0 +1,230 @@
+"""Planes de ejecución de las consultas reales de las rutas frecuentes.
+
+Cada escenario ejecuta código de la aplicación tal cual (métricas del
+dashboard, vistas de `api.views` con una petición GET interna, reportes
+CSV, cargas del planificador y del pronóstico) y captura el SQL que emite
+con `CaptureQueriesContext`. A cada SELECT capturado se le pide el plan y se
+marca si alguna tabla se recorre completa:
+
+- SQLite: `SCAN <tabla>` (también `USING INDEX`: recorre el índice entero)
+- MySQL: `access_type` `ALL` o `index`
+- PostgreSQL: `Seq Scan`
+
+Las lecturas completas por diseño (p. ej. exportar el catálogo entero) se
+listan en `EXCEPCIONES` con su motivo. Todo corre en una transacción que se
+deshace al terminar. Con tablas casi
+vacías el optimizador de MySQL/PostgreSQL puede preferir el recorrido
+completo aunque exista el índice: conviene verificarlo con datos de volumen
+realista (`seed_erp`). Lo usan `manage.py verificar_planes` y las pruebas.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+
+from inventario.models import MovimientoInventario, Producto
+from ventas.models import PedidoVenta
+
+from . import exportaciones
+from .metricas import calcular_metricas
+
+
+# Lecturas completas por diseño: (escenario, tabla, fragmento del SQL sin comillas) -> motivo
+EXCEPCIONES = {
+    ('dashboard: métricas', 'inventario_producto', 'SUM(inventario_producto.cantidad_en_inventario)'):
+        'el stock total suma todos los productos (sobre el índice cubriente producto_stock)',
+    ('dashboard: métricas', 'ventas_resumenventadiaria', 'GROUP BY ventas_resumenventadiaria.producto_id'):
+        'el top histórico agrega todo el resumen diario, sin leer la tabla de productos',
+    ('api movimientos: referencia parcial', 'inventario_movimientoinventario', 'LIKE'):
+        'buscar texto en cualquier parte de la referencia no puede usar índices; '
+        'para un documento está `referencia_exacta`',
+    ('csv inventario', 'inventario_producto', 'FROM inventario_producto INNER JOIN'):
+        'el reporte exporta el catálogo completo',
+    ('csv inventario: al cierre', 'inventario_producto', 'FROM inventario_producto INNER JOIN'):
+        'el reporte exporta el catálogo completo',
+}
+
+
+@dataclass
+class Consulta:
+    escenario: str
+    sql: str
+    plan: str
+    recorridos: list  # tablas recorridas completas sin excepción
+    motivos: list  # explicación de los recorridos completos aceptados
+
+    @property
+    def ok(self) -> bool:
+        return not self.recorridos
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _api(ruta, **params):
+    """Llama a la vista de `ruta` con un GET interno de un usuario staff (sin sesión ni middleware)."""
+    def ejecutar():
+        request = RequestFactory().get(ruta, params)
+        request.user = User(username='verificar_planes', is_staff=True)
+        match = resolve(ruta)
+        respuesta = match.func(request, *match.args, **match.kwargs)
+        if respuesta.status_code != 200:
+            raise RuntimeError(f'GET {ruta}: {respuesta.status_code} {respuesta.content[:200]}')
+    return ejecutar
+
+
+def _csv(reporte, **params):
+    def ejecutar():
+        for _ in exportaciones.lineas_csv(exportaciones.REPORTES[reporte](params)):
+            pass
+    return ejecutar
+
+
+def escenarios() -> list:
+    """(nombre, función) de las rutas frecuentes, con ids y fechas tomados de los datos."""
+    from compras import reposicion
+    from . import pronosticos
+
+    hoy = timezone.localdate()
+    hace_un_mes = hoy - timedelta(days=30)
+    producto = Producto.objects.order_by('id').values_list('id', flat=True).first() or 1
+    venta = PedidoVenta.objects.order_by('-id').values_list('numero', flat=True).first() or 'V-0001'
+    lista = [
+        ('dashboard: métricas', calcular_metricas),
+        ('api ventas: listado', _api('/api/ventas/')),
+        ('api ventas: por total', _api('/api/ventas/', orden='-total')),
+        ('api compras: listado', _api('/api/compras/')),
+        ('api inventario: listado', _api('/api/inventario/')),
+        ('api inventario: stock bajo', _api('/api/inventario/', min=5)),
+        ('api movimientos: listado', _api('/api/inventario/movimientos/')),
+        ('api movimientos: por producto', _api('/api/inventario/movimientos/', producto=producto)),
+        ('api movimientos: por tipo y fecha',
+         _api('/api/inventario/movimientos/', tipo=MovimientoInventario.SALIDA, desde=hace_un_mes.isoformat())),
+        ('api movimientos: por referencia', _api('/api/inventario/movimientos/', referencia_exacta=venta)),
+        ('api movimientos: referencia parcial', _api('/api/inventario/movimientos/', referencia=venta)),
+        ('api productos: búsqueda', _api('/api/productos/buscar/', q='torn')),
+        ('api existencias: al cierre', _api('/api/inventario/existencias/', fecha=hace_un_mes.isoformat())),
+        ('csv ventas: último mes', _csv('ventas', desde=hace_un_mes.isoformat(), hasta=hoy.isoformat())),
+        ('csv compras: último mes', _csv('compras', desde=hace_un_mes.isoformat(), hasta=hoy.isoformat())),
+        ('csv inventario', _csv('inventario')),
+        ('csv inventario: al cierre', _csv('inventario', fecha=hace_un_mes.isoformat())),
+        ('reposición: salidas y pedidos en camino',
+         lambda: (reposicion._salidas(hace_un_mes, 30), reposicion._en_camino())),
+    ]
+    if pronosticos.np is not None:
+        lista.append(('pronósticos: ventas de una semana', lambda: pronosticos._matriz(hace_un_mes, 1)))
+    return lista
+
+
+def explicar(sql: str) -> str:
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return '\n'.join(str(fila[-1]) for fila in cursor.fetchall())
+        if connection.vendor == 'mysql':
+            cursor.execute(f'EXPLAIN FORMAT=JSON {sql}')
+            return cursor.fetchone()[0]
+        cursor.execute(f'EXPLAIN {sql}')
+        return '\n'.join(str(fila[0]) for fila in cursor.fetchall())
+
+
+def _sin_subconsultas(sql: str) -> str:
+    """`sql` sin nada entre paréntesis (subconsultas, listas de columnas y de valores)."""
+    anterior = None
+    while anterior != sql:
+        anterior, sql = sql, re.sub(r'\([^()]*\)', '', sql)
+    return sql
+
+
+def recorridos_completos(plan: str, sql: str = '') -> list:
+    """Tablas que el plan recorre completas, por la tabla o por un índice.
+
+    Un recorrido en el orden pedido de una consulta con LIMIT y sin WHERE
+    (fuera de subconsultas) ni orden aparte se detiene al llenar la página:
+    el primero no cuenta. Con un filtro puede recorrer la tabla entera antes
+    de encontrar las filas, así que esos sí cuentan.
+    """
+    acotado = (
+        re.search(r'\bLIMIT\s+\d+\s*$', sql.strip(), re.IGNORECASE) is not None
+        and re.search(r'\bWHERE\b', _sin_subconsultas(sql), re.IGNORECASE) is None
+    )
+    if connection.vendor == 'sqlite':
+        tablas = re.findall(r'^\s*SCAN (?:TABLE )?(\w+)(?! CONSTANT ROW)', plan, re.MULTILINE)
+        if acotado and 'USE TEMP B-TREE FOR ORDER BY' not in plan:
+            tablas = tablas[1:]
+        return tablas
+    if connection.vendor == 'mysql':
+        tablas = []
+
+        def buscar(nodo):
+            if isinstance(nodo, dict):
+                if nodo.get('access_type') in ('ALL', 'index'):
+                    tablas.append(nodo.get('table_name', '?'))
+                for v in nodo.values():
+                    buscar(v)
+            elif isinstance(nodo, list):
+                for v in nodo:
+                    buscar(v)
+
+        datos = json.loads(plan)
+        buscar(datos)
+        if acotado and '"using_filesort": true' not in plan:
+            tablas = tablas[1:]
+        return tablas
+    if connection.vendor == 'postgresql':
+        return re.findall(r'Seq Scan on (\w+)', plan)
+    return []
+
+
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTA = re.compile(r'\((?:\?, )+\?\)')
+
+
+def _forma(sql: str) -> str:
+    """`sql` sin literales: consultas que solo difieren en valores tienen la misma forma."""
+    return _LISTA.sub('(?)', _LITERAL.sub('?', sql))
+
+
+def capturar(funcion) -> list[str]:
+    """SELECTs que ejecuta `funcion`, uno por forma."""
+    with CaptureQueriesContext(connection) as ctx:
+        funcion()
+    formas = {}
+    for q in ctx.captured_queries:
+        if q['sql'].lstrip().upper().startswith('SELECT'):
+            formas.setdefault(_forma(q['sql']), q['sql'])
+    return list(formas.values())
+
+
+def verificar(seleccion=None) -> list[Consulta]:
+    """Consultas de los escenarios (o de los que contienen `seleccion`) con su plan."""
+    resultado = []
+    try:
+        with transaction.atomic():
+            for nombre, funcion in escenarios():
+                if seleccion and seleccion not in nombre:
+                    continue
+                for sql in capturar(funcion):
+                    plan = explicar(sql)
+                    plano = re.sub(r'["`]', '', sql)
+                    recorridos, motivos = [], []
+                    for tabla in recorridos_completos(plan, sql):
+                        motivo = next((
+                            m for (e, t, fragmento), m in EXCEPCIONES.items()
+                            if e == nombre and t == tabla and fragmento in plano
+                        ), None)
+                        (motivos if motivo else recorridos).append(motivo or tabla)
+                    resultado.append(Consulta(nombre, sql, plan, recorridos, motivos))
+            raise _Rollback
+    except _Rollback:
+        pass
+    return resultado
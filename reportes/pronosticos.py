@@ -0,0 +1,184 @@
+"""Pronóstico de demanda semanal por producto (modelos en `reportes.series`).
+
+1. Matriz producto × semana con las unidades de PedidoVentaItem de pedidos
+   completados: una consulta (índice estado/fecha de PedidoVenta) agrupada
+   por producto y semana; la semana sale de un CASE sobre las fechas de
+   inicio. Solo entran los productos con ventas en la historia; los demás
+   no tienen pronóstico guardado (demanda 0).
+2. Las filas se reparten en bloques de `LOTE` productos entre un pool de
+   `procesos` procesos. Cada bloque ajusta media móvil, suavizado
+   exponencial y estacional ingenuo con operaciones sobre arreglos y elige
+   por producto el modelo de menor error absoluto medio en las últimas
+   `evaluacion` semanas. Dentro de una transacción abierta no se usa el
+   pool (habría que cerrar las conexiones para que los hijos no las
+   hereden): todo corre en el proceso actual.
+3. La tabla PronosticoDemanda se reemplaza completa en una transacción
+   (`executemany`, sin instanciar modelos).
+
+Las semanas empiezan el lunes: la historia termina el domingo anterior a
+`hoy` y la semana en curso es la primera pronosticada.
+
+Requiere NumPy.
+"""
+
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from itertools import repeat
+
+try:
+    import numpy as np
+
+    from . import series
+except ImportError:  # NumPy es opcional para el resto del proyecto
+    np = series = None
+
+from django.db import connection, connections, transaction
+from django.db.models import Case, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from ventas.models import PedidoVentaItem
+
+from .models import PronosticoDemanda
+
+SEMANAS = 104
+HORIZONTE = 4
+VENTANA = 4  # semanas de la media móvil
+ALFA = 0.3
+TEMPORADA = 52
+EVALUACION = 13  # semanas para comparar los modelos
+LOTE = 20000  # productos por tarea del pool
+LOTE_INSERCION = 5000
+
+
+@dataclass(frozen=True)
+class Parametros:
+    semanas: int = SEMANAS
+    horizonte: int = HORIZONTE
+    ventana: int = VENTANA
+    alfa: float = ALFA
+    temporada: int = TEMPORADA
+    evaluacion: int = EVALUACION
+
+    def validar(self):
+        """Lanza ValueError si los parámetros no permiten comparar los modelos."""
+        if min(self.horizonte, self.ventana, self.temporada, self.evaluacion) < 1:
+            raise ValueError('horizonte, ventana, temporada y evaluacion deben ser positivos')
+        if not 0 < self.alfa <= 1:
+            raise ValueError('alfa debe estar entre 0 y 1')
+        if self.semanas < self.ventana + self.evaluacion:
+            raise ValueError('semanas debe cubrir al menos ventana + evaluacion')
+
+
+@dataclass
+class Resultado:
+    desde: date  # lunes de la primera semana de historia
+    semana: date  # lunes de la primera semana pronosticada
+    productos: int = 0
+    filas: int = 0
+    por_modelo: dict = field(default_factory=dict)  # modelo -> productos
+
+
+def inicio_semana(dia: date) -> date:
+    return dia - timedelta(days=dia.weekday())
+
+
+def _matriz(desde: date, semanas: int):
+    """(producto_ids, Y) de los productos con ventas completadas desde `desde`; una consulta."""
+    if semanas <= 0:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float32)
+    inicios = [desde + timedelta(weeks=s) for s in range(1, semanas + 1)]
+    semana = Case(
+        *[When(pedido__fecha__lt=inicio, then=Value(s)) for s, inicio in enumerate(inicios)],
+        output_field=IntegerField(),
+    )
+    filas = list(
+        PedidoVentaItem.objects.filter(
+            pedido__estado='completado', pedido__fecha__gte=desde, pedido__fecha__lt=inicios[-1],
+        ).order_by()
+        .annotate(semana=semana)
+        .values('producto_id', 'semana')
+        .annotate(unidades=Sum('cantidad'))
+        .values_list('producto_id', 'semana', 'unidades')
+    )
+    if not filas:
+        return np.zeros(0, dtype=np.int64), np.zeros((0, semanas), dtype=np.float32)
+    datos = np.array(filas, dtype=np.int64)
+    producto_ids, fila = np.unique(datos[:, 0], return_inverse=True)
+    Y = np.zeros((len(producto_ids), semanas), dtype=np.float32)
+    Y[fila, datos[:, 1]] = datos[:, 2]  # un valor por producto y semana
+    return producto_ids, Y
+
+
+def _ajustar(Y, p: Parametros, procesos: int):
+    """`series.pronosticar` sobre bloques de `LOTE` filas, en paralelo si hay más de uno.
+
+    Dentro de una transacción corre en este proceso: cerrar las conexiones
+    para el pool la perdería.
+    """
+    bloques = [Y[i:i + LOTE] for i in range(0, len(Y), LOTE)] or [Y]
+    argumentos = (repeat(p.horizonte), repeat(p.ventana), repeat(p.alfa), repeat(p.temporada), repeat(p.evaluacion))
+    en_transaccion = any(c.in_atomic_block for c in connections.all(initialized_only=True))
+    if procesos <= 1 or len(bloques) == 1 or en_transaccion:
+        partes = list(map(series.pronosticar, bloques, *argumentos))
+    else:
+        # Los procesos hijos no deben heredar conexiones abiertas a la BD
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=min(procesos, len(bloques))) as pool:
+            partes = list(pool.map(series.pronosticar, bloques, *argumentos))
+    return tuple(np.concatenate(columna) for columna in zip(*partes))
+
+
+def _filas(producto_ids, modelo, error, pronostico, semana: date, calculado):
+    """Filas (producto, semana, modelo, unidades, error, calculado) para `executemany`."""
+    semanas = [connection.ops.adapt_datefield_value(semana + timedelta(weeks=h)) for h in range(pronostico.shape[1])]
+    calculado = connection.ops.adapt_datetimefield_value(calculado)
+    errores = [None if not np.isfinite(e) else round(e, 2) for e in error.tolist()]
+    for pid, m, e, valores in zip(producto_ids.tolist(), modelo.tolist(), errores, pronostico.tolist()):
+        for dia, unidades in zip(semanas, valores):
+            yield pid, dia, series.MODELOS[m], round(unidades, 2), e, calculado
+
+
+def _guardar(filas):
+    opts = PronosticoDemanda._meta
+    campos = ('producto', 'semana', 'modelo', 'unidades', 'error', 'calculado')
+    columnas = ', '.join(connection.ops.quote_name(opts.get_field(c).column) for c in campos)
+    sql = f'INSERT INTO {connection.ops.quote_name(opts.db_table)} ({columnas}) VALUES ({", ".join(["%s"] * len(campos))})'
+    total = 0
+    with transaction.atomic():
+        PronosticoDemanda.objects.all().delete()
+        with connection.cursor() as cursor:
+            bloque = []
+            for fila in filas:
+                bloque.append(fila)
+                if len(bloque) >= LOTE_INSERCION:
+                    cursor.executemany(sql, bloque)
+                    total += len(bloque)
+                    bloque = []
+            if bloque:
+                cursor.executemany(sql, bloque)
+                total += len(bloque)
+    return total
+
+
+def pronosticar(parametros: Parametros = Parametros(), hoy: date | None = None, procesos: int | None = None) -> Resultado:
+    """Calcula y guarda los pronósticos; devuelve el resumen.
+
+    Lanza ValueError si los parámetros no son válidos y RuntimeError si
+    NumPy no está instalado.
+    """
+    if np is None:
+        raise RuntimeError('El pronóstico de demanda requiere NumPy (pip install numpy)')
+    parametros.validar()
+    semana = inicio_semana(hoy or timezone.localdate())
+    desde = semana - timedelta(weeks=parametros.semanas)
+    producto_ids, Y = _matriz(desde, parametros.semanas)
+    modelo, error, pronostico = _ajustar(Y, parametros, procesos or os.cpu_count() or 1)
+    filas = _guardar(_filas(producto_ids, modelo, error, pronostico, semana, timezone.now()))
+    conteo = Counter(modelo.tolist())
+    return Resultado(
+        desde=desde, semana=semana, productos=len(producto_ids), filas=filas,
+        por_modelo={nombre: conteo.get(i, 0) for i, nombre in enumerate(series.MODELOS)},
+    )
@@ -0,0 +1,76 @@
+"""Modelos de pronóstico sobre una matriz producto × semana (solo NumPy).
+
+`Y` tiene una fila por producto y una columna por semana (unidades
+vendidas, de la más antigua a la más reciente). Cada modelo trabaja sobre
+todas las filas a la vez; los únicos bucles son sobre las semanas. El
+módulo no importa Django para que lo puedan cargar los procesos del pool
+de `reportes.pronosticos`.
+
+Cada modelo devuelve `(ajuste, pronostico)`:
+
+- `ajuste`: pronóstico a un paso de cada semana observada (NaN mientras el
+  modelo no tiene historia suficiente), para medir el error
+- `pronostico`: las `horizonte` semanas siguientes
+"""
+
+import numpy as np
+
+MODELOS = ('media_movil', 'suavizado', 'estacional')
+
+
+def media_movil(Y, horizonte: int, ventana: int):
+    """Promedio de las últimas `ventana` semanas."""
+    n, w = Y.shape
+    acumulado = np.zeros((n, w + 1), dtype=Y.dtype)
+    np.cumsum(Y, axis=1, out=acumulado[:, 1:])
+    ajuste = np.full((n, w), np.nan, dtype=Y.dtype)
+    if w > ventana:
+        ajuste[:, ventana:] = (acumulado[:, ventana:w] - acumulado[:, :w - ventana]) / ventana
+    siguiente = (acumulado[:, w] - acumulado[:, max(w - ventana, 0)]) / max(min(ventana, w), 1)
+    return ajuste, np.repeat(siguiente[:, None], horizonte, axis=1)
+
+
+def suavizado(Y, horizonte: int, alfa: float):
+    """Suavizado exponencial simple: nivel = alfa · venta + (1 - alfa) · nivel anterior."""
+    n, w = Y.shape
+    ajuste = np.full((n, w), np.nan, dtype=Y.dtype)
+    nivel = Y[:, 0].copy() if w else np.zeros(n, dtype=Y.dtype)
+    for t in range(1, w):
+        ajuste[:, t] = nivel
+        nivel = alfa * Y[:, t] + (1 - alfa) * nivel
+    return ajuste, np.repeat(nivel[:, None], horizonte, axis=1)
+
+
+def estacional(Y, horizonte: int, temporada: int):
+    """Estacional ingenuo: lo vendido la misma semana de la temporada anterior."""
+    n, w = Y.shape
+    ajuste = np.full((n, w), np.nan, dtype=Y.dtype)
+    if w < temporada:
+        return ajuste, np.full((n, horizonte), np.nan, dtype=Y.dtype)
+    ajuste[:, temporada:] = Y[:, :w - temporada]
+    return ajuste, Y[:, w - temporada + np.arange(horizonte) % temporada]
+
+
+def error_medio(Y, ajuste, evaluacion: int):
+    """Error absoluto medio de `ajuste` en las últimas `evaluacion` semanas (inf si no cubre el tramo)."""
+    tramo = slice(Y.shape[1] - evaluacion, None)
+    error = np.mean(np.abs(Y[:, tramo] - ajuste[:, tramo]), axis=1)
+    return np.where(np.isnan(error), np.inf, error)
+
+
+def pronosticar(Y, horizonte: int, ventana: int, alfa: float, temporada: int, evaluacion: int):
+    """Ajusta los tres modelos y elige por fila el de menor error.
+
+    Devuelve `(modelo, error, pronostico)`: índice en `MODELOS`, error
+    absoluto medio del elegido y sus `horizonte` semanas siguientes.
+    """
+    resultados = (
+        media_movil(Y, horizonte, ventana),
+        suavizado(Y, horizonte, alfa),
+        estacional(Y, horizonte, temporada),
+    )
+    errores = np.stack([error_medio(Y, ajuste, evaluacion) for ajuste, _ in resultados])
+    modelo = np.argmin(errores, axis=0)
+    filas = np.arange(Y.shape[0])
+    pronosticos = np.stack([pronostico for _, pronostico in resultados])
+    return modelo, errores[modelo, filas], pronosticos[modelo, filas]
@@ -0,0 +1,36 @@
+"""Invalida la caché de métricas del dashboard cuando cambian los datos.
+
+La invalidación se difiere a `transaction.on_commit` para que ninguna petición
+concurrente recalcule y guarde métricas con datos aún no confirmados bajo la
+nueva versión.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from compras.models import OrdenCompra
+from inventario.models import MovimientoInventario, Producto
+from inventario.signals import movimientos_aplicados, productos_importados
+from ventas.models import PedidoVenta, PedidoVentaItem
+
+from .metricas import invalidar_metricas
+
+
+def _invalidar(**kwargs):
+    transaction.on_commit(invalidar_metricas)
+
+
+for modelo in (PedidoVenta, PedidoVentaItem, OrdenCompra, MovimientoInventario, Producto):
+    post_save.connect(_invalidar, sender=modelo, dispatch_uid=f'metricas_save_{modelo.__name__}')
+    post_delete.connect(_invalidar, sender=modelo, dispatch_uid=f'metricas_delete_{modelo.__name__}')
+
+
+@receiver(movimientos_aplicados, dispatch_uid='metricas_movimientos')
+def _movimientos_aplicados(sender, **kwargs):
+    _invalidar()
+
+
+@receiver(productos_importados, dispatch_uid='metricas_importacion')
+def _productos_importados(sender, **kwargs):
+    _invalidar()
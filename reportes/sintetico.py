@@ -0,0 +1,298 @@
+"""Generador de datos sintéticos para pruebas de carga y escala.
+
+`sembrar(Volumenes(...))` genera categorías, proveedores, productos,
+clientes, ventas y compras con sus ítems y los MovimientoInventario que les
+corresponden, simulando la operación día por día:
+
+- cada producto arranca con un inventario inicial (movimiento de entrada)
+- las ventas eligen productos con popularidad sesgada (pocos productos
+  concentran la mayoría de las ventas); una venta completada solo consume
+  el stock disponible y genera sus salidas
+- al bajar del punto de reorden, el producto entra en la orden de compra
+  del día de su proveedor; las órdenes recibidas generan entradas
+
+Al final `cantidad_en_inventario` coincide con la suma de movimientos,
+`total`/`num_items` con los ítems, ResumenVentaDiaria con las ventas y el
+índice de búsqueda con los productos.
+
+Es determinista: con la misma semilla, los mismos volúmenes y la misma fecha
+`hasta`, sobre una BD vacía, genera exactamente los mismos datos. Los ids se
+asignan en Python, los valores se adaptan al motor una sola vez (precios por
+producto, fechas por día/pedido) y las filas se insertan con `executemany`
+en lotes de `lote` (sin instanciar modelos ni disparar señales), una
+transacción por lote, así que funciona igual en MySQL y en SQLite y la
+memoria no crece con el volumen.
+"""
+
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import F, Max, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from compras.models import OrdenCompra, OrdenCompraItem
+from inventario import busqueda, secuencias
+from inventario.precios import invalidar_precios
+from inventario.models import CategoriaProducto, MovimientoInventario, Producto, Proveedor, SecuenciaDocumento
+from ventas.models import Cliente, PedidoVenta, PedidoVentaItem, ResumenVentaDiaria
+
+from .metricas import invalidar_metricas
+
+NOMBRES = ['Ana', 'Luis', 'María', 'José', 'Carmen', 'Jorge', 'Lucía', 'Pedro', 'Sofía', 'Miguel', 'Elena', 'Raúl']
+APELLIDOS = ['García', 'López', 'Martínez', 'Hernández', 'Pérez', 'Sánchez', 'Ramírez', 'Torres', 'Flores', 'Díaz']
+ARTICULOS = ['Tornillo', 'Cable', 'Filtro', 'Válvula', 'Sensor', 'Bomba', 'Tuerca', 'Manguera', 'Motor', 'Panel']
+
+ITEMS_POR_COMPRA = 25
+_CENTAVOS = Decimal('0.01')
+
+
+@dataclass
+class Volumenes:
+    categorias: int = 20
+    proveedores: int = 50
+    productos: int = 2000
+    clientes: int = 5000
+    ventas: int = 20000
+    items: int = 4  # líneas promedio por venta
+    dias: int = 365
+    hasta: date | None = None  # último día simulado (hoy por defecto)
+    semilla: int = 1
+    prefijo: str = 'SEED-'  # prefijo de códigos de producto y nombres de categoría
+    lote: int = 5000
+    resumen: bool = True  # reconstruir ResumenVentaDiaria del rango al final
+
+
+@dataclass
+class _Tabla:
+    modelo: type
+    campos: tuple
+    filas: list = field(default_factory=list)
+    total: int = 0
+
+
+class _Insertador:
+    """Acumula filas (ya adaptadas al motor) por tabla y las inserta en orden de dependencias."""
+
+    def __init__(self, conexion, lote, tablas):
+        self.conexion = conexion
+        self.lote = lote
+        self.tablas = {t.modelo: t for t in tablas}
+        self._sql = {}
+        for t in tablas:
+            opts = t.modelo._meta
+            columnas = ', '.join(conexion.ops.quote_name(opts.get_field(c).column) for c in t.campos)
+            marcas = ', '.join(['%s'] * len(t.campos))
+            self._sql[t.modelo] = f'INSERT INTO {conexion.ops.quote_name(opts.db_table)} ({columnas}) VALUES ({marcas})'
+
+    def agregar(self, modelo, fila):
+        tabla = self.tablas[modelo]
+        tabla.filas.append(fila)
+        if len(tabla.filas) >= self.lote:
+            self.vaciar()
+
+    def vaciar(self):
+        with transaction.atomic(using=self.conexion.alias), self.conexion.cursor() as cursor:
+            for modelo, tabla in self.tablas.items():
+                if tabla.filas:
+                    cursor.executemany(self._sql[modelo], tabla.filas)
+                    tabla.total += len(tabla.filas)
+                    tabla.filas = []
+
+    def totales(self) -> dict:
+        return {modelo.__name__: t.total for modelo, t in self.tablas.items()}
+
+
+def _siguiente_id(modelo) -> int:
+    return (modelo.objects.aggregate(m=Max('id'))['m'] or 0) + 1
+
+
+def _medianoche(dia: date) -> datetime:
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def sembrar(v: Volumenes, escribir=None) -> dict:
+    """Genera el dataset y devuelve las filas insertadas por modelo."""
+    escribir = escribir or (lambda mensaje: None)
+    if Producto.objects.filter(codigo__startswith=v.prefijo).exists():
+        raise ValueError(f'Ya existen productos con el prefijo {v.prefijo!r}; usa otro prefijo')
+    rnd = random.Random(v.semilla)
+    hasta = v.hasta or timezone.localdate()
+    inicio = hasta - timedelta(days=v.dias - 1)
+
+    conexion = connections[DEFAULT_DB_ALIAS]
+    ops = conexion.ops
+
+    def dinero(valor):
+        return ops.adapt_decimalfield_value(valor, 16, 2)
+
+    def momento(base, segundos):
+        return ops.adapt_datetimefield_value(base + timedelta(seconds=segundos))
+
+    ins = _Insertador(conexion, v.lote, [
+        _Tabla(CategoriaProducto, ('id', 'nombre', 'descripcion', 'actualizado')),
+        _Tabla(Proveedor, ('id', 'empresa', 'contacto_principal', 'telefono', 'direccion', 'actualizado')),
+        _Tabla(Producto, ('id', 'codigo', 'nombre', 'descripcion', 'precio_venta', 'precio_compra',
+                          'cantidad_en_inventario', 'proveedor', 'categoria', 'activo', 'actualizado')),
+        _Tabla(Cliente, ('id', 'nombre_completo', 'direccion', 'telefono', 'email', 'actualizado')),
+        _Tabla(PedidoVenta, ('id', 'numero', 'fecha', 'cliente', 'estado', 'total', 'num_items', 'actualizado')),
+        _Tabla(PedidoVentaItem, ('id', 'pedido', 'producto', 'cantidad', 'precio_unitario')),
+        _Tabla(OrdenCompra, ('id', 'numero', 'fecha', 'proveedor', 'estado', 'total', 'num_items', 'actualizado')),
+        _Tabla(OrdenCompraItem, ('id', 'orden', 'producto', 'cantidad', 'costo_unitario')),
+        _Tabla(MovimientoInventario, ('id', 'fecha', 'tipo', 'producto', 'cantidad', 'referencia', 'nota',
+                                      'ref_venta_id', 'ref_compra_id')),
+    ])
+    ids = {m: _siguiente_id(m) for m in ins.tablas}
+
+    def nuevo_id(modelo):
+        ids[modelo] += 1
+        return ids[modelo] - 1
+
+    # Catálogos; su `actualizado` es la apertura del primer día simulado
+    apertura = momento(_medianoche(inicio), 7 * 3600)
+    cat0, prov0, prod0, cli0 = (ids[m] for m in (CategoriaProducto, Proveedor, Producto, Cliente))
+    for i in range(v.categorias):
+        ins.agregar(CategoriaProducto, (nuevo_id(CategoriaProducto), f'{v.prefijo}Categoría {i}', '', apertura))
+    for i in range(v.proveedores):
+        ins.agregar(Proveedor, (
+            nuevo_id(Proveedor), f'Proveedor {i} S.A.', f'{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)}',
+            f'55{rnd.randrange(10 ** 8):08d}', f'Calle {rnd.randint(1, 999)}', apertura,
+        ))
+    for i in range(v.clientes):
+        nombre = f'{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}'
+        ins.agregar(Cliente, (
+            nuevo_id(Cliente), nombre, f'Av. {rnd.randint(1, 999)}', f'55{rnd.randrange(10 ** 8):08d}',
+            f'cliente{cli0 + i}@example.com', apertura,
+        ))
+
+    n = v.productos
+    precio_venta, precio_compra, proveedor, objetivo, stock = [], [], [], [], []
+    venta_bd, compra_bd = [], []  # precios adaptados al motor
+    for i in range(n):
+        compra = (Decimal(rnd.randint(500, 50000)) / 100).quantize(_CENTAVOS)
+        venta = (compra * Decimal(rnd.uniform(1.15, 1.8))).quantize(_CENTAVOS)
+        precio_compra.append(compra)
+        precio_venta.append(venta)
+        compra_bd.append(dinero(compra))
+        venta_bd.append(dinero(venta))
+        proveedor.append(prov0 + rnd.randrange(v.proveedores))
+        objetivo.append(rnd.randint(20, 300))
+        stock.append(0)
+        ins.agregar(Producto, (
+            prod0 + i, f'{v.prefijo}{i:07d}', f'{rnd.choice(ARTICULOS)} {i}', '', venta_bd[i], compra_bd[i], 0,
+            proveedor[i], cat0 + rnd.randrange(v.categorias), rnd.random() > 0.02, apertura,
+        ))
+    # Popularidad tipo Zipf con ranking aleatorio
+    ranking = list(range(n))
+    rnd.shuffle(ranking)
+    pesos = [0.0] * n
+    for posicion, i in enumerate(ranking):
+        pesos[i] = 1 / (posicion + 1) ** 0.8
+    acumulados = list(accumulate(pesos))
+
+    # Numeración: se toma el rango siguiente de cada secuencia
+    v_ini = secuencias.reservar(PedidoVenta.PREFIJO_NUMERO, 0, lambda: secuencias.mayor_numero(PedidoVenta, PedidoVenta.PREFIJO_NUMERO) + 1)
+    oc_ini = secuencias.reservar(OrdenCompra.PREFIJO_NUMERO, 0, lambda: secuencias.mayor_numero(OrdenCompra, OrdenCompra.PREFIJO_NUMERO) + 1)
+    num_venta, num_compra = v_ini, oc_ini
+
+    def movimiento(cuando, tipo, pid, cantidad, referencia, nota, venta_id=None, compra_id=None):
+        ins.agregar(MovimientoInventario, (
+            nuevo_id(MovimientoInventario), cuando, tipo, prod0 + pid, cantidad, referencia, nota, venta_id, compra_id,
+        ))
+
+    for i in range(n):
+        stock[i] = objetivo[i]
+        movimiento(apertura, MovimientoInventario.ENTRADA, i, objetivo[i], 'INICIAL', 'Inventario inicial')
+
+    reponer = {}  # proveedor -> {indice de producto}
+    for d in range(v.dias):
+        dia = inicio + timedelta(days=d)
+        dia_bd, medianoche = ops.adapt_datefield_value(dia), _medianoche(dia)
+        ultimos_dias = d >= v.dias - 3
+        ventas_hoy = round((d + 1) * v.ventas / v.dias) - round(d * v.ventas / v.dias)
+        for _ in range(ventas_hoy):
+            pedido_id = nuevo_id(PedidoVenta)
+            numero = f'{PedidoVenta.PREFIJO_NUMERO}{num_venta:04d}'
+            num_venta += 1
+            r = rnd.random()
+            estado = 'pendiente' if (ultimos_dias and r < 0.5) or r < 0.03 else 'cancelado' if r > 0.94 else 'completado'
+            k = min(n, 1 + int(rnd.expovariate(1 / max(v.items - 1, 0.01))), 50)
+            elegidos = dict.fromkeys(rnd.choices(range(n), cum_weights=acumulados, k=k))
+            lineas = []
+            for pid in elegidos:
+                cantidad = rnd.randint(1, 5)
+                if estado == 'completado':
+                    cantidad = min(cantidad, stock[pid])
+                if cantidad:
+                    lineas.append((pid, cantidad))
+            if not lineas:
+                # Sin stock para ninguna línea: queda como venta cancelada
+                estado = 'cancelado'
+                lineas = [(pid, 1) for pid in elegidos]
+            total = sum(precio_venta[pid] * c for pid, c in lineas)
+            cliente = cli0 + rnd.randrange(v.clientes)
+            cuando = momento(medianoche, rnd.randint(8 * 3600, 20 * 3600))
+            ins.agregar(PedidoVenta, (
+                pedido_id, numero, dia_bd, cliente, estado, dinero(total), len(lineas), cuando,
+            ))
+            for pid, cantidad in lineas:
+                ins.agregar(PedidoVentaItem, (nuevo_id(PedidoVentaItem), pedido_id, prod0 + pid, cantidad, venta_bd[pid]))
+                if estado == 'completado':
+                    stock[pid] -= cantidad
+                    movimiento(cuando, MovimientoInventario.SALIDA, pid, cantidad, numero, 'Venta completada', venta_id=pedido_id)
+                    if stock[pid] <= objetivo[pid] // 4:
+                        reponer.setdefault(proveedor[pid], set()).add(pid)
+
+        # Compras de reposición del día, agrupadas por proveedor
+        recepcion = momento(medianoche, 21 * 3600)
+        for prov, pendientes in sorted(reponer.items()):
+            pendientes = sorted(pendientes)
+            for j in range(0, len(pendientes), ITEMS_POR_COMPRA):
+                orden_id = nuevo_id(OrdenCompra)
+                numero = f'{OrdenCompra.PREFIJO_NUMERO}{num_compra:04d}'
+                num_compra += 1
+                estado = 'pendiente' if ultimos_dias else 'cancelada' if rnd.random() < 0.02 else 'recibida'
+                lineas = [(pid, objetivo[pid] - stock[pid] + objetivo[pid] // 2) for pid in pendientes[j:j + ITEMS_POR_COMPRA]]
+                total = sum(precio_compra[pid] * c for pid, c in lineas)
+                ins.agregar(OrdenCompra, (
+                    orden_id, numero, dia_bd, prov, estado, dinero(total), len(lineas), recepcion,
+                ))
+                for pid, cantidad in lineas:
+                    ins.agregar(OrdenCompraItem, (nuevo_id(OrdenCompraItem), orden_id, prod0 + pid, cantidad, compra_bd[pid]))
+                    if estado == 'recibida':
+                        stock[pid] += cantidad
+                        movimiento(recepcion, MovimientoInventario.ENTRADA, pid, cantidad, numero, 'Compra recibida', compra_id=orden_id)
+        reponer = {}
+        if d % 30 == 29:
+            escribir(f'{dia}: {ids[PedidoVenta] - 1} ventas, {ids[MovimientoInventario] - 1} movimientos')
+    ins.vaciar()
+
+    # Stock final y contadores de numeración
+    tabla = ops.quote_name(Producto._meta.db_table)
+    columna, sello = (ops.quote_name(Producto._meta.get_field(c).column) for c in ('cantidad_en_inventario', 'actualizado'))
+    cierre = momento(_medianoche(hasta), 22 * 3600)
+    with transaction.atomic(), conexion.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {tabla} SET {columna} = %s, {sello} = %s WHERE id = %s',
+            [(stock[i], cierre, prod0 + i) for i in range(n)],
+        )
+    for prefijo, siguiente in ((PedidoVenta.PREFIJO_NUMERO, num_venta), (OrdenCompra.PREFIJO_NUMERO, num_compra)):
+        SecuenciaDocumento.objects.filter(prefijo=prefijo).update(siguiente=Greatest(F('siguiente'), Value(siguiente)))
+    secuencias.olvidar_bloques()
+    modelos = list(ins.tablas)
+    with conexion.cursor() as cursor:
+        for sql in ops.sequence_reset_sql(no_style(), modelos):
+            cursor.execute(sql)
+
+    totales = ins.totales()
+    busqueda.indexar(Producto.objects.filter(pk__gte=prod0))
+    if v.resumen:
+        totales[ResumenVentaDiaria.__name__] = ResumenVentaDiaria.reconstruir(desde=inicio, hasta=hasta)
+    invalidar_metricas()
+    invalidar_precios()
+    return totales
@@ -0,0 +1,13 @@
+"""Tareas Celery de reportes (opcional: solo si Celery está instalado)."""
+
+try:
+    from celery import shared_task
+except ImportError:  # Celery es opcional
+    shared_task = None
+
+from .trabajos import generar
+
+if shared_task:
+    @shared_task(name='reportes.generar_exportacion')
+    def generar_exportacion_task(trabajo_id):
+        return generar(trabajo_id)
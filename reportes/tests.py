@@ -0,0 +1,260 @@
+import os
+import unittest
+import tracemalloc
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from inventario.models import CategoriaProducto
+from reportes.exportaciones import huella, lineas_csv, reporte_inventario, reporte_ventas
+from reportes.models import PronosticoDemanda, TrabajoExportacion
+from reportes.planes import verificar
+from reportes.pronosticos import Parametros, inicio_semana, pronosticar
+from reportes.sintetico import Volumenes, sembrar
+from reportes.trabajos import limpiar, solicitar_exportacion
+from ventas.models import Cliente, PedidoVentaItem
+
+try:
+    import numpy as np
+
+    from reportes import pronosticos, series
+except ImportError:
+    np = None
+
+HASTA = date(2024, 6, 30)
+
+
+def _consumir(exportacion):
+    """(líneas, pico de memoria en KB) al recorrer el CSV sin guardarlo."""
+    lineas = 0
+    tracemalloc.start()
+    try:
+        for _ in lineas_csv(exportacion):
+            lineas += 1
+        return lineas, tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+class ExportacionCsvTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(Volumenes(
+            categorias=3, proveedores=5, productos=200, clientes=50, ventas=4000, items=4, dias=80,
+            hasta=HASTA, semilla=3, prefijo='T-', lote=2000, resumen=False,
+        ))
+
+    def test_formato_excel(self):
+        lineas = list(lineas_csv(reporte_ventas({'desde': '2024-06-30'})))
+        self.assertEqual(lineas[0], '\ufeff')
+        self.assertEqual(lineas[1], 'numero;fecha;cliente;producto;cantidad;precio_unitario;subtotal;estado\r\n')
+        self.assertTrue(all(linea.endswith('\r\n') for linea in lineas[1:]))
+
+    @mock.patch('reportes.exportaciones.LOTE_CSV', 200)
+    def test_memoria_no_crece_con_las_filas(self):
+        pocas = PedidoVentaItem.objects.filter(pedido__fecha__gte='2024-06-21').count()
+        todas = PedidoVentaItem.objects.count()
+        self.assertGreater(pocas, 5 * 200)
+        self.assertGreater(todas, 6 * pocas)
+
+        lineas_pocas, pico_pocas = _consumir(reporte_ventas({'desde': '2024-06-21'}))
+        lineas_todas, pico_todas = _consumir(reporte_ventas({}))
+
+        # BOM + encabezado + una línea por ítem
+        self.assertEqual(lineas_pocas, pocas + 2)
+        self.assertEqual(lineas_todas, todas + 2)
+        self.assertLess(pico_todas, pico_pocas * 1.5 + 64)
+
+    def test_una_consulta_por_reporte(self):
+        with self.assertNumQueries(1):
+            lineas, _ = _consumir(reporte_inventario({}))
+        self.assertEqual(lineas, 202)
+
+    def test_vista_streaming(self):
+        self.client.force_login(User.objects.create_user('ana'))
+        respuesta = self.client.get('/reportes/ventas.csv', {'desde': '2024-06-30', 'hasta': '2024-06-30'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        contenido = b''.join(respuesta.streaming_content)
+        self.assertTrue(contenido.startswith('\ufeffnumero;'.encode()))
+        self.assertEqual(contenido.count(b'\r\n'), PedidoVentaItem.objects.filter(pedido__fecha=HASTA).count() + 1)
+
+
+class PlanesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(Volumenes(
+            categorias=2, proveedores=3, productos=50, clientes=20, ventas=300, items=3, dias=40,
+            semilla=5, prefijo='P-', lote=1000,
+        ))
+
+    def test_consultas_frecuentes_usan_indices(self):
+        consultas = verificar()
+        self.assertGreater(len(consultas), 20)
+        fallas = [f'{c.escenario}: {c.recorridos}\n{c.sql}\n{c.plan}' for c in consultas if not c.ok]
+        self.assertEqual(fallas, [])
+
+
+class TrabajosExportacionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(Volumenes(
+            categorias=2, proveedores=2, productos=10, clientes=5, ventas=20, items=2, dias=5,
+            hasta=HASTA, semilla=7, prefijo='E-', lote=100, resumen=False,
+        ))
+
+    def test_reutiliza_el_archivo_listo(self):
+        trabajo, reutilizado = solicitar_exportacion('inventario', {})
+        self.assertFalse(reutilizado)
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, TrabajoExportacion.LISTO)
+        self.assertEqual(solicitar_exportacion('inventario', {}), (trabajo, True))
+
+    def test_editar_un_nombre_cambia_la_huella(self):
+        antes = huella('ventas', {})
+        cliente = Cliente.objects.first()
+        cliente.nombre_completo = 'Otro nombre'
+        cliente.save()
+        self.assertNotEqual(huella('ventas', {}), antes)
+
+        antes = huella('inventario', {})
+        categoria = CategoriaProducto.objects.first()
+        categoria.nombre = 'Otra categoría'
+        categoria.save()
+        self.assertNotEqual(huella('inventario', {}), antes)
+
+    def test_trabajo_sin_latido_no_se_reutiliza(self):
+        viejo = timezone.now() - timedelta(hours=1)
+        colgado = TrabajoExportacion.objects.create(
+            reporte='inventario', filtros={}, huella=huella('inventario', {}),
+            estado=TrabajoExportacion.PROCESANDO, iniciado=viejo, latido=viejo,
+        )
+        trabajo, reutilizado = solicitar_exportacion('inventario', {})
+        self.assertFalse(reutilizado)
+        self.assertNotEqual(trabajo.pk, colgado.pk)
+        colgado.refresh_from_db()
+        self.assertEqual(colgado.estado, TrabajoExportacion.ERROR)
+
+    def test_trabajo_con_latido_reciente_se_reutiliza(self):
+        en_curso = TrabajoExportacion.objects.create(
+            reporte='inventario', filtros={}, huella=huella('inventario', {}),
+            estado=TrabajoExportacion.PROCESANDO, iniciado=timezone.now(), latido=timezone.now(),
+        )
+        self.assertEqual(solicitar_exportacion('inventario', {}), (en_curso, True))
+
+    def test_limpiar_borra_trabajos_viejos_y_sus_archivos(self):
+        viejo, _ = solicitar_exportacion('inventario', {})
+        nuevo, _ = solicitar_exportacion('inventario', {'min': '5'})
+        viejo.refresh_from_db()
+        ruta = viejo.archivo.path
+        TrabajoExportacion.objects.filter(pk=viejo.pk).update(terminado=timezone.now() - timedelta(days=8))
+
+        self.assertEqual(limpiar(7), 1)
+        self.assertFalse(os.path.exists(ruta))
+        self.assertEqual(list(TrabajoExportacion.objects.values_list('pk', flat=True)), [nuevo.pk])
+
+
+@unittest.skipIf(np is None, 'requiere NumPy')
+class SeriesTests(SimpleTestCase):
+    def test_media_movil(self):
+        Y = np.array([[1, 2, 3, 4, 5, 6]], dtype=np.float32)
+        ajuste, pronostico = series.media_movil(Y, horizonte=3, ventana=2)
+        np.testing.assert_allclose(ajuste, [[np.nan, np.nan, 1.5, 2.5, 3.5, 4.5]])
+        np.testing.assert_allclose(pronostico, [[5.5, 5.5, 5.5]])
+
+    def test_suavizado(self):
+        Y = np.array([[4, 8, 4, 8]], dtype=np.float32)
+        ajuste, pronostico = series.suavizado(Y, horizonte=2, alfa=0.5)
+        np.testing.assert_allclose(ajuste, [[np.nan, 4, 6, 5]])
+        np.testing.assert_allclose(pronostico, [[6.5, 6.5]])
+
+    def test_estacional(self):
+        Y = np.array([[1, 2, 3, 4, 5, 6, 7]], dtype=np.float32)
+        ajuste, pronostico = series.estacional(Y, horizonte=4, temporada=3)
+        np.testing.assert_allclose(ajuste, [[np.nan, np.nan, np.nan, 1, 2, 3, 4]])
+        np.testing.assert_allclose(pronostico, [[5, 6, 7, 5]])
+
+    def test_estacional_sin_temporada_completa(self):
+        ajuste, pronostico = series.estacional(np.ones((1, 2), dtype=np.float32), horizonte=2, temporada=3)
+        self.assertTrue(np.isnan(ajuste).all() and np.isnan(pronostico).all())
+
+    def test_elige_el_modelo_de_menor_error(self):
+        Y = np.array([
+            [0, 10] * 6,  # alterna: solo el estacional acierta
+            [5] * 12,  # constante: todos aciertan, gana el primero
+            [0] * 8 + [9] * 4,  # escalón: el suavizado con alfa 1 falla solo la semana del salto
+        ], dtype=np.float32)
+        modelo, error, pronostico = series.pronosticar(Y, horizonte=2, ventana=4, alfa=1.0, temporada=2, evaluacion=4)
+        self.assertEqual([series.MODELOS[m] for m in modelo], ['estacional', 'media_movil', 'suavizado'])
+        np.testing.assert_allclose(error, [0, 0, 9 / 4])
+        np.testing.assert_allclose(pronostico, [[0, 10], [5, 5], [9, 9]])
+        escalon = Y[2:]
+        self.assertEqual(series.error_medio(escalon, series.media_movil(escalon, 2, 4)[0], 4)[0], (9 + 6.75 + 4.5 + 2.25) / 4)
+        self.assertEqual(series.error_medio(escalon, series.estacional(escalon, 2, 2)[0], 4)[0], 18 / 4)
+
+    def test_error_infinito_sin_ajuste(self):
+        Y = np.ones((1, 4), dtype=np.float32)
+        ajuste = np.full((1, 4), np.nan, dtype=np.float32)
+        self.assertEqual(series.error_medio(Y, ajuste, 2)[0], np.inf)
+
+
+@unittest.skipIf(np is None, 'requiere NumPy')
+class PronosticosTests(TestCase):
+    PARAMETROS = Parametros(semanas=14, horizonte=2, ventana=4, temporada=4, evaluacion=6)
+
+    @classmethod
+    def setUpTestData(cls):
+        sembrar(Volumenes(
+            categorias=2, proveedores=3, productos=60, clientes=20, ventas=1500, items=3, dias=80,
+            hasta=HASTA, semilla=5, prefijo='P-', lote=2000, resumen=False,
+        ))
+        cls.semana = inicio_semana(HASTA + timedelta(days=1))
+        cls.desde = cls.semana - timedelta(weeks=cls.PARAMETROS.semanas)
+
+    def _matriz_por_semana(self):
+        """La matriz semana por semana, como referencia."""
+        items = PedidoVentaItem.objects.filter(pedido__estado='completado')
+        matriz = {}
+        for s in range(self.PARAMETROS.semanas):
+            inicio = self.desde + timedelta(weeks=s)
+            semana = items.filter(pedido__fecha__gte=inicio, pedido__fecha__lt=inicio + timedelta(weeks=1))
+            for pid, unidades in semana.values('producto_id').annotate(u=Sum('cantidad')).values_list('producto_id', 'u'):
+                matriz.setdefault(pid, [0] * self.PARAMETROS.semanas)[s] = unidades
+        return matriz
+
+    def test_matriz_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            producto_ids, Y = pronosticos._matriz(self.desde, self.PARAMETROS.semanas)
+        referencia = self._matriz_por_semana()
+        self.assertTrue(referencia)
+        self.assertEqual(sorted(referencia), producto_ids.tolist())
+        self.assertEqual({pid: fila for pid, fila in zip(producto_ids.tolist(), Y.astype(int).tolist())}, referencia)
+
+    def test_matriz_vacia(self):
+        producto_ids, Y = pronosticos._matriz(HASTA + timedelta(weeks=10), 4)
+        self.assertEqual((len(producto_ids), Y.shape), (0, (0, 4)))
+
+    def test_guarda_el_pronostico(self):
+        resultado = pronosticar(self.PARAMETROS, hoy=HASTA + timedelta(days=1), procesos=1)
+        self.assertEqual(resultado.semana, self.semana)
+        self.assertEqual(resultado.productos, len(self._matriz_por_semana()))
+        self.assertEqual(resultado.filas, resultado.productos * self.PARAMETROS.horizonte)
+        self.assertEqual(sum(resultado.por_modelo.values()), resultado.productos)
+        self.assertEqual(PronosticoDemanda.objects.count(), resultado.filas)
+        self.assertEqual(
+            set(PronosticoDemanda.objects.values_list('semana', flat=True)),
+            {self.semana, self.semana + timedelta(weeks=1)},
+        )
+
+    def test_dentro_de_una_transaccion_no_cierra_la_conexion(self):
+        # TestCase corre cada prueba en una transacción: con varios bloques y
+        # procesos el pool no debe usarse (cerraría la conexión a medias).
+        with mock.patch.object(pronosticos, 'LOTE', 10), \
+                mock.patch.object(pronosticos, 'ProcessPoolExecutor') as pool:
+            resultado = pronosticar(self.PARAMETROS, hoy=HASTA + timedelta(days=1), procesos=4)
+        pool.assert_not_called()
+        self.assertEqual(PronosticoDemanda.objects.count(), resultado.filas)
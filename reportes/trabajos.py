@@ -0,0 +1,155 @@
+"""Exportaciones en segundo plano.
+
+Flujo: `solicitar_exportacion()` crea (o reutiliza) un TrabajoExportacion y lo
+encola; un worker ejecuta `generar()`, que escribe el CSV en el storage; el
+cliente consulta el estado y descarga el archivo.
+
+Worker según `EXPORTACIONES_BACKEND`:
+- 'hilo' (defecto): hilo en el mismo proceso, al confirmar la transacción
+- 'bd': queda pendiente en la BD; lo procesa `manage.py procesar_exportaciones`
+- 'celery': tarea `reportes.generar_exportacion` (CELERY_TASK_ALWAYS_EAGER
+  sirve para pruebas)
+- 'sincrono': se genera dentro de la misma petición
+
+Si ya existe un trabajo con la misma huella (reporte + filtros + estado de
+los datos) pendiente, en proceso o listo, se devuelve ese en vez de crear otro.
+
+Mientras genera, el worker renueva `latido` cada `LATIDO` segundos. Un
+trabajo en proceso sin latido durante `EXPORTACIONES_VENCIMIENTO` segundos
+(hilo perdido en un reinicio o despliegue, worker caído) pasa a error y ya
+no se reutiliza; lo mismo un pendiente igual de antiguo con los backends
+que corren en el propio proceso ('hilo', 'sincrono'), que nadie retomaría.
+`limpiar()` borra los trabajos terminados hace más de
+`EXPORTACIONES_CONSERVAR_DIAS` días junto con sus archivos.
+"""
+
+import logging
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .exportaciones import REPORTES, huella, lineas_csv, normalizar_filtros
+from .models import TrabajoExportacion
+
+logger = logging.getLogger(__name__)
+
+LATIDO = 30  # segundos entre latidos del worker
+LATIDO_LINEAS = 5000  # cada cuántas líneas se revisa si toca latir
+VENCIMIENTO = 600
+CONSERVAR_DIAS = 7
+
+
+def marcar_abandonados() -> int:
+    """Pasa a error los trabajos cuyo worker dejó de dar señales; devuelve cuántos."""
+    limite = timezone.now() - timedelta(seconds=getattr(settings, 'EXPORTACIONES_VENCIMIENTO', VENCIMIENTO))
+    abandonados = Q(estado=TrabajoExportacion.PROCESANDO) & (
+        Q(latido__lt=limite) | Q(latido__isnull=True, creado__lt=limite)
+    )
+    if getattr(settings, 'EXPORTACIONES_BACKEND', 'hilo') in ('hilo', 'sincrono'):
+        abandonados |= Q(estado=TrabajoExportacion.PENDIENTE, creado__lt=limite)
+    return TrabajoExportacion.objects.filter(abandonados).update(
+        estado=TrabajoExportacion.ERROR, error='El worker dejó de responder', terminado=timezone.now(),
+    )
+
+
+def solicitar_exportacion(reporte, params, usuario=None):
+    """Devuelve `(trabajo, reutilizado)` para `reporte` con los filtros de `params`."""
+    filtros = normalizar_filtros(reporte, params)
+    h = huella(reporte, filtros)
+    marcar_abandonados()
+    vigentes = [TrabajoExportacion.PENDIENTE, TrabajoExportacion.PROCESANDO, TrabajoExportacion.LISTO]
+    existente = TrabajoExportacion.objects.filter(huella=h, estado__in=vigentes).order_by('-id').first()
+    if existente:
+        return existente, True
+    trabajo = TrabajoExportacion.objects.create(
+        reporte=reporte, filtros=filtros, huella=h, usuario=usuario if getattr(usuario, 'pk', None) else None,
+    )
+    encolar(trabajo)
+    return trabajo, False
+
+
+def encolar(trabajo):
+    backend = getattr(settings, 'EXPORTACIONES_BACKEND', 'hilo')
+    pk = trabajo.pk
+    if backend == 'celery':
+        from .tasks import generar_exportacion_task
+        transaction.on_commit(lambda: generar_exportacion_task.delay(pk))
+    elif backend == 'hilo':
+        transaction.on_commit(lambda: threading.Thread(target=_generar_en_hilo, args=(pk,), daemon=True).start())
+    elif backend == 'sincrono':
+        generar(pk)
+    # 'bd': lo toma `procesar_exportaciones`
+
+
+def _generar_en_hilo(trabajo_id):
+    try:
+        generar(trabajo_id)
+    finally:
+        close_old_connections()
+
+
+def generar(trabajo_id) -> bool:
+    """Genera el archivo de un trabajo pendiente. Devuelve False si otro worker ya lo tomó."""
+    ahora = timezone.now()
+    tomado = TrabajoExportacion.objects.filter(pk=trabajo_id, estado=TrabajoExportacion.PENDIENTE).update(
+        estado=TrabajoExportacion.PROCESANDO, iniciado=ahora, latido=ahora,
+    )
+    if not tomado:
+        return False
+    trabajo = TrabajoExportacion.objects.get(pk=trabajo_id)
+    try:
+        exportacion = REPORTES[trabajo.reporte](trabajo.filtros)
+        lineas = 0
+        ultimo_latido = time.monotonic()
+        with tempfile.TemporaryFile() as tmp:
+            for linea in lineas_csv(exportacion):
+                tmp.write(linea.encode('utf-8'))
+                lineas += 1
+                if lineas % LATIDO_LINEAS == 0 and time.monotonic() - ultimo_latido >= LATIDO:
+                    TrabajoExportacion.objects.filter(pk=trabajo_id).update(latido=timezone.now())
+                    ultimo_latido = time.monotonic()
+            tmp.seek(0)
+            trabajo.archivo.save(f'{trabajo.reporte}-{trabajo.pk}.csv', File(tmp), save=False)
+        trabajo.filas = max(lineas - 2, 0)  # sin BOM ni encabezado
+        trabajo.estado = TrabajoExportacion.LISTO
+    except Exception as e:
+        logger.exception('Error generando exportación %s', trabajo_id)
+        trabajo.estado = TrabajoExportacion.ERROR
+        trabajo.error = str(e)
+    trabajo.terminado = timezone.now()
+    trabajo.save(update_fields=['archivo', 'filas', 'estado', 'error', 'terminado'])
+    return True
+
+
+def procesar_pendientes(limite=None) -> int:
+    """Procesa trabajos pendientes en orden de llegada (worker 'bd')."""
+    marcar_abandonados()
+    ids = TrabajoExportacion.objects.filter(estado=TrabajoExportacion.PENDIENTE).order_by('creado', 'id')
+    ids = ids.values_list('id', flat=True)
+    if limite:
+        ids = ids[:limite]
+    return sum(1 for pk in list(ids) if generar(pk))
+
+
+def limpiar(dias=None) -> int:
+    """Borra los trabajos terminados hace más de `dias` días y sus archivos; devuelve cuántos."""
+    if dias is None:
+        dias = getattr(settings, 'EXPORTACIONES_CONSERVAR_DIAS', CONSERVAR_DIAS)
+    viejos = TrabajoExportacion.objects.filter(
+        estado__in=[TrabajoExportacion.LISTO, TrabajoExportacion.ERROR],
+        terminado__lt=timezone.now() - timedelta(days=dias),
+    )
+    borrados = 0
+    for trabajo in viejos.iterator():
+        if trabajo.archivo:
+            trabajo.archivo.delete(save=False)
+        trabajo.delete()
+        borrados += 1
+    return borrados
@@ -1,6 +1,7 @@
 """Rutas de Reportes.
 
 - HTML y exportación CSV para ventas, compras e inventario
+- Exportaciones en segundo plano: encolar, consultar estado y descargar
 """
 
 from django.urls import path
@@ -13,4 +14,7 @@ urlpatterns = [
     path('ventas.csv', views.reporte_ventas_csv, name='reporte_ventas_csv'),
     path('compras.csv', views.reporte_compras_csv, name='reporte_compras_csv'),
     path('inventario.csv', views.reporte_inventario_csv, name='reporte_inventario_csv'),
+    path('exportaciones/<str:reporte>/', views.exportacion_crear, name='exportacion_crear'),
+    path('exportaciones/trabajo/<int:pk>/', views.exportacion_estado, name='exportacion_estado'),
+    path('exportaciones/trabajo/<int:pk>/descarga/', views.exportacion_descarga, name='exportacion_descarga'),
 ]
@@ -1,22 +1,36 @@
 """Vistas de reportes (HTML + CSV).
 
 Filtros por querystring en HTML y exportación CSV compatible con Excel.
-- Ventas: filtra por fecha, cliente y producto; CSV por ítem
+Los CSV se envían en streaming (filas generadas en `reportes.exportaciones`).
+Para reportes grandes existen trabajos en segundo plano: se encola con
+POST a `exportaciones/<reporte>/`, se consulta el estado y se descarga el
+archivo generado (ver `reportes.trabajos`).
+- Ventas: filtra por fecha, cliente y producto; CSV por ítem. El resumen de
+  unidades/monto completados sale de ResumenVentaDiaria
 - Compras: filtra por fecha, proveedor y producto; CSV por ítem
-- Inventario: filtra por categoría y stock mínimo
+- Inventario: filtra por categoría y stock mínimo; con `fecha` muestra el
+  stock y la valuación al cierre de ese día (ver `inventario.existencias`)
 """
 
-from datetime import datetime
-import csv
+import contextlib
+from datetime import date
+
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponse
-from django.shortcuts import render
+from django.http import FileResponse, Http404, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
 from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
-from ventas.models import PedidoVenta, PedidoVentaItem, Cliente
-from compras.models import OrdenCompra, OrdenCompraItem
+from ventas.models import PedidoVenta, Cliente
+from compras.models import OrdenCompra
+from inventario.existencias import existencias_al
 from inventario.models import Producto, CategoriaProducto, Proveedor
+from .exportaciones import REPORTES, lineas_csv
+from .metricas import resumen_ventas
+from .models import TrabajoExportacion
+from .trabajos import solicitar_exportacion
 
 
 class ReporteVentasView(LoginRequiredMixin, View):
@@ -38,6 +52,7 @@ class ReporteVentasView(LoginRequiredMixin, View):
 
         context = {
             'pedidos': qs.order_by('-fecha'),
+            'resumen': resumen_ventas(desde, hasta, cliente_id, producto_id),
             'clientes': Cliente.objects.all(),
             'productos': Producto.objects.all(),
         }
@@ -73,126 +88,105 @@ class ReporteInventarioView(LoginRequiredMixin, View):
     def get(self, request):
         categoria_id = request.GET.get('categoria')
         cantidad_min = request.GET.get('min', '')
+        fecha = _fecha(request.GET.get('fecha'))
 
         qs = Producto.objects.all().select_related('categoria', 'proveedor')
         if categoria_id:
             qs = qs.filter(categoria_id=categoria_id)
-        if cantidad_min:
-            try:
-                qs = qs.filter(cantidad_en_inventario__lte=int(cantidad_min))
-            except ValueError:
-                pass
+        existencias = None
+        if fecha:
+            # Stock al cierre de la fecha: se reemplaza la cantidad actual
+            existencias = existencias_al(fecha, qs)
+            productos = list(qs)
+            for p in productos:
+                p.cantidad_en_inventario = existencias.cantidades.get(p.id, 0)
+            if cantidad_min:
+                with contextlib.suppress(ValueError):
+                    productos = [p for p in productos if p.cantidad_en_inventario <= int(cantidad_min)]
+            productos.sort(key=lambda p: p.cantidad_en_inventario)
+        else:
+            if cantidad_min:
+                try:
+                    qs = qs.filter(cantidad_en_inventario__lte=int(cantidad_min))
+                except ValueError:
+                    pass
+            productos = qs.order_by('cantidad_en_inventario')
 
         context = {
-            'productos': qs.order_by('cantidad_en_inventario'),
+            'productos': productos,
+            'existencias': existencias,
             'categorias': CategoriaProducto.objects.all(),
         }
         return render(request, 'reportes/inventario.html', context)
 
 
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor) if valor else None
+    except ValueError:
+        return None
+
+
+def _csv_streaming(exportacion):
+    response = StreamingHttpResponse(lineas_csv(exportacion), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{exportacion.nombre}"'
+    return response
+
+
 @login_required
 def reporte_ventas_csv(request):
-    desde = request.GET.get('desde')
-    hasta = request.GET.get('hasta')
-    cliente_id = request.GET.get('cliente')
-    producto_id = request.GET.get('producto')
-    qs = PedidoVenta.objects.all().select_related('cliente')
-    if desde:
-        qs = qs.filter(fecha__gte=desde)
-    if hasta:
-        qs = qs.filter(fecha__lte=hasta)
-    if cliente_id:
-        qs = qs.filter(cliente_id=cliente_id)
-    if producto_id:
-        qs = qs.filter(items__producto_id=producto_id).distinct()
-
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="reporte_ventas.csv"'
-    # BOM para Excel + delimitador ';' y CRLF
-    response.write('\ufeff')
-    writer = csv.writer(response, delimiter=';', lineterminator='\r\n')
-    writer.writerow(['numero', 'fecha', 'cliente', 'producto', 'cantidad', 'precio_unitario', 'subtotal', 'estado'])
-    # Una fila por ítem
-    items = PedidoVentaItem.objects.filter(pedido__in=qs).select_related('pedido', 'producto', 'pedido__cliente')
-    if producto_id:
-        items = items.filter(producto_id=producto_id)
-    for it in items.order_by('-pedido__fecha', 'pedido__numero'):
-        writer.writerow([
-            it.pedido.numero,
-            it.pedido.fecha,
-            it.pedido.cliente.nombre_completo,
-            it.producto.nombre,
-            it.cantidad,
-            it.precio_unitario,
-            it.subtotal,
-            it.pedido.estado,
-        ])
-    return response
+    return _csv_streaming(REPORTES['ventas'](request.GET))
 
 
 @login_required
 def reporte_compras_csv(request):
-    desde = request.GET.get('desde')
-    hasta = request.GET.get('hasta')
-    proveedor_id = request.GET.get('proveedor')
-    producto_id = request.GET.get('producto')
-    qs = OrdenCompra.objects.all().select_related('proveedor')
-    if desde:
-        qs = qs.filter(fecha__gte=desde)
-    if hasta:
-        qs = qs.filter(fecha__lte=hasta)
-    if proveedor_id:
-        qs = qs.filter(proveedor_id=proveedor_id)
-    if producto_id:
-        qs = qs.filter(items__producto_id=producto_id).distinct()
-
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="reporte_compras.csv"'
-    response.write('\ufeff')
-    writer = csv.writer(response, delimiter=';', lineterminator='\r\n')
-    writer.writerow(['numero', 'fecha', 'proveedor', 'producto', 'cantidad', 'costo_unitario', 'subtotal', 'estado'])
-    items = OrdenCompraItem.objects.filter(orden__in=qs).select_related('orden', 'producto', 'orden__proveedor')
-    if producto_id:
-        items = items.filter(producto_id=producto_id)
-    for it in items.order_by('-orden__fecha', 'orden__numero'):
-        writer.writerow([
-            it.orden.numero,
-            it.orden.fecha,
-            it.orden.proveedor.empresa,
-            it.producto.nombre,
-            it.cantidad,
-            it.costo_unitario,
-            it.subtotal,
-            it.orden.estado,
-        ])
-    return response
+    return _csv_streaming(REPORTES['compras'](request.GET))
 
 
 @login_required
 def reporte_inventario_csv(request):
-    categoria_id = request.GET.get('categoria')
-    cantidad_min = request.GET.get('min', '')
-    qs = Producto.objects.all().select_related('categoria', 'proveedor')
-    if categoria_id:
-        qs = qs.filter(categoria_id=categoria_id)
-    if cantidad_min:
-        try:
-            qs = qs.filter(cantidad_en_inventario__lte=int(cantidad_min))
-        except ValueError:
-            pass
-
-    response = HttpResponse(content_type='text/csv; charset=utf-8')
-    response['Content-Disposition'] = 'attachment; filename="reporte_inventario.csv"'
-    response.write('\ufeff')
-    writer = csv.writer(response, delimiter=';', lineterminator='\r\n')
-    writer.writerow(['codigo', 'nombre', 'categoria', 'proveedor', 'stock', 'precio_venta'])
-    for p in qs:
-        writer.writerow([
-            p.codigo,
-            p.nombre,
-            p.categoria.nombre,
-            p.proveedor.empresa,
-            p.cantidad_en_inventario,
-            p.precio_venta,
-        ])
-    return response
+    return _csv_streaming(REPORTES['inventario'](request.GET))
+
+
+def _trabajo_dict(t: TrabajoExportacion):
+    return {
+        'id': t.id,
+        'reporte': t.reporte,
+        'filtros': t.filtros,
+        'estado': t.estado,
+        'filas': t.filas,
+        'error': t.error,
+        'creado': t.creado.isoformat(),
+        'latido': t.latido.isoformat() if t.latido else None,
+        'terminado': t.terminado.isoformat() if t.terminado else None,
+        'estado_url': reverse('exportacion_estado', args=[t.id]),
+        'descarga_url': reverse('exportacion_descarga', args=[t.id]) if t.estado == TrabajoExportacion.LISTO else None,
+    }
+
+
+@csrf_exempt
+@login_required
+def exportacion_crear(request, reporte: str):
+    """Encola (o reutiliza) la exportación de `reporte` con los filtros del querystring."""
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    if reporte not in REPORTES:
+        raise Http404('Reporte no existe')
+    trabajo, reutilizado = solicitar_exportacion(reporte, request.GET, request.user)
+    return JsonResponse(_trabajo_dict(trabajo), status=200 if reutilizado else 202)
+
+
+@login_required
+def exportacion_estado(request, pk: int):
+    return JsonResponse(_trabajo_dict(get_object_or_404(TrabajoExportacion, pk=pk)))
+
+
+@login_required
+def exportacion_descarga(request, pk: int):
+    trabajo = get_object_or_404(TrabajoExportacion, pk=pk, estado=TrabajoExportacion.LISTO)
+    return FileResponse(
+        trabajo.archivo.open('rb'),
+        as_attachment=True,
+        filename=REPORTES[trabajo.reporte]({}).nombre,
+        content_type='text/csv; charset=utf-8',
+    )
@@ -23,7 +23,8 @@ class PedidoVentaItemInline(admin.TabularInline):
 @admin.register(PedidoVenta)
 class PedidoVentaAdmin(admin.ModelAdmin):
     """Admin de pedidos de venta con ítems inline."""
-    list_display = ("numero", "fecha", "cliente", "estado")
+    list_display = ("numero", "fecha", "cliente", "estado", "total")
     list_filter = ("estado", "fecha")
     search_fields = ("numero", "cliente__nombre_completo")
+    readonly_fields = ("total", "num_items")
     inlines = [PedidoVentaItemInline]
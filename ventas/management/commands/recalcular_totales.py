@@ -0,0 +1,44 @@
+"""Recalcula o verifica los totales guardados de ventas y órdenes de compra.
+
+Uso:
+    python manage.py recalcular_totales              # recalcula todo (UPDATE por lotes en la BD)
+    python manage.py recalcular_totales --verificar  # solo reporta diferencias
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Q
+from django.utils import timezone
+
+from compras.models import OrdenCompra
+from ventas.models import PedidoVenta
+
+
+class Command(BaseCommand):
+    help = 'Recalcula (o verifica con --verificar) total y num_items de PedidoVenta y OrdenCompra.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verificar', action='store_true', help='No modifica nada; falla si hay diferencias.')
+
+    def handle(self, *args, **options):
+        diferencias = 0
+        for modelo in (PedidoVenta, OrdenCompra):
+            nombre = modelo.__name__
+            if options['verificar']:
+                calculados = modelo.totales_calculados()
+                malos = (
+                    modelo.objects.annotate(total_calc=calculados['total'], num_calc=calculados['num_items'])
+                    .filter(~Q(total=F('total_calc')) | ~Q(num_items=F('num_calc')))
+                    .values_list('numero', flat=True)
+                )
+                malos = list(malos)
+                diferencias += len(malos)
+                if malos:
+                    muestra = ', '.join(malos[:10])
+                    self.stdout.write(self.style.WARNING(f'{nombre}: {len(malos)} con totales desactualizados ({muestra})'))
+                else:
+                    self.stdout.write(f'{nombre}: OK')
+            else:
+                n = modelo.objects.update(**modelo.totales_calculados(), actualizado=timezone.now())
+                self.stdout.write(self.style.SUCCESS(f'{nombre}: {n} recalculados'))
+        if diferencias:
+            raise CommandError(f'{diferencias} cabeceras con totales desactualizados; ejecuta sin --verificar para corregir.')
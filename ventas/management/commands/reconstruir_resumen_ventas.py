@@ -0,0 +1,31 @@
+"""Reconstruye ResumenVentaDiaria desde los ítems de ventas completadas.
+
+Uso:
+    python manage.py reconstruir_resumen_ventas
+    python manage.py reconstruir_resumen_ventas --desde 2025-01-01 --hasta 2025-01-31
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ventas.models import ResumenVentaDiaria
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError as e:
+        raise CommandError(f'Fecha inválida: {valor} (usa YYYY-MM-DD)') from e
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el resumen diario de ventas (todo el histórico o un rango de fechas).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=_fecha)
+        parser.add_argument('--hasta', type=_fecha)
+
+    def handle(self, *args, **options):
+        filas = ResumenVentaDiaria.reconstruir(desde=options['desde'], hasta=options['hasta'])
+        self.stdout.write(self.style.SUCCESS(f'{filas} filas de resumen generadas'))
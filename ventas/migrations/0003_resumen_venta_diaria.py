@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:42
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, Sum
+import django.db.models.deletion
+
+
+def reconstruir_resumen(apps, schema_editor):
+    PedidoVentaItem = apps.get_model('ventas', 'PedidoVentaItem')
+    ResumenVentaDiaria = apps.get_model('ventas', 'ResumenVentaDiaria')
+    filas = (
+        PedidoVentaItem.objects.filter(pedido__estado='completado')
+        .values('pedido__fecha', 'producto_id', 'pedido__cliente_id')
+        .annotate(
+            u=Sum('cantidad'),
+            m=Sum(F('cantidad') * F('precio_unitario'), output_field=DecimalField(max_digits=16, decimal_places=2)),
+            n=Count('pedido', distinct=True),
+        )
+        .order_by()
+    )
+    ResumenVentaDiaria.objects.bulk_create(
+        (
+            ResumenVentaDiaria(
+                fecha=f['pedido__fecha'], producto_id=f['producto_id'], cliente_id=f['pedido__cliente_id'],
+                unidades=f['u'], monto=f['m'], pedidos=f['n'],
+            )
+            for f in filas.iterator(chunk_size=5000)
+        ),
+        batch_size=5000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0001_initial'),
+        ('ventas', '0002_totales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenVentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('unidades', models.PositiveIntegerField(default=0)),
+                ('monto', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('pedidos', models.PositiveIntegerField(default=0)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='ventas.cliente')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='inventario.producto')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['producto', 'fecha'], name='resumen_venta_prod_fecha'), models.Index(fields=['cliente', 'fecha'], name='resumen_venta_cli_fecha')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='resumenventadiaria',
+            constraint=models.UniqueConstraint(fields=('fecha', 'producto', 'cliente'), name='resumen_venta_dia_unico'),
+        ),
+        migrations.RunPython(reconstruir_resumen, migrations.RunPython.noop),
+    ]
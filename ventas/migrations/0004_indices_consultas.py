@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0003_resumen_venta_diaria'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedidoventa',
+            index=models.Index(fields=['estado', 'fecha'], name='venta_estado_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='pedidoventa',
+            index=models.Index(fields=['fecha', 'numero'], name='venta_fecha_numero'),
+        ),
+    ]
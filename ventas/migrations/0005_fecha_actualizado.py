@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0004_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='pedidoventa',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ventas', '0005_fecha_actualizado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedidoventa',
+            index=models.Index(fields=['fecha', 'id'], name='venta_fecha_id'),
+        ),
+    ]
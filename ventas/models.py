@@ -3,9 +3,14 @@
 - Cliente: datos de clientes
 - PedidoVenta: cabecera de venta, controla transiciones de estado
 - PedidoVentaItem: detalle (producto, cantidad, precio)
+- ResumenVentaDiaria: acumulado por día/producto/cliente de ventas completadas
 
 Reglas de negocio principales:
 - No se puede cambiar el estado una vez completado/cancelado
+- `total` y `num_items` se guardan en la cabecera y se recalculan al guardar
+  o borrar ítems (ver `PedidoVenta.actualizar_totales`)
+- Al completar una venta se acumula en ResumenVentaDiaria dentro de la misma
+  transacción
 - Al completar una venta se crean movimientos de inventario de salida
   (esto descuenta stock mediante la lógica de MovimientoInventario)
 """
@@ -13,6 +18,9 @@ Reglas de negocio principales:
 from decimal import Decimal
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
+from django.db.models import Case, Count, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from inventario.models import Producto
 
@@ -23,6 +31,7 @@ class Cliente(models.Model):
     direccion = models.CharField(max_length=255)
     telefono = models.CharField(max_length=30)
     email = models.EmailField()
+    actualizado = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.nombre_completo
@@ -32,7 +41,8 @@ class PedidoVenta(models.Model):
     """Cabecera de pedido de venta.
 
     - estado: pendiente|completado|cancelado
-    - total: calculado a partir de los ítems
+    - total/num_items: columnas derivadas de los ítems, mantenidas por
+      PedidoVentaItem.save()/delete() y por actualizar_totales()
     - completar(): valida stock y crea movimientos de salida
     """
     ESTADOS = [
@@ -41,30 +51,51 @@ class PedidoVenta(models.Model):
         ('cancelado', 'Cancelado'),
     ]
 
+    PREFIJO_NUMERO = 'V-'
+
     numero = models.CharField(max_length=30, unique=True)
     fecha = models.DateField(auto_now_add=True)
     cliente = models.ForeignKey(Cliente, on_delete=models.PROTECT, related_name='pedidos')
     estado = models.CharField(max_length=12, choices=ESTADOS, default='pendiente')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'), editable=False, db_index=True)
+    num_items = models.PositiveIntegerField(default=0, editable=False)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            # Dashboard y reportes: estado + rango de fechas
+            models.Index(fields=['estado', 'fecha'], name='venta_estado_fecha'),
+            # Listados por fecha (API `-fecha,numero`)
+            models.Index(fields=['fecha', 'numero'], name='venta_fecha_numero'),
+            # Últimas ventas del dashboard (`-fecha,-id`)
+            models.Index(fields=['fecha', 'id'], name='venta_fecha_id'),
+        ]
 
     def __str__(self):
         return f"Venta {self.numero}"
 
     @classmethod
     def generar_numero(cls) -> str:
-        """Genera un número incremental con prefijo V-."""
-        prefijo = "V-"
-        with transaction.atomic():
-            ultimo = cls.objects.select_for_update().order_by('-id').first()
-            ultimo_num = 0
-            if ultimo and ultimo.numero:
-                match = re.search(r'(\d+)$', ultimo.numero)
-                if match:
-                    ultimo_num = int(match.group(1))
-            return f"{prefijo}{ultimo_num + 1:04d}"
+        """Siguiente número con prefijo V- (ver `inventario.secuencias`)."""
+        from inventario.secuencias import generar_numero
+        return generar_numero(cls, cls.PREFIJO_NUMERO)
 
-    @property
-    def total(self) -> Decimal:
-        return sum((i.subtotal for i in self.items.all()), Decimal('0.00'))
+    @staticmethod
+    def totales_calculados():
+        """Expresiones `total` y `num_items` calculadas desde los ítems de cada cabecera."""
+        items = PedidoVentaItem.objects.filter(pedido=OuterRef('pk')).order_by().values('pedido')
+        moneda = DecimalField(max_digits=14, decimal_places=2)
+        total = items.annotate(t=Sum(F('cantidad') * F('precio_unitario'), output_field=moneda)).values('t')
+        num_items = items.annotate(n=Count('id')).values('n')
+        return {
+            'total': Coalesce(Subquery(total), Value(Decimal('0.00')), output_field=moneda),
+            'num_items': Coalesce(Subquery(num_items), Value(0)),
+        }
+
+    def actualizar_totales(self):
+        """Recalcula `total` y `num_items` en la BD y refresca la instancia."""
+        PedidoVenta.objects.filter(pk=self.pk).update(**self.totales_calculados(), actualizado=timezone.now())
+        self.refresh_from_db(fields=['total', 'num_items', 'actualizado'])
 
     def clean(self):
         if self.pk:
@@ -73,37 +104,40 @@ class PedidoVenta(models.Model):
                 raise ValidationError('No se puede cambiar el estado una vez finalizado o cancelado')
 
     def completar(self):
+        """Valida stock, crea las salidas en bloque y acumula el resumen diario."""
         from inventario.models import MovimientoInventario
-        # Verificar stock
-        for item in self.items.all():
-            if item.cantidad > item.producto.cantidad_en_inventario:
-                raise ValidationError(f'Stock insuficiente para {item.producto}')
-        # Crear movimientos de salida
-        for item in self.items.all():
-            MovimientoInventario.objects.create(
-                tipo=MovimientoInventario.SALIDA,
-                producto=item.producto,
-                cantidad=item.cantidad,
-                referencia=self.numero,
-                nota='Venta completada',
-                ref_venta_id=self.id,
-            )
+        from inventario.stock import aplicar_movimientos
+        lineas = list(self.items.values_list('producto_id', 'cantidad', 'precio_unitario'))
+        aplicar_movimientos(
+            MovimientoInventario.SALIDA,
+            [(pid, cant) for pid, cant, _ in lineas],
+            referencia=self.numero,
+            nota='Venta completada',
+            ref_venta_id=self.id,
+        )
+        ResumenVentaDiaria.acumular(self, lineas)
 
     def save(self, *args, **kwargs):
         # Al pasar a 'completado' se generan movimientos de salida.
         is_new = self.pk is None
-        old_estado = None
         if is_new and not self.numero:
             with transaction.atomic():
                 self.numero = self.generar_numero()
                 super().save(*args, **kwargs)
             return
-        if not is_new:
-            old_estado = PedidoVenta.objects.get(pk=self.pk).estado
-        super().save(*args, **kwargs)
-        if not is_new and old_estado != self.estado and self.estado == 'completado':
-            # al marcar completado, genera movimientos
-            with transaction.atomic():
+        if is_new:
+            super().save(*args, **kwargs)
+            return
+        # Cabecera y movimientos en la misma transacción; el bloqueo de la
+        # cabecera evita que dos peticiones apliquen la transición a la vez.
+        # `total`/`num_items` se toman de la fila bloqueada: una instancia
+        # leída antes de cambiar los ítems no debe pisarlos con valores viejos.
+        with transaction.atomic():
+            old_estado, self.total, self.num_items = PedidoVenta.objects.select_for_update().values_list(
+                'estado', 'total', 'num_items',
+            ).get(pk=self.pk)
+            super().save(*args, **kwargs)
+            if old_estado != self.estado and self.estado == 'completado':
                 self.completar()
 
 
@@ -118,5 +152,113 @@ class PedidoVentaItem(models.Model):
     def subtotal(self) -> Decimal:
         return (self.precio_unitario or Decimal('0.00')) * Decimal(self.cantidad or 0)
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.pedido.actualizar_totales()
+
+    def delete(self, *args, **kwargs):
+        pedido = self.pedido
+        resultado = super().delete(*args, **kwargs)
+        pedido.actualizar_totales()
+        return resultado
+
     def __str__(self):
         return f"{self.producto} x {self.cantidad}"
+
+
+class ResumenVentaDiaria(models.Model):
+    """Acumulado de ventas completadas por día, producto y cliente.
+
+    Se actualiza en `PedidoVenta.completar()`; el histórico se reconstruye con
+    `manage.py reconstruir_resumen_ventas`. Permite responder consultas por
+    rango de fechas sin recorrer los ítems de venta.
+    """
+    fecha = models.DateField()
+    producto = models.ForeignKey(Producto, on_delete=models.CASCADE, related_name='+')
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='+')
+    unidades = models.PositiveIntegerField(default=0)
+    monto = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    pedidos = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'producto', 'cliente'], name='resumen_venta_dia_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['producto', 'fecha'], name='resumen_venta_prod_fecha'),
+            models.Index(fields=['cliente', 'fecha'], name='resumen_venta_cli_fecha'),
+        ]
+
+    def __str__(self):
+        return f"{self.fecha} {self.producto_id}/{self.cliente_id}: {self.unidades}"
+
+    @classmethod
+    def reconstruir(cls, desde=None, hasta=None, lote=5000) -> int:
+        """Recalcula el resumen desde los ítems de ventas completadas.
+
+        Borra y vuelve a generar las filas del rango [desde, hasta] (todo el
+        histórico si no se indica). Devuelve el número de filas creadas.
+        """
+        existentes = cls.objects.all()
+        items = PedidoVentaItem.objects.filter(pedido__estado='completado')
+        if desde:
+            existentes = existentes.filter(fecha__gte=desde)
+            items = items.filter(pedido__fecha__gte=desde)
+        if hasta:
+            existentes = existentes.filter(fecha__lte=hasta)
+            items = items.filter(pedido__fecha__lte=hasta)
+        filas = (
+            items.values('pedido__fecha', 'producto_id', 'pedido__cliente_id')
+            .annotate(
+                u=Sum('cantidad'),
+                m=Sum(F('cantidad') * F('precio_unitario'), output_field=DecimalField(max_digits=16, decimal_places=2)),
+                n=Count('pedido', distinct=True),
+            )
+            .order_by()
+        )
+        creadas = 0
+        with transaction.atomic():
+            existentes.delete()
+            pendientes = []
+            for f in filas.iterator(chunk_size=lote):
+                pendientes.append(cls(
+                    fecha=f['pedido__fecha'], producto_id=f['producto_id'], cliente_id=f['pedido__cliente_id'],
+                    unidades=f['u'], monto=f['m'], pedidos=f['n'],
+                ))
+                if len(pendientes) >= lote:
+                    cls.objects.bulk_create(pendientes)
+                    creadas += len(pendientes)
+                    pendientes = []
+            cls.objects.bulk_create(pendientes)
+            creadas += len(pendientes)
+        return creadas
+
+    @classmethod
+    def acumular(cls, pedido, lineas):
+        """Suma las `lineas` (producto_id, cantidad, precio) de `pedido` al resumen.
+
+        Crea las filas que falten sin pisar las existentes y luego incrementa
+        todas con un solo UPDATE, así dos ventas concurrentes del mismo
+        día/producto/cliente no se pierden.
+        """
+        por_producto = {}
+        for pid, cant, precio in lineas:
+            unidades, monto = por_producto.get(pid, (0, Decimal('0.00')))
+            por_producto[pid] = (unidades + cant, monto + precio * cant)
+        if not por_producto:
+            return
+        cls.objects.bulk_create(
+            [cls(fecha=pedido.fecha, producto_id=pid, cliente_id=pedido.cliente_id) for pid in por_producto],
+            ignore_conflicts=True,
+        )
+        cls.objects.filter(fecha=pedido.fecha, cliente_id=pedido.cliente_id, producto_id__in=por_producto).update(
+            unidades=F('unidades') + Case(
+                *[When(producto_id=pid, then=Value(u)) for pid, (u, _) in por_producto.items()],
+                output_field=models.IntegerField(),
+            ),
+            monto=F('monto') + Case(
+                *[When(producto_id=pid, then=Value(m)) for pid, (_, m) in por_producto.items()],
+                output_field=models.DecimalField(max_digits=16, decimal_places=2),
+            ),
+            pedidos=F('pedidos') + 1,
+        )
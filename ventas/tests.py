@@ -0,0 +1,31 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from inventario.models import CategoriaProducto, Producto, Proveedor
+from ventas.models import Cliente, PedidoVenta, PedidoVentaItem
+
+
+class TotalesCabeceraTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        proveedor = Proveedor.objects.create(empresa='Acme', contacto_principal='-', telefono='-', direccion='-')
+        cls.producto = Producto.objects.create(
+            codigo='P1', nombre='Tornillo', precio_venta=Decimal('10.00'), precio_compra=Decimal('6.00'),
+            cantidad_en_inventario=100, proveedor=proveedor, categoria=CategoriaProducto.objects.create(nombre='G'),
+        )
+        cls.cliente = Cliente.objects.create(nombre_completo='Ana', direccion='-', telefono='-', email='a@x.com')
+
+    def test_guardar_instancia_vieja_no_pisa_totales(self):
+        pedido = PedidoVenta.objects.create(cliente=self.cliente)
+        vieja = PedidoVenta.objects.get(pk=pedido.pk)
+        PedidoVentaItem.objects.create(pedido=pedido, producto=self.producto, cantidad=3, precio_unitario=Decimal('10'))
+
+        vieja.estado = 'completado'
+        vieja.save()
+
+        self.assertEqual((vieja.total, vieja.num_items), (Decimal('30.00'), 1))
+        fila = PedidoVenta.objects.values_list('total', 'num_items', 'estado').get(pk=pedido.pk)
+        self.assertEqual(fila, (Decimal('30.00'), 1, 'completado'))
+        self.producto.refresh_from_db()
+        self.assertEqual(self.producto.cantidad_en_inventario, 97)
@@ -6,8 +6,7 @@ from django.urls import reverse_lazy
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
 
 from .models import Cliente, PedidoVenta
-from inventario.models import Producto
-import json
+from inventario.precios import url_mapa
 from .forms import PedidoVentaForm, PedidoVentaItemFormSet
 
 
@@ -75,13 +74,11 @@ def pedido_venta_create(request):
     else:
         form = PedidoVentaForm(instance=pedido)
         formset = PedidoVentaItemFormSet(instance=pedido)
-    productos = Producto.objects.filter(activo=True).values('id', 'precio_venta')
-    price_map = {str(p['id']): str(p['precio_venta']) for p in productos}
     return render(request, 'ventas/pedidoventa_form.html', {
         'form': form,
         'formset': formset,
         'crear': True,
-        'price_map_json': json.dumps(price_map),
+        'price_map_url': url_mapa('venta'),
     })
 
 
@@ -107,14 +104,12 @@ def pedido_venta_update(request, pk: int):
     else:
         form = PedidoVentaForm(instance=pedido)
         formset = PedidoVentaItemFormSet(instance=pedido)
-    productos = Producto.objects.filter(activo=True).values('id', 'precio_venta')
-    price_map = {str(p['id']): str(p['precio_venta']) for p in productos}
     return render(request, 'ventas/pedidoventa_form.html', {
         'form': form,
         'formset': formset,
         'crear': False,
         'pedido': pedido,
-        'price_map_json': json.dumps(price_map),
+        'price_map_url': url_mapa('venta'),
     })
 
 